@@ -0,0 +1,69 @@
+import operator
+from collections import OrderedDict
+
+# --- OSIĄGNIĘCIA ---
+# "when": lista warunków (klucz, operator, wartość); wszystkie muszą być spełnione. Klucze to statystyki gracza
+# (score, quiz_wins, wordle_wins, story_posts, wins = quiz_wins + wordle_wins) albo pola zdarzenia
+# przekazane do check() (np. wordle_attempts, taboo_win). Nowe osiągnięcie = nowy wpis tutaj.
+ACHIEVEMENTS = {
+    "FIRST_WIN": {"name": "Pierwsze Kroki", "description": "Wygraj grę!", "points": 10, "when": [("wins", ">=", 1)]},
+    "WORDLE_PRO": {"name": "Słowny Geniusz", "description": "Wordle w 2 próbach.", "points": 50, "when": [("wordle_attempts", "==", 2)]},
+    "QUIZ_MASTER": {"name": "Mózg Operacji", "description": "Wygraj 5 quizów.", "points": 25, "when": [("quiz_wins", ">=", 5)]},
+    "DEDECTIVE": {"name": "Mistrz Dedukcji", "description": "Zgadnij Co w <10 pyt.", "points": 30, "when": [("20q_win", "==", True), ("questions_asked", "<=", 10)]},
+    "SOCIALITE": {"name": "Dusza Towarzystwa", "description": "Wygraj w Tabu.", "points": 20, "when": [("taboo_win", "==", True)]},
+    "SCRIBE": {"name": "Pisarz", "description": "Dopisz 5 zdań w Historii.", "points": 15, "when": [("story_posts", ">=", 5)]},
+}
+
+OPS = {'>=': operator.ge, '>': operator.gt, '<=': operator.le, '<': operator.lt, '==': operator.eq}
+STAT_KEYS = frozenset({'score', 'quiz_wins', 'wordle_wins', 'story_posts', 'wins'})
+
+GRANT_SQL = "INSERT INTO achievements (guild_id, user_id, achievement_id) SELECT %s, %s, unnest(%s::text[]) ON CONFLICT DO NOTHING RETURNING achievement_id"
+
+
+def stat_context(stats):
+    ctx = dict(stats); ctx['wins'] = (ctx.get('quiz_wins') or 0) + (ctx.get('wordle_wins') or 0); return ctx
+
+
+def matches(rule, ctx): return all(ctx.get(key) is not None and OPS[op](ctx[key], value) for key, op, value in rule['when'])
+
+
+class AchievementEngine:
+    """Ocena reguł z ACHIEVEMENTS na cache'owanym zbiorze zdobytych osiągnięć; punkty za nie dolicza wołający (przez bufor punktów, jak każde inne)."""
+
+    def __init__(self, db, rules=ACHIEVEMENTS, max_users=10000):
+        self.db, self.rules, self.max_users = db, rules, max_users
+        self.q_granted = db.statement('user_achievements', "SELECT achievement_id FROM achievements WHERE guild_id = $1 AND user_id = $2")
+        self.needs_stats = {aid for aid, rule in rules.items() if any(key in STAT_KEYS for key, _, _ in rule['when'])}
+        self.cache = OrderedDict()  # (guild_id, user_id) -> set(achievement_id)
+        self.stats = {'checks': 0, 'cache_hits': 0, 'stat_reads': 0, 'grant_queries': 0, 'granted': 0}
+
+    async def granted(self, guild_id, user_id):
+        key = (guild_id, user_id); owned = self.cache.get(key)
+        if owned is not None: self.cache.move_to_end(key); self.stats['cache_hits'] += 1; return owned
+        owned = {row['achievement_id'] for row in await self.db.fetchall(self.q_granted, key)}
+        self.cache[key] = owned
+        while len(self.cache) > self.max_users: self.cache.popitem(last=False)
+        return owned
+
+    async def check(self, guild_id, user_id, load_stats, **event):
+        """Zwraca listę nowo przyznanych osiągnięć; load_stats(guild_id, user_id) jest wołane tylko, gdy któraś brakująca reguła zależy od statystyk."""
+        self.stats['checks'] += 1
+        owned = await self.granted(guild_id, user_id)
+        pending = [aid for aid in self.rules if aid not in owned]
+        if not pending: return []
+        ctx = dict(event)
+        if any(aid in self.needs_stats for aid in pending) and (stats := await load_stats(guild_id, user_id)):
+            self.stats['stat_reads'] += 1; ctx.update(stat_context(stats))
+        eligible = [aid for aid in pending if matches(self.rules[aid], ctx)]
+        if not eligible: return []
+        self.stats['grant_queries'] += 1
+        new = await self.db.run(self._grant, guild_id, user_id, eligible)
+        owned.update(new); self.stats['granted'] += len(new)
+        return [aid for aid in eligible if aid in new]
+
+    def _grant(self, cur, guild_id, user_id, eligible):
+        cur.execute(GRANT_SQL, (guild_id, user_id, eligible)); return {row[0] for row in cur.fetchall()}
+
+    def reset(self, guild_id=None):
+        if guild_id is None: self.cache.clear(); return
+        for key in [key for key in self.cache if key[0] == guild_id]: del self.cache[key]
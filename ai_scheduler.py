@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+
+# Klasy priorytetów: niższa liczba = obsługiwana wcześniej
+PRIORITY_INTERACTIVE, PRIORITY_VALIDATION, PRIORITY_BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: 'interactive', PRIORITY_VALIDATION: 'validation', PRIORITY_BACKGROUND: 'background'}
+
+
+class SchedulerRejected(Exception): pass
+class QueueFull(SchedulerRejected): pass
+class CircuitOpen(SchedulerRejected): pass
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity, self.tokens, self.updated = rate, capacity, float(capacity), time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic(); self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate); self.updated = now
+
+    def try_take(self):
+        """Zwraca 0, jeśli token pobrano, w przeciwnym razie liczbę sekund do następnego tokenu."""
+        self._refill()
+        if self.tokens >= 1: self.tokens -= 1; return 0
+        return (1 - self.tokens) / self.rate
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold, self.cooldown, self.failures, self.opened_at, self.probe = threshold, cooldown, 0, None, None
+
+    @property
+    def state(self):
+        if self.opened_at is None: return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        """True przy zamkniętym; w stanie półotwartym przepuszcza jedno zapytanie próbne (zwraca jego znacznik), resztę odrzuca do jego wyniku."""
+        state = self.state
+        if state == 'closed': return True
+        if state == 'open' or self.probe is not None: return False
+        self.probe = object(); return self.probe
+
+    def end_probe(self, probe):
+        """Próba skończyła się bez werdyktu (anulowanie, błąd niezwiązany z usługą): następne zapytanie może spróbować."""
+        if self.probe is probe: self.probe = None
+
+    def success(self): self.failures, self.opened_at, self.probe = 0, None, None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold or self.state == 'half-open': self.opened_at, self.probe = time.monotonic(), None
+
+
+class AIScheduler:
+    """Kolejka priorytetowa przed wywołaniami modelu: limit równoległości, token bucket, ponowienia i bezpiecznik."""
+
+    def __init__(self, rate_per_minute=60, burst=5, max_in_flight=4, max_queue=100, max_retries=3,
+                 backoff_base=2.0, backoff_max=30.0, breaker_threshold=5, breaker_cooldown=30.0, retry_on=()):
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.max_in_flight, self.max_queue, self.max_retries = max_in_flight, max_queue, max_retries
+        self.backoff_base, self.backoff_max, self.retry_on = backoff_base, backoff_max, tuple(retry_on)
+        self.in_flight, self._queue, self._live, self._seq, self._timer = 0, [], 0, itertools.count(), None  # _live: oczekujący bez anulowanych wpisów kopca
+        self.counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'retries': 0, 'rejected_queue': 0, 'rejected_circuit': 0}
+        self.wait_total = {p: 0.0 for p in PRIORITY_NAMES}; self.wait_count = {p: 0 for p in PRIORITY_NAMES}; self.wait_max = 0.0
+
+    def _wake(self):
+        self._timer = None
+        while self._queue and self.in_flight < self.max_in_flight:
+            if self._queue[0][2].cancelled(): heapq.heappop(self._queue); continue
+            delay = self.bucket.try_take()
+            if delay:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._wake); return
+            _, _, fut = heapq.heappop(self._queue); self._live -= 1; self.in_flight += 1; fut.set_result(None)
+
+    async def _acquire(self, priority):
+        if self._live >= self.max_queue:
+            self.counters['rejected_queue'] += 1; raise QueueFull(f"Kolejka AI pełna ({self.max_queue}).")
+        fut = asyncio.get_running_loop().create_future(); start = time.monotonic()
+        heapq.heappush(self._queue, (priority, next(self._seq), fut)); self._live += 1
+        if self._timer is None: self._wake()
+        try: await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled(): self._release()
+            else:
+                self._live -= 1
+                if len(self._queue) > 2 * self._live + 16:  # anulowane wpisy zostają w kopcu do zdjęcia; przy nadmiarze przebudowa
+                    self._queue = [entry for entry in self._queue if not entry[2].cancelled()]; heapq.heapify(self._queue)
+            raise
+        waited = time.monotonic() - start
+        self.wait_total[priority] += waited; self.wait_count[priority] += 1; self.wait_max = max(self.wait_max, waited)
+
+    def _release(self):
+        self.in_flight -= 1
+        if self._timer is None: self._wake()
+
+    async def call(self, factory, priority=PRIORITY_INTERACTIVE):
+        """Wywołuje factory() (zwracające korutynę) z ponowieniami; podnosi SchedulerRejected, gdy nie przyjęto zadania."""
+        self.counters['submitted'] += 1
+        for attempt in range(self.max_retries + 1):
+            if not (admitted := self.breaker.allow()):
+                self.counters['rejected_circuit'] += 1; raise CircuitOpen("Bezpiecznik AI otwarty.")
+            try: await self._acquire(priority)
+            except BaseException: self.breaker.end_probe(admitted); raise
+            try: result = await factory()
+            except self.retry_on:
+                self.breaker.failure()
+                if attempt == self.max_retries: self.counters['failed'] += 1; raise
+                self.counters['retries'] += 1
+            except Exception:
+                self.counters['failed'] += 1; raise
+            else:
+                self.breaker.success(); self.counters['completed'] += 1; return result
+            finally: self._release(); self.breaker.end_probe(admitted)
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    def stats(self):
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, fut in self._queue:
+            if not fut.done(): depth[PRIORITY_NAMES[priority]] += 1
+        avg_wait = {PRIORITY_NAMES[p]: (self.wait_total[p] / self.wait_count[p] if self.wait_count[p] else 0.0) for p in PRIORITY_NAMES}
+        return {'queue_depth': depth, 'in_flight': self.in_flight, 'avg_wait_s': avg_wait, 'max_wait_s': self.wait_max,
+                'circuit': self.breaker.state, 'tokens': round(self.bucket.tokens, 2), **self.counters}
@@ -0,0 +1,78 @@
+# Porównanie przepustowości on_message: stary wzorzec (psycopg2.connect na każde zapytanie, w pętli zdarzeń)
+# kontra pula połączeń z db.py i obecny on_message z cache ustawień. Na kanałach trwa gra Tabu, więc wiadomości przechodzą
+# przez bramkę i handler (bez gry on_message kończy się od razu). Wymaga lokalnego PostgreSQL:
+#   DATABASE_URL=postgresql://localhost/zabawy python benchmarks/bench_db_on_message.py --messages 2000
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark'); os.environ.setdefault('GOOGLE_API_KEY', 'benchmark')
+
+import psycopg2.extras  # noqa: E402
+import main  # noqa: E402
+
+
+def legacy_on_message(dsn):
+    # bramka on_message sprzed zmian: application_info + dwa nowe połączenia na każdą wiadomość
+    def get_setting(key):
+        with psycopg2.connect(dsn) as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur: cur.execute("SELECT value FROM settings WHERE key = %s", (key,)); return cur.fetchone()
+    def get_allowed_channels():
+        row = get_setting('allowed_channels'); return json.loads(row['value']) if row else []
+    async def on_message(message):
+        app_info = await main.bot.application_info()
+        maintenance = get_setting('maintenance_mode')
+        if maintenance and maintenance['value'] == 'true' and message.author.id != app_info.owner.id: return
+        allowed = get_allowed_channels()
+        if allowed and message.channel.id not in allowed: return
+    return on_message
+
+
+async def pooled_on_message(message):
+    # ta sama bramka, ale przez pulę połączeń (bez cache ustawień)
+    app_info = await main.bot.application_info()
+    maintenance = await main.db.fetchone("SELECT value FROM settings WHERE key = %s", ('maintenance_mode',))
+    if maintenance and maintenance['value'] == 'true' and message.author.id != app_info.owner.id: return
+    row = await main.db.fetchone("SELECT value FROM settings WHERE key = %s", ('allowed_channels',))
+    if row and message.channel.id not in json.loads(row['value']): return
+
+
+def fake_message(n):
+    author = SimpleNamespace(id=1000 + n % 50, bot=False, name=f"gracz{n % 50}", mention=f"<@{1000 + n % 50}>")
+    return SimpleNamespace(author=author, content=f"wiadomosc {n}", channel=SimpleNamespace(id=42 + n % 8))
+
+
+async def run(handler, messages, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    async def one(n):
+        async with sem: await handler(fake_message(n))
+    start = time.perf_counter(); await asyncio.gather(*(one(n) for n in range(messages))); return messages / (time.perf_counter() - start)
+
+
+async def bench(args):
+    owner = SimpleNamespace(owner=SimpleNamespace(id=1))
+    async def application_info(): return owner
+    main.bot.application_info = application_info
+    await main.setup_database()
+    await main.settings.load(main.bot)
+    results = {}
+    results['przed (connect na zapytanie)'] = await run(legacy_on_message(main.DATABASE_URL), args.messages, args.concurrency)
+    await run(pooled_on_message, min(args.messages, 100), args.concurrency)  # rozgrzanie puli
+    results['pula połączeń'] = await run(pooled_on_message, args.messages, args.concurrency)
+    for cid in range(42, 50): main.channel_wide_games[cid] = main.Taboo('latarnia', ['morze', 'statek', 'światło'], 1)
+    results['on_message (cache ustawień)'] = await run(main.on_message, args.messages, args.concurrency)
+    main.channel_wide_games.clear()
+    await main.db.close()
+    for name, rate in results.items(): print(f"{name:32s} {rate:10.1f} wiad./s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    asyncio.run(bench(parser.parse_args()))
@@ -0,0 +1,84 @@
+# Czas odtworzenia stanu gier przy starcie dla N aktywnych gier.
+# Bez --db mierzy samo dekodowanie i wypełnianie tabel (koszt CPU po stronie bota);
+# z --db zapisuje gry do game_state w bazie DATABASE_URL i mierzy pełne GameStore.restore().
+#   python benchmarks/bench_game_restore.py --games 10000
+#   DATABASE_URL=postgresql://localhost/zabawy python benchmarks/bench_game_restore.py --games 10000 --db
+import argparse
+import asyncio
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_store import GameStore, PostgresBackend, SCOPE_PLAYER, SCOPE_CHANNEL, encode_state, row_key  # noqa: E402
+from games import Wordle, Hangman, Quiz, TwentyQuestions, Story, game_from_state  # noqa: E402
+
+
+def word(n): return ''.join(random.choices(string.ascii_uppercase, k=n))
+
+
+def synthetic_game(n):
+    kind = n % 5
+    if kind == 0:
+        game = Wordle(word(5), 'normalny')
+        for _ in range(3): game.guess(word(5))
+        return game
+    if kind == 1:
+        game = Hangman(word(7), 'trudny')
+        for c in 'AEIOU': game.guess(c)
+        return game
+    if kind == 2:
+        game = TwentyQuestions('ROWER'); game.questions_asked = 8
+        for _ in range(8): game.record(f"Czy to jest {word(6)}?", 'Pudło')
+        return game
+    if kind == 3: return Quiz({'question': 'Jaka jest stolica Francji?', 'answers': {'A': 'Paryż', 'B': 'Rzym', 'C': 'Madryt', 'D': 'Berlin'}, 'correct_answer': 'A'}, 'łatwy', 'geografia')
+    game = Story("Zdanie numer 0 wspólnej historii o smoku i rowerze.", n)
+    for k in range(1, 20): game.add(f"Zdanie numer {k} wspólnej historii o smoku i rowerze.", n)
+    return game
+
+
+def synthetic_rows(count):
+    rows = []
+    for n in range(count):
+        game = synthetic_game(n)
+        scope, key = (SCOPE_CHANNEL, 10 ** 6 + n) if isinstance(game, Story) else (SCOPE_PLAYER, (10 ** 6 + n % 500, n))
+        rows.append((*row_key(scope, key), None, encode_state(game)))
+    return rows
+
+
+async def bench_db(count):
+    from db import Database
+    from migrations import migrate
+    db = Database(os.environ['DATABASE_URL'], max_size=4); await migrate(db)
+    writer = GameStore(PostgresBackend(db), factory=game_from_state); players, channels = writer.table(SCOPE_PLAYER), writer.table(SCOPE_CHANNEL)
+    for n in range(count):
+        game = synthetic_game(n)
+        if isinstance(game, Story): channels[10 ** 6 + n] = game
+        else: players[(10 ** 6 + n % 500, n)] = game
+    start = time.perf_counter(); await writer.flush(); print(f"zapis {count} gier (jeden flush): {(time.perf_counter() - start) * 1000:.0f} ms")
+    reader = GameStore(PostgresBackend(db), factory=game_from_state); reader.table(SCOPE_PLAYER); reader.table(SCOPE_CHANNEL)
+    restored = await reader.restore()
+    print(f"restore z bazy: {len(restored)} gier w {reader.stats['restore_seconds'] * 1000:.0f} ms")
+    for key in list(players): del players[key]
+    for key in list(channels): del channels[key]
+    await writer.flush(); await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--db', action='store_true')
+    args = parser.parse_args()
+    rows = synthetic_rows(args.games)
+    print(f"rozmiar stanu: {sum(len(r[4]) for r in rows) / len(rows):.0f} B/grę średnio, {sum(len(r[4]) for r in rows) / 1024:.0f} KiB łącznie")
+    store = GameStore(factory=game_from_state); store.table(SCOPE_PLAYER); store.table(SCOPE_CHANNEL)
+    start = time.perf_counter(); restored = store.load_rows(rows); elapsed = time.perf_counter() - start
+    print(f"dekodowanie + tabele: {len(restored)} gier w {elapsed * 1000:.1f} ms ({elapsed / len(restored) * 1e6:.1f} µs/grę)")
+    if args.db: asyncio.run(bench_db(args.games))
+
+
+if __name__ == '__main__':
+    main()
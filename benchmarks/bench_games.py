@@ -0,0 +1,87 @@
+# Pamięć na aktywną grę i przepustowość ruchów: dawne słowniki gier kontra obiekty z games.py.
+#   python benchmarks/bench_games.py --games 10000 --guesses 200000
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games import Wordle, Hangman, check_wordle_guess  # noqa: E402
+
+LETTERS = string.ascii_uppercase
+
+
+def word(n): return ''.join(random.choices(LETTERS, k=n))
+
+
+# --- stara logika (słowniki z main.py sprzed zmian) ---
+def dict_wordle(secret): return {'game_type': 'wordle', 'word': secret, 'attempts': 0, 'max_attempts': 6, 'difficulty': 'normalny', 'hints_used': 0}
+def dict_hangman(secret): return {'game_type': 'hangman', 'word': secret, 'guessed_letters': [], 'wrong_guesses': 0, 'max_wrong_guesses': 6, 'difficulty': 'normalny', 'hints_used': 0}
+
+
+def dict_wordle_guess(game, guess):
+    game['attempts'] += 1; game.setdefault('history', []).append(guess); return check_wordle_guess(guess, game['word'])
+
+
+def dict_hangman_guess(game, letter):
+    if letter in game.get('guessed_letters', []): return None
+    game.setdefault('guessed_letters', []).append(letter)
+    if letter not in game['word']: game['wrong_guesses'] += 1
+    return all(l in game['guessed_letters'] for l in game['word'])
+
+
+# --- nowa logika ---
+def obj_hangman_guess(game, letter):
+    if game.guess(letter) is None: return None
+    return game.solved
+
+
+def measure_memory(factory, secrets):
+    tracemalloc.start(); before = tracemalloc.get_traced_memory()[0]
+    games = [factory(s) for s in secrets]
+    used = tracemalloc.get_traced_memory()[0] - before; tracemalloc.stop()
+    return used / len(games), games
+
+
+def hangman_throughput(factory, guess, secrets, letters):
+    games, n = [factory(s) for s in secrets], 0
+    start = time.perf_counter()
+    for idx, letter in enumerate(letters):
+        guess(games[idx % len(games)], letter); n += 1
+    return n / (time.perf_counter() - start)
+
+
+def wordle_throughput(factory, guess, secrets, guesses):
+    games = [factory(s) for s in secrets]
+    start = time.perf_counter()
+    for idx, g in enumerate(guesses):
+        guess(games[idx % len(games)], g)
+    return len(guesses) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--guesses', type=int, default=200000)
+    args = parser.parse_args()
+    random.seed(1)
+    secrets = [word(random.randint(5, 8)) for _ in range(args.games)]
+    letters = random.choices(LETTERS, k=args.guesses); guesses = [word(5) for _ in range(args.guesses)]
+    five = [word(5) for _ in range(args.games)]
+
+    for name, factory in (('wisielec (dict)', dict_hangman), ('wisielec (Hangman)', lambda s: Hangman(s, 'normalny')), ('wordle (dict)', dict_wordle), ('wordle (Wordle)', lambda s: Wordle(s, 'normalny'))):
+        per_game, _ = measure_memory(factory, secrets)
+        print(f"{name:<20} {per_game:7.0f} B/grę")
+
+    print(f"{'wisielec (dict)':<20} {hangman_throughput(dict_hangman, dict_hangman_guess, secrets, letters):12,.0f} ruchów/s")
+    print(f"{'wisielec (Hangman)':<20} {hangman_throughput(lambda s: Hangman(s, 'normalny'), obj_hangman_guess, secrets, letters):12,.0f} ruchów/s")
+    print(f"{'wordle (dict)':<20} {wordle_throughput(dict_wordle, dict_wordle_guess, five, guesses):12,.0f} ruchów/s")
+    print(f"{'wordle (Wordle)':<20} {wordle_throughput(lambda s: Wordle(s, 'normalny'), Wordle.guess, five, guesses):12,.0f} ruchów/s")
+
+
+if __name__ == '__main__':
+    main()
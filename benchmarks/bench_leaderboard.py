@@ -0,0 +1,52 @@
+# Ranking dla N graczy: ładowanie, aktualizacje punktów, miejsce gracza i strony rankingu
+# w Leaderboard kontra dotychczasowe podejście (sortowanie wszystkich przy każdym zapytaniu).
+#   python benchmarks/bench_leaderboard.py --users 1000000
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard  # noqa: E402
+
+
+def timed(label, fn, n):
+    start = time.perf_counter(); fn(); elapsed = time.perf_counter() - start
+    print(f"{label:<42} {elapsed / n * 1e6:10.2f} µs/op  ({n} op, {elapsed:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--ops', type=int, default=100000)
+    parser.add_argument('--naive-ops', type=int, default=20)
+    args = parser.parse_args()
+    random.seed(7)
+    scores = {uid: int(random.paretovariate(1.2) * 10) for uid in range(args.users)}
+    rows = sorted(((uid, f"gracz{uid}", s) for uid, s in scores.items()), key=lambda r: (-r[2], r[0]))
+
+    lb = Leaderboard()
+    start = time.perf_counter(); lb.load(rows); print(f"ładowanie {len(lb)} graczy: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    uids = [random.randrange(args.users) for _ in range(args.ops)]
+    timed("Leaderboard.add (wygrana +15)", lambda: [lb.add(u, "x", 15) for u in uids], args.ops)
+    timed("Leaderboard.rank", lambda: [lb.rank(u) for u in uids], args.ops)
+    timed("Leaderboard.page (top 10)", lambda: [lb.page(0, 10) for _ in range(args.ops)], args.ops)
+    offsets = [random.randrange(args.users - 10) for _ in range(args.ops)]
+    timed("Leaderboard.page (losowa strona)", lambda: [lb.page(o, 10) for o in offsets], args.ops)
+
+    for u in uids: scores[u] += 15
+    sample = uids[:args.naive_ops]
+    timed("naiwnie: top 10 (heapq.nlargest)", lambda: [heapq.nlargest(10, scores.items(), key=lambda kv: kv[1]) for _ in sample], len(sample))
+    timed("naiwnie: miejsce (zliczanie lepszych)", lambda: [sum(1 for s in scores.values() if s > scores[u]) for u in sample], len(sample))
+
+    for u in sample[:5]:
+        assert lb.rank(u) == 1 + sum(1 for v, s in scores.items() if s > scores[u] or (s == scores[u] and v < u))
+    print("miejsca zgodne z pełnym sortowaniem")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Prawie-duplikaty pytań: dotychczasowy skrót SHA-1 treści kontra podpisy MinHash w indeksie LSH, na syntetycznym korpusie.
+#   python benchmarks/bench_near_duplicates.py --questions 100000
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import LSHIndex, features, signature  # noqa: E402
+from quiz_bank import question_digest  # noqa: E402
+
+SYLLABLES = "ba be bo ka ko ku ma mi mo na no ra re ro ta to sa so wa wi za ze la li po pa dy gr kr st pr".split()
+TEMPLATES = ["Jaki {0} ma {1} w {2}?", "Jak nazywa się {0}, który ma {1} w {2}?", "Co jest {0} dla {1} z {2}?"]
+REWORDED = ["Który {0} posiada {1} w {2}?", "Podaj nazwę: {0} posiadający {1} w {2}.", "W {2} {1} ma jaki {0}?"]
+
+
+def word(rng): return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def question(t, topic, answer): return f"{TEMPLATES[t].format(*topic)} {answer}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--probes', type=int, default=2000)
+    parser.add_argument('--threshold', type=float, default=0.6)
+    args = parser.parse_args()
+    rng = random.Random(25); vocab = list({word(rng) for _ in range(30000)})
+    corpus = [(rng.randrange(len(TEMPLATES)), rng.sample(vocab, 3), rng.choice(vocab)) for _ in range(args.questions)]
+    texts = [question(*item) for item in corpus]
+    print(f"{len(texts)} pytań, słownik {len(vocab)} słów")
+
+    start = time.perf_counter(); sigs = [signature(t) for t in texts]; sig_us = (time.perf_counter() - start) / len(texts) * 1e6
+    keys = [question_digest(t) for t in texts]; start = time.perf_counter()
+    index = LSHIndex(); index.extend(zip(keys, sigs)); build_s = time.perf_counter() - start
+    tracemalloc.start(); copy = LSHIndex(); copy.extend(zip(keys, sigs)); index_mem = tracemalloc.get_traced_memory()[0]; tracemalloc.stop(); del copy
+    digests = set(keys)
+
+    probes = rng.sample(range(len(corpus)), args.probes)
+    reworded = [f"{rng.choice(REWORDED).format(*corpus[n][1])} {corpus[n][2]}" for n in probes]  # inne słowa i szyk, ta sama treść i odpowiedź
+    cosmetic = [texts[n].upper().replace('?', ' ?!') for n in probes]  # tylko wielkość liter i interpunkcja
+    related = []  # ten sam szablon i dwa z trzech słów tematu, ale inne pytanie i inna odpowiedź
+    for n in probes:
+        t, topic, _ = corpus[n]; topic = list(topic); topic[rng.randrange(3)] = rng.choice(vocab)
+        related.append(question(t, topic, rng.choice(vocab)))
+    fresh = [question(rng.randrange(len(TEMPLATES)), rng.sample(vocab, 3), rng.choice(vocab)) for _ in probes]
+
+    def flagged(text):
+        match = index.nearest(signature(text)); return bool(match) and match[1] >= args.threshold
+    times = []
+    for text in fresh + reworded:
+        sig = signature(text); start = time.perf_counter(); index.nearest(sig); times.append((time.perf_counter() - start) * 1e6)
+    times.sort(); probe_sets = (('przeformułowane', reworded), ('zmiana liter/interpunkcji', cosmetic), ('pokrewne, inne (fałszywe)', related), ('nowe (fałszywe)', fresh))
+    detected = [(name, sum(question_digest(t) in digests for t in probe) / len(probe), sum(map(flagged, probe)) / len(probe)) for name, probe in probe_sets]
+    adds = [signature(t) for t in fresh]; start = time.perf_counter()
+    for n, sig in enumerate(adds): index.add(f"new{n}", sig)
+    add_us = (time.perf_counter() - start) / len(adds) * 1e6
+
+    sets = [features(t) for t in texts[:20000]]; start = time.perf_counter()
+    for text in reworded[:50]:
+        f = features(text); max(len(f & s) / len(f | s) for s in sets)
+    brute_ms = (time.perf_counter() - start) / 50 * 1e3 * len(texts) / len(sets)
+
+    print(f"\n{'podpis MinHash':<36} {sig_us:8.1f} µs/pytanie")
+    print(f"{'budowa indeksu (wczytanie)':<36} {build_s:8.2f} s")
+    print(f"{'pamięć indeksu':<36} {index_mem / 2**20:8.1f} MiB ({index_mem / len(texts):.0f} B/pytanie, z kluczami)")
+    print(f"{'wyszukanie w LSH':<36} {statistics.median(times):8.1f} µs p50, {times[int(len(times) * 0.99)]:.1f} µs p99")
+    print(f"{'dodanie do indeksu':<36} {add_us:8.1f} µs/op")
+    print(f"{'pełne porównanie Jaccarda':<36} {brute_ms:8.1f} ms/zapytanie (ekstrapolacja z 20k)")
+
+    print(f"\n{'wykryte jako powtórka':<36} {'SHA-1':>8} {'MinHash':>8}")
+    for name, exact, near in detected: print(f"{name:<36} {exact:8.1%} {near:8.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Ostatnio użyte słowa: dotychczasowy set (rosnący bez końca, w całości wklejany do promptu) kontra RecentWords.
+#   python benchmarks/bench_recent_words.py --words 1000000
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recent_words import RecentWords, RotatingBloom  # noqa: E402
+
+
+def measure(build):
+    tracemalloc.start(); start = time.perf_counter(); obj = build(); elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]; tracemalloc.stop()
+    return obj, size, elapsed
+
+
+def per_op(fn, items):
+    start = time.perf_counter()
+    for item in items: fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--probes', type=int, default=200000)
+    parser.add_argument('--capacity', type=int, default=100000, help="słów na pokolenie filtra")
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--max-recent', type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(5)
+    words = list({''.join(random.choices(string.ascii_uppercase, k=random.randint(4, 8))) for _ in range(int(args.words * 1.1))})[:args.words]
+    print(f"{len(words)} unikalnych słów (4-8 liter)")
+
+    used, set_mem, _ = measure(lambda: set(words))
+    bloom, _, _ = measure(lambda: RotatingBloom(args.capacity, args.error_rate))
+    recent = RecentWords(7 * 86400, args.max_recent, args.capacity, args.error_rate)
+    tracemalloc.start()
+    for w in words: recent.add(w)
+    lru_mem = tracemalloc.get_traced_memory()[0]; tracemalloc.stop()
+    add_us = per_op(bloom.add, words)
+
+    prompt = f"Nie może to być żadne z tych słów: {', '.join(used)}."
+    print(f"{'set (dotychczas)':<34} {set_mem / 2**20:8.1f} MiB (bez samych napisów)")
+    print(f"{'prompt z wykluczeniami (dotychczas)':<34} {len(prompt) / 2**20:8.1f} MiB tekstu, ~{len(prompt) // 4:,} tokenów na każde słowo z AI")
+    print(f"{'RotatingBloom':<34} {bloom.memory() / 2**10:8.1f} KiB (2 x {args.capacity} słów)")
+    print(f"{'RecentWords (okno + filtr)':<34} {lru_mem / 2**10:8.1f} KiB, w oknie {len(recent)} słów")
+
+    known = random.sample(words[-args.capacity:], min(args.probes, args.capacity))
+    unknown = [w + 'Q' for w in random.sample(words, args.probes)]
+    print(f"\n{'set: sprawdzenie':<34} {per_op(used.__contains__, unknown):8.3f} µs/op")
+    print(f"{'RecentWords: w oknie':<34} {per_op(recent.__contains__, unknown):8.3f} µs/op")
+    print(f"{'RecentWords.seen':<34} {per_op(recent.seen, unknown):8.3f} µs/op")
+    print(f"{'RotatingBloom.add':<34} {add_us:8.3f} µs/op")
+    print(f"{'RecentWords.add':<34} {per_op(RecentWords(7 * 86400, args.max_recent, args.capacity, args.error_rate).add, unknown):8.3f} µs/op")
+    fp = sum(w in bloom for w in unknown) / len(unknown)
+    print(f"\nfałszywe trafienia filtra: {fp:.3%} (cel {args.error_rate:.1%}), ostatnie {args.capacity} słów zawsze wykryte: {all(w in bloom for w in known)}")
+
+
+if __name__ == '__main__':
+    main()
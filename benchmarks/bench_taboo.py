@@ -0,0 +1,55 @@
+# Sprawdzanie wiadomości w Tabu: dotychczasowe re.findall + lista kontra skompilowana karta (taboo_matcher).
+#   python benchmarks/bench_taboo.py --words 400 --messages 20000
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from taboo_matcher import TabooCard, compile_card  # noqa: E402
+
+KEYWORD, TABOO = "PSZCZOŁA", ("MIÓD", "UL", "ŻĄDŁO", "KWIAT", "PLASTER MIODU")
+FILLER = ["zwierzę", "które", "lata", "nad", "łąką", "jest", "małe", "żółte", "czarne", "robi", "słodkie", "rzeczy", "latem", "często", "bzyczy", "ogród", "owad", "pracowita"]
+
+
+def legacy_check(content, describer, keyword=KEYWORD, taboo_words=[w.upper() for w in TABOO]):
+    words = set(re.findall(r'\b\w+\b', content.upper()))
+    if describer: return next((w for w in taboo_words + [keyword] if w in words), None)
+    return keyword if keyword in words else None
+
+
+def timed(label, fn, n, chars):
+    start = time.perf_counter(); fn(); elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / n * 1e6:8.2f} µs/wiad.  {chars / elapsed / 1e6:7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=400, help="słów w wiadomości")
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args()
+    random.seed(3)
+    messages = [' '.join(random.choices(FILLER, k=args.words)) for _ in range(args.messages)]
+    chars = sum(map(len, messages))
+    print(f"{args.messages} wiadomości po {args.words} słów (średnio {chars // args.messages} znaków), bez trafień")
+
+    start = time.perf_counter(); n = 10000
+    for _ in range(n): TabooCard(KEYWORD, TABOO)
+    print(f"{'kompilacja karty':<40} {(time.perf_counter() - start) / n * 1e6:8.2f} µs")
+    card = compile_card(KEYWORD, TABOO)
+    for role, describer in (("opisujący", True), ("zgadujący", False)):
+        timed(f"dotychczas ({role})", lambda: [legacy_check(m, describer) for m in messages], args.messages, chars)
+        timed(f"TabooCard.match ({role})", lambda: [card.match(m, describer) for m in messages], args.messages, chars)
+
+    inflected = ["dużo miodu", "mieszka w ulu", "przed ulem", "ma żądło", "siada na kwiatach", "pszczoły", "tych pszczół"]
+    print("\nformy odmienione (dotychczas -> teraz):")
+    for text in inflected:
+        describer = not text.startswith(("pszcz", "tych"))
+        print(f"  {text!r:<22} {legacy_check(text, describer)!s:<10} -> {card.match(text, describer)}")
+
+
+if __name__ == '__main__':
+    main()
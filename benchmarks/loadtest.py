@@ -0,0 +1,283 @@
+# Test obciążeniowy main.py bez Discorda, Gemini i (opcjonalnie) bazy: syntetyczne wiadomości i interakcje
+# przechodzą przez on_message, handlery gier i callbacki komend; Gemini i baza mają sztuczne opóźnienia.
+#   python benchmarks/loadtest.py --scenario wordle --players 500
+#   python benchmarks/loadtest.py --scenario story --players 50 --messages 20 --ai-latency 0.8
+#   DATABASE_URL=postgresql://localhost/zabawy python benchmarks/loadtest.py --scenario all --real-db
+#   python benchmarks/loadtest.py --scenario wordle --players 2000 --workers 4   # gracze rozdzieleni na 4 procesy jak shardy
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import re
+import statistics
+import string
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for key, value in {'DISCORD_TOKEN': 'loadtest', 'GOOGLE_API_KEY': 'loadtest', 'DATABASE_URL': 'postgresql://localhost/loadtest', 'METRICS_PORT': '0', 'LOG_JSONL_PATH': '', 'AI_RATE_PER_MINUTE': '1000000',
+                   'AI_BURST': '1000', 'AI_MAX_IN_FLIGHT': '64', 'AI_MAX_QUEUE': '100000'}.items():
+    os.environ.setdefault(key, value)
+
+import main  # noqa: E402
+
+IDS = itertools.count(10 ** 12)
+
+
+# --- ATRAPY DISCORDA ---
+class FakeTyping:
+    async def __aenter__(self): return self
+    async def __aexit__(self, *exc): return False
+
+
+class FakeChannel:
+    api_calls = 0  # wszystkie wywołania REST (wysłanie, edycja, reakcja) we wszystkich kanałach
+
+    def __init__(self, cid, latency):
+        self.id, self.latency, self.mention, self.sent = cid, latency, f"<#{cid}>", 0
+
+    async def send(self, content=None, **kwargs):
+        FakeChannel.api_calls += 1; await asyncio.sleep(self.latency); self.sent += 1; return FakeMessage(None, self, content)
+
+    def typing(self): return FakeTyping()
+
+
+class FakeUser:
+    def __init__(self, uid):
+        self.id, self.name, self.bot, self.mention = uid, f"gracz{uid}", False, f"<@{uid}>"
+        self.display_avatar = SimpleNamespace(url="https://example.invalid/avatar.png")
+        self.guild_permissions = SimpleNamespace(administrator=False)
+
+    def __str__(self): return self.name
+
+
+class FakeMessage:
+    def __init__(self, author, channel, content):
+        self.id, self.author, self.channel, self.content = next(IDS), author, channel, content
+
+    async def edit(self, content=None, **kwargs): FakeChannel.api_calls += 1; await asyncio.sleep(self.channel.latency)
+
+    async def reply(self, content=None, **kwargs): return await self.channel.send(content)
+    async def add_reaction(self, emoji): FakeChannel.api_calls += 1; await asyncio.sleep(self.channel.latency)
+
+
+class FakeResponse:
+    def __init__(self, channel): self.channel, self.done = channel, False
+    def is_done(self): return self.done
+    async def send_message(self, content=None, **kwargs): self.done = True; await asyncio.sleep(self.channel.latency)
+    async def defer(self, **kwargs): self.done = True
+    async def edit_message(self, **kwargs): self.done = True; await asyncio.sleep(self.channel.latency)
+
+
+class FakeInteraction:
+    def __init__(self, user, channel):
+        self.user, self.channel, self.channel_id, self.guild, self.guild_id = user, channel, channel.id, None, None
+        self.response, self.followup, self.created_at = FakeResponse(channel), SimpleNamespace(send=channel.send), datetime.now(timezone.utc)
+
+    async def edit_original_response(self, **kwargs): await asyncio.sleep(self.channel.latency)
+
+
+# --- ATRAPY GEMINI I BAZY ---
+class FakeStream:
+    """Odpowiedź z stream=True: fragmenty po kilka słów, rozłożone na czas generowania."""
+
+    def __init__(self, text, duration): self.text, self.duration, self.usage_metadata = text, duration, None
+
+    async def __aiter__(self):
+        words = self.text.split(' '); chunks = [' '.join(words[n:n + 3]) + ' ' for n in range(0, len(words), 3)]
+        for chunk in chunks: await asyncio.sleep(self.duration / len(chunks)); yield SimpleNamespace(text=chunk)
+
+
+class FakeModel:
+    """Zastępuje model.generate_content_async: opóźnienie ~ N(latency, latency/4) i odpowiedź zależna od promptu."""
+
+    def __init__(self, latency): self.latency, self.calls = latency, 0
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1; latency = max(0.0, random.gauss(self.latency, self.latency / 4))
+        if stream: await asyncio.sleep(latency / 5); return FakeStream(self.answer(prompt), latency * 4 / 5)
+        await asyncio.sleep(latency); return SimpleNamespace(text=self.answer(prompt), usage_metadata=None)
+
+    def answer(self, prompt):
+        if '"TAK" lub "NIE"' in prompt: return "TAK"
+        if 'ODPOWIEDZ TYLKO SAMYM SŁOWEM' in prompt: return ''.join(random.choices(string.ascii_uppercase, k=int(re.search(r'(\d+) liter', prompt).group(1))))
+        if '20 pytań' in prompt: return random.choice(["Zgadza się", "Pudło", "Nie do końca"])
+        return "Nagle z lasu wyszedł smok i poprosił o herbatę."
+
+
+class FakeCursor:
+    def __init__(self, conn): self.connection, self.rowcount, self.statements = conn, 0, 0
+    def execute(self, query, params=None): self.statements += 1
+    def mogrify(self, template, args): return b'()'
+    def fetchone(self): return None
+    def fetchall(self): return []
+
+
+class FakeDatabase:
+    """Podmienia Database.run: każda operacja czeka `latency` i widzi pustą bazę."""
+
+    def __init__(self, db, latency):
+        self.latency, self.ops, self.conn = latency, 0, SimpleNamespace(prepared=set(), encoding='UTF8')
+        db.run = self.run
+
+    async def run(self, fn, *args):
+        self.ops += 1; await asyncio.sleep(self.latency); return fn(FakeCursor(self.conn), *args)
+
+
+# --- POMIARY ---
+class LoopProbe:
+    def __init__(self, interval=0.01): self.interval, self.lags, self._task = interval, [], None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time(); await asyncio.sleep(self.interval); self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self): self._task = asyncio.get_running_loop().create_task(self._run())
+    def stop(self): self._task.cancel()
+
+
+def percentile(values, p): return sorted(values)[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+async def timed_message(message, latencies):
+    start = time.perf_counter(); await main.on_message(message); latencies.append(time.perf_counter() - start)
+
+
+def report(name, result):
+    latencies, elapsed, lags = result['latencies'], result['elapsed'], result['lags']
+    print(f"\n== {name} ==")
+    print(f"wiadomości: {len(latencies)} w {elapsed:.2f} s -> {len(latencies) / elapsed:,.0f} wiad./s")
+    print(f"opóźnienie on_message: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms, maks. {max(latencies) * 1000:.2f} ms")
+    print(f"dosłanie odpowiedzi po ostatniej wiadomości: {result['drain'] * 1000:.0f} ms")
+    print(f"blokowanie pętli: p99 {percentile(lags, 0.99) * 1000:.2f} ms, maks. {max(lags, default=0) * 1000:.2f} ms, średnio {statistics.fmean(lags or [0]) * 1000:.3f} ms")
+    print(f"wywołania Gemini: {result['ai_calls']}" + (f", operacje bazy: {result['db_ops']}" if result['db_ops'] is not None else "") + f", wywołania API Discorda: {result['discord_calls']} ({result['discord_calls'] / max(1, len(latencies)):.2f}/wiad.)")
+
+
+def merge(results):
+    """Wyniki workerów jednego scenariusza: przepustowość liczona od startu do końca najwolniejszego procesu."""
+    return {'latencies': [x for r in results for x in r['latencies']], 'elapsed': max(r['elapsed'] for r in results), 'drain': max(r['drain'] for r in results), 'lags': [x for r in results for x in r['lags']],
+            'ai_calls': sum(r['ai_calls'] for r in results), 'discord_calls': sum(r['discord_calls'] for r in results), 'db_ops': None if results[0]['db_ops'] is None else sum(r['db_ops'] for r in results)}
+
+
+# --- SCENARIUSZE ---
+def require_games(table, keys, command):
+    """Gry zaczynamy prawdziwymi callbackami komend; gdy któraś ich nie rozpoczęła, pomiar nie ma sensu."""
+    if missing := [key for key in keys if key not in table]: raise RuntimeError(f"{command} nie rozpoczęło {len(missing)} z {len(keys)} gier")
+
+
+async def scenario_wordle(args, channel_latency):
+    """N graczy rozpoczyna Wordle przez /wordle, a potem równolegle zgaduje (każdy po kolei, do końca gry)."""
+    channels = [FakeChannel(next(IDS), channel_latency) for _ in range(max(1, args.players // 25))]
+    players = [(FakeUser(next(IDS)), channels[n % len(channels)]) for n in range(args.players)]
+    await asyncio.gather(*(main.wordle.callback(FakeInteraction(u, ch), 5, "normalny") for u, ch in players))
+    require_games(main.player_games, [(ch.id, u.id) for u, ch in players], "/wordle"); latencies = []
+
+    async def play(user, channel):
+        for _ in range(args.messages):
+            await timed_message(FakeMessage(user, channel, ''.join(random.choices(string.ascii_uppercase, k=5))), latencies)
+            if args.think: await asyncio.sleep(random.uniform(0, args.think))
+    start = time.perf_counter(); await asyncio.gather(*(play(u, ch) for u, ch in players))
+    return latencies, time.perf_counter() - start
+
+
+async def scenario_hangman(args, channel_latency):
+    channels = [FakeChannel(next(IDS), channel_latency) for _ in range(max(1, args.players // 25))]
+    players = [(FakeUser(next(IDS)), channels[n % len(channels)]) for n in range(args.players)]
+    await asyncio.gather(*(main.hangman.callback(FakeInteraction(u, ch), "normalny") for u, ch in players))
+    require_games(main.player_games, [(ch.id, u.id) for u, ch in players], "/wisielec"); latencies = []
+
+    async def play(user, channel):
+        for letter in random.sample(string.ascii_uppercase, min(args.messages, 26)):
+            await timed_message(FakeMessage(user, channel, letter), latencies)
+            if args.think: await asyncio.sleep(random.uniform(0, args.think))
+    start = time.perf_counter(); await asyncio.gather(*(play(u, ch) for u, ch in players))
+    return latencies, time.perf_counter() - start
+
+
+async def scenario_story(args, channel_latency):
+    """Jeden ruchliwy kanał historii: wielu autorów dopisuje zdania na zmianę."""
+    channel, starter = FakeChannel(next(IDS), channel_latency), FakeUser(next(IDS))
+    await main.story.callback(FakeInteraction(starter, channel), "smok i rower"); require_games(main.channel_wide_games, [channel.id], "/historia")
+    authors, latencies = [FakeUser(next(IDS)) for _ in range(args.players)], []
+
+    async def write(user):
+        for n in range(args.messages):
+            await timed_message(FakeMessage(user, channel, f"{user.name} dopisuje zdanie numer {n}."), latencies)
+            await asyncio.sleep(random.uniform(0, args.think or 0.01))
+    start = time.perf_counter(); await asyncio.gather(*(write(u) for u in authors))
+    return latencies, time.perf_counter() - start
+
+
+async def scenario_associations(args, channel_latency):
+    """Kanały skojarzeń (start przez /skojarzenia): każde nowe słowo idzie do walidacji przez Gemini (i cache werdyktów)."""
+    channels = [FakeChannel(next(IDS), channel_latency) for _ in range(max(1, args.players // 10))]
+    await asyncio.gather(*(main.associations.callback(FakeInteraction(FakeUser(next(IDS)), ch)) for ch in channels))
+    require_games(main.channel_wide_games, [ch.id for ch in channels], "/skojarzenia")
+    latencies, vocabulary = [], [''.join(random.choices(string.ascii_uppercase, k=6)) for _ in range(200)]
+
+    async def play(user, channel):
+        for _ in range(args.messages):
+            await timed_message(FakeMessage(user, channel, random.choice(vocabulary)), latencies)
+            await asyncio.sleep(random.uniform(0, args.think or 0.01))
+    start = time.perf_counter(); await asyncio.gather(*(play(FakeUser(next(IDS)), channels[n % len(channels)]) for n in range(args.players)))
+    return latencies, time.perf_counter() - start
+
+
+SCENARIOS = {'wordle': scenario_wordle, 'hangman': scenario_hangman, 'story': scenario_story, 'associations': scenario_associations}
+
+
+async def run(args):
+    """Wykonuje scenariusze w tym procesie; zwraca {scenariusz: wynik}."""
+    random.seed(args.seed)
+    model = FakeModel(args.ai_latency); main.model = model
+    fake_db = None if args.real_db else FakeDatabase(main.db, args.db_latency)
+    if args.real_db: await main.setup_database()
+    main.bot._connection.user = FakeUser(1)  # bot.user dla gier kanałowych i podpowiedzi AI
+    results = {}
+    for name in (SCENARIOS if args.scenario == 'all' else [args.scenario]):
+        main.player_games.clear(); main.channel_wide_games.clear()
+        probe = LoopProbe(); probe.start(); calls, ops, api_calls = model.calls, fake_db.ops if fake_db else 0, FakeChannel.api_calls
+        latencies, elapsed = await SCENARIOS[name](args, args.discord_latency)
+        start = time.perf_counter(); await main.outbox.flush(); drain = time.perf_counter() - start  # odpowiedzi wysyłane w tle, po powrocie on_message
+        probe.stop()
+        results[name] = {'latencies': latencies, 'elapsed': elapsed, 'drain': drain, 'lags': probe.lags, 'ai_calls': model.calls - calls, 'discord_calls': FakeChannel.api_calls - api_calls, 'db_ops': fake_db.ops - ops if fake_db else None}
+    await main.scores.stop()
+    if args.real_db: await main.games.flush(); await main.db.close()
+    return results
+
+
+def run_worker(args, worker):
+    """Jeden proces z --workers: własna pętla zdarzeń i własny main, jak worker z częścią shardów."""
+    args.seed += worker; return asyncio.run(run(args))
+
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', choices=[*SCENARIOS, 'all'], default='all')
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--messages', type=int, default=6, help="wiadomości na gracza")
+    parser.add_argument('--think', type=float, default=0.0, help="maks. przerwa między wiadomościami gracza [s]")
+    parser.add_argument('--ai-latency', type=float, default=0.5, help="średni czas odpowiedzi atrapy Gemini [s]")
+    parser.add_argument('--db-latency', type=float, default=0.002, help="czas operacji atrapy bazy [s]")
+    parser.add_argument('--discord-latency', type=float, default=0.05, help="czas wywołań API Discorda [s]")
+    parser.add_argument('--real-db', action='store_true', help="użyj bazy z DATABASE_URL zamiast atrapy")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=1, help="procesy; gracze dzieleni między nie po równo")
+    args = parser.parse_args()
+    label = lambda name: f"{name} (gracze: {args.players}, wiadomości/gracz: {args.messages}" + (f", procesy: {args.workers})" if args.workers > 1 else ")")
+    if args.workers <= 1:
+        for name, result in asyncio.run(run(args)).items(): report(label(name), result)
+        return
+    total, args.players = args.players, max(1, args.players // args.workers)
+    with ProcessPoolExecutor(args.workers) as pool: per_worker = list(pool.map(run_worker, [args] * args.workers, range(args.workers)))
+    args.players = total
+    for name in per_worker[0]: report(label(name), merge([r[name] for r in per_worker]))
+
+
+if __name__ == '__main__':
+    cli()
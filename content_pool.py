@@ -0,0 +1,67 @@
+import asyncio
+import json
+from collections import defaultdict, deque
+
+
+class ContentPool:
+    """Bufory wygenerowanej zawczasu treści (słowa, karty, scenariusze), utrwalane w tabeli content_pool.
+    Każdy worker ma własne wiersze (owner), więc pop() zostaje bez czekania na bazę, a ten sam element nie trafi do dwóch procesów."""
+
+    def __init__(self, db, low_watermark=2, high_watermark=5, refill_interval=60.0, owner='0'):
+        self.db, self.low, self.high, self.refill_interval, self.owner = db, low_watermark, high_watermark, refill_interval, owner
+        self.buffers = defaultdict(deque)  # (kind, bucket) -> deque[(id, payload)]
+        self.producers = {}  # kind -> (producer(bucket), buckets)
+        self.stats = {'hits': 0, 'misses': 0, 'generated': 0, 'rejected': 0}
+        self._wake, self._task, self._loaded, self._pending = asyncio.Event(), None, False, set()
+
+    def register(self, kind, producer, buckets=('',)):
+        self.producers[kind] = (producer, tuple(buckets))
+
+    async def load(self):
+        if self._loaded: return
+        for row in await self.db.fetchall("SELECT id, kind, bucket, payload FROM content_pool WHERE owner = %s ORDER BY id", (self.owner,)):
+            self.buffers[(row['kind'], row['bucket'])].append((row['id'], json.loads(row['payload'])))
+        self._loaded = True
+
+    def _background(self, coro):
+        task = asyncio.get_running_loop().create_task(coro); self._pending.add(task); task.add_done_callback(self._pending.discard)
+
+    def pop(self, kind, bucket='', accept=None):
+        """Zdejmuje element z bufora bez żadnego oczekiwania; None, gdy bufor pusty."""
+        buf, consumed, payload = self.buffers.get((kind, bucket)), [], None
+        while buf:
+            item_id, item = buf.popleft(); consumed.append(item_id)
+            if accept is None or accept(item): payload = item; break
+        if consumed: self._background(self.db.execute("DELETE FROM content_pool WHERE id = ANY(%s)", (consumed,)))
+        self.stats['hits' if payload is not None else 'misses'] += 1; self._wake.set()
+        return payload
+
+    def size(self, kind, bucket=''): return len(self.buffers.get((kind, bucket), ()))
+
+    async def _fill(self, kind, bucket, producer):
+        buf = self.buffers[(kind, bucket)]
+        if len(buf) >= self.low: return
+        while len(buf) < self.high:
+            payload = await producer(bucket)
+            if payload is None: self.stats['rejected'] += 1; return
+            item_id = await self.db.fetchval("INSERT INTO content_pool (kind, bucket, payload, owner) VALUES (%s, %s, %s, %s) RETURNING id", (kind, bucket, json.dumps(payload, ensure_ascii=False), self.owner))
+            buf.append((item_id, payload)); self.stats['generated'] += 1
+
+    async def refill(self):
+        for kind, (producer, buckets) in self.producers.items():
+            for bucket in buckets:
+                try: await self._fill(kind, bucket, producer)
+                except Exception as e: print(f"Błąd uzupełniania puli {kind}/{bucket}: {e}")
+
+    async def _run(self):
+        while True:
+            self._wake.clear(); await self.refill()
+            try: await asyncio.wait_for(self._wake.wait(), self.refill_interval)
+            except asyncio.TimeoutError: pass
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
+        if self._pending: await asyncio.gather(*self._pending, return_exceptions=True)
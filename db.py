@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+# Zapytanie przygotowywane po stronie serwera (PREPARE) przy pierwszym użyciu na danym połączeniu.
+# SQL używa natywnych placeholderów PostgreSQL: $1, $2, ...
+Statement = namedtuple('Statement', 'name sql')
+
+
+def listen(dsn, channel, on_payload):
+    """LISTEN na osobnym połączeniu (autocommit), obsługiwany w pętli zdarzeń przez add_reader.
+    on_payload(payload) dostaje każde powiadomienie z paczki raz; zwraca połączenie dla unlisten()."""
+    loop = asyncio.get_running_loop()
+    conn = psycopg2.connect(dsn); conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cur: cur.execute(f"LISTEN {channel}")
+    def on_readable():
+        try: conn.poll()
+        except psycopg2.Error as e: print(f"Błąd nasłuchu {channel}: {e}"); unlisten(conn); return
+        payloads = list(dict.fromkeys(n.payload for n in conn.notifies)); conn.notifies.clear()
+        for payload in payloads: on_payload(payload)
+    loop.add_reader(conn.fileno(), on_readable); return conn
+
+
+def unlisten(conn):
+    if conn is None or conn.closed: return
+    try: asyncio.get_running_loop().remove_reader(conn.fileno())
+    except (RuntimeError, ValueError): pass
+    conn.close()
+
+
+class _Connection(psycopg2.extensions.connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs); self.prepared = set()
+
+
+class Database:
+    """Pula połączeń psycopg2 obsługiwana z wątków, żeby zapytania nie blokowały pętli zdarzeń."""
+
+    def __init__(self, dsn, min_size=1, max_size=10, acquire_timeout=10.0, statement_timeout_ms=5000, connect_timeout=5, observer=None):
+        self.dsn, self.min_size, self.max_size = dsn, min_size, max_size
+        self.acquire_timeout, self.statement_timeout_ms, self.connect_timeout = acquire_timeout, statement_timeout_ms, connect_timeout
+        self.statements = {}
+        self._pool, self._pool_lock = None, threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix='db')
+        self._slots, self.in_use, self.observer = None, 0, observer  # observer(czekanie_s, zapytanie_s, ok) po każdym run()
+        self.stats = {'queries': 0, 'errors': 0, 'timeouts': 0, 'discarded': 0}
+
+    def statement(self, name, sql):
+        stmt = Statement(name, sql); self.statements[name] = stmt; return stmt
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self.min_size, self.max_size, self.dsn, connection_factory=_Connection, connect_timeout=self.connect_timeout,
+                    options=f"-c statement_timeout={int(self.statement_timeout_ms)}")
+            return self._pool
+
+    def cursor_execute(self, cur, query, params):
+        if isinstance(query, Statement):
+            if query.name not in cur.connection.prepared:
+                cur.execute(f"PREPARE {query.name} AS {query.sql}"); cur.connection.prepared.add(query.name)
+            placeholders = f" ({', '.join(['%s'] * len(params))})" if params else ""
+            return cur.execute(f"EXECUTE {query.name}{placeholders}", tuple(params))
+        return cur.execute(query, params)
+
+    def _run_sync(self, fn, *args):
+        pool = self._get_pool(); conn = pool.getconn(); broken = False
+        try:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
+                result = fn(cur, *args)
+            conn.commit(); return result
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True; raise
+        except Exception:
+            if not conn.closed:
+                # PREPARE nie podlega wycofaniu transakcji - po błędzie zaczynamy z czystym stanem
+                conn.rollback()
+                with conn.cursor() as cur: cur.execute("DEALLOCATE ALL")
+                conn.commit(); conn.prepared.clear()
+            raise
+        finally:
+            if broken or conn.closed: self.stats['discarded'] += 1
+            pool.putconn(conn, close=broken or bool(conn.closed))
+
+    async def run(self, fn, *args):
+        """Wykonuje fn(cursor, *args) w jednej transakcji na połączeniu z puli."""
+        if self._slots is None: self._slots = asyncio.Semaphore(self.max_size)
+        start = time.perf_counter()
+        try: await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError: self.stats['timeouts'] += 1; raise
+        acquired, ok = time.perf_counter(), False; self.in_use += 1
+        try:
+            self.stats['queries'] += 1
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, self._run_sync, fn, *args); ok = True; return result
+        except Exception: self.stats['errors'] += 1; raise
+        finally:
+            self.in_use -= 1; self._slots.release()
+            if self.observer: self.observer(acquired - start, time.perf_counter() - acquired, ok)
+
+    async def execute(self, query, params=()):
+        def op(cur): self.cursor_execute(cur, query, params); return cur.rowcount
+        return await self.run(op)
+
+    async def fetchone(self, query, params=()):
+        def op(cur): self.cursor_execute(cur, query, params); return cur.fetchone()
+        return await self.run(op)
+
+    async def fetchall(self, query, params=()):
+        def op(cur): self.cursor_execute(cur, query, params); return cur.fetchall()
+        return await self.run(op)
+
+    async def fetchval(self, query, params=(), default=None):
+        row = await self.fetchone(query, params); return row[0] if row else default
+
+    async def close(self):
+        self._executor.shutdown(wait=True)
+        with self._pool_lock:
+            if self._pool is not None: self._pool.closeall(); self._pool = None
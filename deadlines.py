@@ -0,0 +1,60 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class DeadlineScheduler:
+    """Kopiec terminów (klucz -> czas); budzi się dokładnie przy najbliższym terminie i obsługuje wygasłe klucze równolegle.
+
+    handler(key) może zwrócić nowy termin (np. ponowienie), jeśli w międzyczasie nikt nie ustawił innego.
+    """
+
+    def __init__(self, handler, max_concurrency=8):
+        self.handler, self.semaphore = handler, asyncio.Semaphore(max_concurrency)
+        self.heap, self.deadlines, self.seq = [], {}, itertools.count()  # deadlines: key -> (czas, seq); wpisy w kopcu bez pary w deadlines są nieaktualne
+        self._timer, self._armed_at, self._running, self._tasks = None, None, False, set()
+        self.stats = {'scheduled': 0, 'expired': 0, 'rescheduled': 0, 'errors': 0}
+
+    def __len__(self): return len(self.deadlines)
+
+    def schedule(self, key, when):
+        entry = (when, next(self.seq)); self.deadlines[key] = entry; heapq.heappush(self.heap, (*entry, key)); self.stats['scheduled'] += 1
+        if len(self.heap) > 2 * len(self.deadlines) + 64: self._compact()
+        if self._running and (self._armed_at is None or when < self._armed_at): self._arm()
+
+    def cancel(self, key): self.deadlines.pop(key, None)
+
+    def next_deadline(self):
+        while self.heap and self.deadlines.get(self.heap[0][2]) != self.heap[0][:2]: heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def _compact(self):
+        self.heap = [(when, seq, key) for key, (when, seq) in self.deadlines.items()]; heapq.heapify(self.heap)
+
+    def _arm(self):
+        if self._timer is not None: self._timer.cancel(); self._timer = None
+        when = self.next_deadline(); self._armed_at = when
+        if when is not None: self._timer = asyncio.get_running_loop().call_later(max(0.0, when - time.time()), self._fire)
+
+    def _fire(self):
+        self._timer, now = None, time.time()
+        while (when := self.next_deadline()) is not None and when <= now:
+            _, _, key = heapq.heappop(self.heap); del self.deadlines[key]
+            task = asyncio.get_running_loop().create_task(self._expire(key)); self._tasks.add(task); task.add_done_callback(self._tasks.discard)
+        self._arm()
+
+    async def _expire(self, key):
+        async with self.semaphore:
+            self.stats['expired'] += 1
+            try: retry_at = await self.handler(key)
+            except Exception as e: self.stats['errors'] += 1; print(f"Błąd obsługi terminu {key}: {e}"); return
+            if retry_at is not None and key not in self.deadlines: self.stats['rescheduled'] += 1; self.schedule(key, retry_at)
+
+    def start(self):
+        if not self._running: self._running = True; self._arm()
+
+    def stop(self):
+        self._running = False
+        if self._timer is not None: self._timer.cancel(); self._timer, self._armed_at = None, None
+        for task in list(self._tasks): task.cancel()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+import zlib
+
+import psycopg2.extras
+
+from db import listen, unlisten
+
+SCOPE_PLAYER, SCOPE_CHANNEL = 'p', 'c'
+COMPRESS_ABOVE = 512  # bajtów JSON-a; mniejsze stany zapisujemy bez kompresji
+NOTIFY_CHANNEL, NOTIFY_KEYS = 'zabawy_games', 100  # kluczy w jednym NOTIFY: ~47 B każdy, limit treści to 8000 bajtów
+
+
+def encode_state(game):
+    if hasattr(game, 'to_state'): game = game.to_state()
+    data = json.dumps(game, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return b'z' + zlib.compress(data, 1) if len(data) > COMPRESS_ABOVE else b'j' + data
+
+
+def decode_state(blob):
+    blob = bytes(blob)
+    return json.loads(zlib.decompress(blob[1:]) if blob[:1] == b'z' else blob[1:])
+
+
+def row_key(scope, key): return (scope, key[0], key[1]) if scope == SCOPE_PLAYER else (scope, key, 0)
+
+
+def table_key(scope, channel_id, user_id): return (channel_id, user_id) if scope == SCOPE_PLAYER else channel_id
+
+
+def notify_payloads(origin, keys):
+    """Klucze wierszy w paczkach mieszczących się w jednym NOTIFY: {"o": nadawca, "k": [[scope, kanał, gracz], ...]}."""
+    keys = [list(rk) for rk in keys]
+    return [json.dumps({'o': origin, 'k': keys[n:n + NOTIFY_KEYS]}, separators=(',', ':')) for n in range(0, len(keys), NOTIFY_KEYS)]
+
+
+class MemoryBackend:
+    """Gry tylko w pamięci procesu: nic nie zapisuje i nic nie odtwarza po restarcie."""
+
+    async def save(self, rows, deleted): pass
+    async def load(self, keys=None): return []
+    def listen(self, on_keys): pass
+    def close(self): pass
+
+
+class PostgresBackend:
+    """Tabela game_state wspólna dla workerów. Po każdym zapisie wysyła NOTIFY z kluczami zmienionych wierszy,
+    więc pozostałe workery (np. dwa właściciele shardu w trakcie wdrożenia) podmieniają u siebie nieaktualne gry."""
+
+    def __init__(self, db, dsn=None, origin=''):
+        self.db, self.dsn, self.origin, self._conn = db, dsn, origin, None  # dsn=None: bez powiadomień (jeden proces)
+
+    async def save(self, rows, deleted):
+        payloads = notify_payloads(self.origin, [r[:3] for r in rows] + list(deleted)) if self.dsn else []
+        def op(cur):
+            if rows: psycopg2.extras.execute_values(cur, "INSERT INTO game_state (scope, channel_id, user_id, guild_id, state) VALUES %s ON CONFLICT (scope, channel_id, user_id) DO UPDATE SET guild_id = EXCLUDED.guild_id, state = EXCLUDED.state, updated_at = now()", rows)
+            if deleted: psycopg2.extras.execute_values(cur, "DELETE FROM game_state g USING (VALUES %s) AS d(scope, channel_id, user_id) WHERE g.scope = d.scope AND g.channel_id = d.channel_id AND g.user_id = d.user_id", list(deleted))
+            for payload in payloads: cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+        await self.db.run(op)
+
+    async def load(self, keys=None):
+        """Wiersze (scope, channel_id, user_id, guild_id, state): wszystkie albo tylko podane klucze."""
+        if keys is None: return await self.db.fetchall("SELECT scope, channel_id, user_id, guild_id, state FROM game_state")
+        def op(cur):
+            psycopg2.extras.execute_values(cur, "SELECT g.scope, g.channel_id, g.user_id, g.guild_id, g.state FROM game_state g JOIN (VALUES %s) AS k(scope, channel_id, user_id) ON g.scope = k.scope AND g.channel_id = k.channel_id AND g.user_id = k.user_id", list(keys))
+            return cur.fetchall()
+        return await self.db.run(op)
+
+    def listen(self, on_keys):
+        """on_keys(klucze wierszy) dla zmian zapisanych przez inne workery."""
+        if not self.dsn or (self._conn is not None and not self._conn.closed): return  # po zerwaniu połączenia start() nasłuchuje od nowa
+        def on_payload(payload):
+            message = json.loads(payload)
+            if message['o'] != self.origin: on_keys([tuple(k) for k in message['k']])
+        self._conn = listen(self.dsn, NOTIFY_CHANNEL, on_payload)
+
+    def close(self): unlisten(self._conn); self._conn = None
+
+
+class GameTable(dict):
+    """Słownik gier, który zgłasza zmiany do GameStore (dodanie/usunięcie automatycznie, zmiany w miejscu przez touch)."""
+
+    def __init__(self, store, scope):
+        super().__init__(); self.store, self.scope = store, scope
+
+    def __setitem__(self, key, game): super().__setitem__(key, game); self.store.mark(self, key)
+    def __delitem__(self, key): super().__delitem__(key); self.store.forget(self.scope, key)
+
+    def pop(self, key, *default):
+        had = key in self; value = super().pop(key, *default)
+        if had: self.store.forget(self.scope, key)
+        return value
+
+    def touch(self, key):
+        if key in self: self.store.mark(self, key)
+
+    def load(self, key, game): super().__setitem__(key, game)
+
+    def unload(self, key): return super().pop(key, None)
+
+
+class GameStore:
+    """Tabele gier procesu z zapisem przez backend: przyrostowo (zbiorczo co flush_interval) i odtworzenie przy starcie.
+    locate(scope, klucz) podaje serwer gry, owns(guild_id) - czy gry serwera obsługuje ten proces (shardy)."""
+
+    def __init__(self, backend=None, flush_interval=0.5, factory=None, locate=None, owns=None):
+        self.backend, self.flush_interval, self.factory = backend or MemoryBackend(), flush_interval, factory
+        self.locate, self.owns = locate or (lambda scope, key: 0), owns or (lambda guild_id: True)
+        self.tables, self.watchers, self.guilds = {}, [], {}  # watcher(scope, klucz, gra albo None po usunięciu); guilds: klucz wiersza -> guild_id
+        self._dirty, self._deleted, self._task, self._lock = {}, set(), None, asyncio.Lock()
+        self.stats = {'rows_written': 0, 'rows_deleted': 0, 'flushes': 0, 'restored': 0, 'restore_seconds': 0.0, 'remote_updates': 0}
+
+    def table(self, scope):
+        self.tables[scope] = GameTable(self, scope); return self.tables[scope]
+
+    def watch(self, watcher): self.watchers.append(watcher)
+
+    def mark(self, table, key):
+        rk = row_key(table.scope, key); self._deleted.discard(rk); self._dirty[rk] = (table, key)
+        for watcher in self.watchers: watcher(table.scope, key, table[key])
+
+    def forget(self, scope, key):
+        rk = row_key(scope, key); self._dirty.pop(rk, None); self._deleted.add(rk); self.guilds.pop(rk, None)
+        for watcher in self.watchers: watcher(scope, key, None)
+
+    def guild_of(self, rk, table, key):
+        if (guild_id := self.guilds.get(rk)) is None: guild_id = self.guilds[rk] = self.locate(table.scope, key)
+        return guild_id
+
+    async def flush(self):
+        async with self._lock:
+            if not self._dirty and not self._deleted: return
+            dirty, deleted, self._dirty, self._deleted = self._dirty, self._deleted, {}, set()
+            rows = [(*rk, self.guild_of(rk, table, key), psycopg2.Binary(encode_state(table[key]))) for rk, (table, key) in dirty.items() if key in table]
+            try: await self.backend.save(rows, deleted)
+            except Exception as e:
+                for rk, entry in dirty.items(): self._dirty.setdefault(rk, entry)
+                self._deleted |= {rk for rk in deleted if rk not in self._dirty}
+                print(f"Błąd zapisu stanu gier: {e}"); return
+            self.stats['flushes'] += 1; self.stats['rows_written'] += len(rows); self.stats['rows_deleted'] += len(deleted)
+
+    def load_rows(self, rows):
+        """Wypełnia tabele gier wierszami (scope, channel_id, user_id, guild_id, state) serwerów tego procesu; zwraca listę (scope, klucz, gra).
+        Wiersze sprzed zapisywania guild_id (NULL) trafiają do właściciela shardu 0."""
+        restored = []
+        for scope, channel_id, user_id, guild_id, blob in rows:
+            table = self.tables.get(scope)
+            if table is None or not self.owns(guild_id or 0): continue
+            key = table_key(scope, channel_id, user_id)
+            try: game = decode_state(blob); game = self.factory(game) if self.factory else game
+            except (ValueError, KeyError, TypeError, zlib.error) as e: print(f"Pominięto uszkodzony stan gry {scope}:{key}: {e}"); continue
+            table.load(key, game); restored.append((scope, key, game))
+            if guild_id is not None: self.guilds[(scope, channel_id, user_id)] = guild_id
+        return restored
+
+    async def restore(self):
+        start = time.perf_counter()
+        restored = self.load_rows(await self.backend.load())
+        self.stats['restored'], self.stats['restore_seconds'] = len(restored), time.perf_counter() - start
+        return restored
+
+    async def refresh(self, keys):
+        """Zmiany zapisane przez inny worker: wczytuje aktualne wiersze, usuwa gry, których wierszy już nie ma.
+        Klucze ze zmianami czekającymi tutaj na zapis pomijamy - wygrywa stan lokalny."""
+        keys = [rk for rk in keys if rk not in self._dirty and rk not in self._deleted and rk[0] in self.tables]
+        if not keys: return
+        rows = await self.backend.load(keys); found = {tuple(r[:3]) for r in rows}
+        for scope, key, game in self.load_rows(rows):
+            for watcher in self.watchers: watcher(scope, key, game)
+        for scope, channel_id, user_id in set(keys) - found:
+            key = table_key(scope, channel_id, user_id)
+            if self.tables[scope].unload(key) is not None:
+                self.guilds.pop((scope, channel_id, user_id), None)
+                for watcher in self.watchers: watcher(scope, key, None)
+        self.stats['remote_updates'] += len(keys)
+
+    def _on_remote(self, keys): asyncio.get_running_loop().create_task(self.refresh(keys))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+        self.backend.listen(self._on_remote)
+
+    async def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
+        self.backend.close(); await self.flush()
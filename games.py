@@ -0,0 +1,180 @@
+# Typowane obiekty gier (z __slots__) wraz z logiką ruchów niezależną od Discorda.
+import random
+import time
+
+from taboo_matcher import compile_card
+
+HANGMAN_ART = ["  +---+\n  |   |\n      |\n      |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n      |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n  |   |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|   |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|\\  |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|\\  |\n /    |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|\\  |\n / \\  |\n      |\n==="]
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZĄĆĘŁŃÓŚŹŻ"
+LETTER_BITS = {c: 1 << n for n, c in enumerate(ALPHABET)}
+
+
+def letters_mask(text): return sum(LETTER_BITS[c] for c in set(text) if c in LETTER_BITS)
+def mask_letters(mask): return [c for c in ALPHABET if mask & LETTER_BITS[c]]
+
+
+def check_wordle_guess(guess, secret):
+    fb, s_letters, g_letters = ['⬛']*len(secret), list(secret), list(guess)
+    for i in range(len(secret)):
+        if g_letters[i] == s_letters[i]: fb[i], s_letters[i], g_letters[i] = '🟩', None, None
+    for i in range(len(secret)):
+        if g_letters[i] and g_letters[i] in s_letters: fb[i] = '🟨'; s_letters[s_letters.index(g_letters[i])] = None
+    return "".join(fb)
+
+
+class Game:
+    __slots__ = ()
+    game_type = None
+    DEFAULTS = {}  # wartości pól dodanych później, gdy brakuje ich w zapisanym stanie
+
+    def __init_subclass__(cls, **kwargs):
+        # __slots__ podklasy zawiera tylko jej własne pola; FIELDS to pełna lista razem z klasami bazowymi
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(f for klass in reversed(cls.__mro__) for f in klass.__dict__.get('__slots__', ()))
+
+    def to_state(self): return {'game_type': self.game_type, **{f: getattr(self, f) for f in self.FIELDS}}
+
+    @classmethod
+    def from_state(cls, state):
+        game = cls.__new__(cls)
+        for f in cls.FIELDS: setattr(game, f, state[f] if f in state else cls.DEFAULTS[f])
+        return game
+
+
+class Wordle(Game):
+    __slots__ = ('word', 'attempts', 'max_attempts', 'difficulty', 'hints_used', 'history')
+    game_type = 'wordle'
+
+    def __init__(self, word, difficulty, max_attempts=6):
+        self.word, self.attempts, self.max_attempts, self.difficulty, self.hints_used, self.history = word, 0, max_attempts, difficulty, 0, []
+
+    def guess(self, guess):
+        self.attempts += 1; self.history.append(guess); return check_wordle_guess(guess, self.word)
+
+    @property
+    def lost(self): return self.attempts >= self.max_attempts
+
+    def hint_letters(self):
+        green = {g[idx] for g in self.history for idx in range(len(self.word)) if g[idx] == self.word[idx]}
+        return sorted(set(self.word) - green)
+
+
+class Hangman(Game):
+    __slots__ = ('word', 'guessed', 'wrong_guesses', 'max_wrong_guesses', 'difficulty', 'hints_used', 'word_mask')
+    game_type = 'hangman'
+
+    def __init__(self, word, difficulty, max_wrong_guesses=6):
+        self.word, self.guessed, self.wrong_guesses, self.max_wrong_guesses = word, 0, 0, max_wrong_guesses
+        self.difficulty, self.hints_used, self.word_mask = difficulty, 0, letters_mask(word)
+
+    def guess(self, letter):
+        """Zwraca None dla powtórzonej/nieobsługiwanej litery, inaczej True/False (trafienie)."""
+        bit = LETTER_BITS.get(letter)
+        if bit is None or self.guessed & bit: return None
+        self.guessed |= bit
+        if self.word_mask & bit: return True
+        self.wrong_guesses += 1; return False
+
+    @property
+    def solved(self): return not self.word_mask & ~self.guessed
+    @property
+    def lost(self): return self.wrong_guesses >= self.max_wrong_guesses
+    @property
+    def guessed_letters(self): return mask_letters(self.guessed)
+
+    def reveal_hint(self):
+        unrevealed = [c for c in set(self.word) if not self.guessed & LETTER_BITS[c]]
+        if not unrevealed: return None
+        letter = random.choice(unrevealed); self.guessed |= LETTER_BITS[letter]; self.wrong_guesses += 1; self.hints_used = 1
+        return letter
+
+    def render(self):
+        word = " ".join([l if self.guessed & LETTER_BITS.get(l, 0) else "_" for l in self.word])
+        msg = f"```\n{HANGMAN_ART[min(self.wrong_guesses, 6)]}\n```\n**Słowo:** `{word}`\n"
+        if self.guessed: msg += f"**Użyte:** {', '.join(self.guessed_letters)}\n"
+        return msg + f"**Błędy:** {self.wrong_guesses}/{self.max_wrong_guesses}"
+
+
+class Quiz(Game):
+    __slots__ = ('question_data', 'answered', 'difficulty', 'category')
+    game_type = 'quiz'
+
+    def __init__(self, question_data, difficulty, category):
+        self.question_data, self.answered, self.difficulty, self.category = question_data, False, difficulty, category
+
+    @property
+    def correct_key(self): return self.question_data['correct_answer']
+
+    def answer(self, key): self.answered = True; return key == self.correct_key
+
+
+class TwentyQuestions(Game):
+    __slots__ = ('secret_object', 'questions_asked', 'history', 'hints_used')
+    game_type = '20_questions'
+    MAX_QUESTIONS = 20
+
+    def __init__(self, secret_object):
+        self.secret_object, self.questions_asked, self.history, self.hints_used = secret_object, 0, [], 0
+
+    @property
+    def out_of_questions(self): return self.questions_asked >= self.MAX_QUESTIONS
+
+    def record(self, question, answer): self.history.append({'q': question, 'a': answer})
+    def is_correct(self, attempt): return attempt.upper() == self.secret_object
+
+
+class TwoTruths(Game):
+    __slots__ = ('lie_index', 'started', 'message_id')
+    game_type = 'two_truths'
+
+    def __init__(self, lie_index): self.lie_index, self.started, self.message_id = lie_index, time.time(), None
+
+
+class ChannelGame(Game):
+    __slots__ = ('last_player_id', 'last_activity')
+
+    def touch_activity(self, player_id): self.last_player_id, self.last_activity = player_id, time.time()
+
+
+class Associations(ChannelGame):
+    __slots__ = ('last_word', 'word_history')
+    game_type = 'associations'
+
+    def __init__(self, word, bot_id):
+        self.last_word, self.word_history = word, {word}; self.touch_activity(bot_id)
+
+    def accept(self, word, player_id): self.last_word = word; self.word_history.add(word); self.touch_activity(player_id)
+
+    def to_state(self): state = super().to_state(); state['word_history'] = sorted(self.word_history); return state
+
+    @classmethod
+    def from_state(cls, state): game = super().from_state(state); game.word_history = set(game.word_history); return game
+
+
+class Story(ChannelGame):
+    __slots__ = ('full_story', 'summary', 'summarized')  # summary streszcza pierwsze `summarized` zdań (kontekst dla AI)
+    game_type = 'story'
+    DEFAULTS = {'summary': '', 'summarized': 0}
+
+    def __init__(self, sentence, bot_id): self.full_story, self.summary, self.summarized = [sentence], '', 0; self.touch_activity(bot_id)
+    def add(self, sentence, player_id): self.full_story.append(sentence); self.touch_activity(player_id)
+    @property
+    def text(self): return " ".join(self.full_story)
+
+
+class Taboo(ChannelGame):
+    __slots__ = ('keyword', 'taboo_words', 'describing_player_id')
+    game_type = 'taboo'
+
+    def __init__(self, keyword, taboo_words, describing_player_id):
+        self.keyword, self.taboo_words, self.describing_player_id = keyword.upper(), [w.upper() for w in taboo_words], describing_player_id
+        self.touch_activity(describing_player_id)
+
+    @property
+    def card(self): return compile_card(self.keyword, tuple(self.taboo_words))
+
+
+GAME_TYPES = {cls.game_type: cls for cls in (Wordle, Hangman, Quiz, TwentyQuestions, TwoTruths, Associations, Story, Taboo)}
+
+
+def game_from_state(state): return GAME_TYPES[state['game_type']].from_state(state)
@@ -0,0 +1,31 @@
+import asyncio
+
+
+class GuildCache:
+    """Stan per serwer ładowany leniwie przy pierwszym zdarzeniu z danego serwera.
+    Równoległe pierwsze zdarzenia z jednego serwera czekają na to samo ładowanie."""
+
+    def __init__(self, loader):
+        self.loader, self.guilds, self._loading = loader, {}, {}  # loader(guild_id) -> stan serwera
+        self.stats = {'loads': 0, 'coalesced': 0, 'failures': 0}
+
+    def __len__(self): return len(self.guilds)
+
+    def get(self, guild_id):
+        """Stan już wczytanego serwera albo None (bez I/O)."""
+        return self.guilds.get(guild_id)
+
+    async def ensure(self, guild_id):
+        if (state := self.guilds.get(guild_id)) is not None: return state
+        task = self._loading.get(guild_id)
+        if task is None: task = self._loading[guild_id] = asyncio.get_running_loop().create_task(self._load(guild_id))
+        else: self.stats['coalesced'] += 1
+        return await asyncio.shield(task)  # anulowanie jednego czekającego nie przerywa ładowania pozostałym
+
+    async def _load(self, guild_id):
+        try: state = await self.loader(guild_id)
+        except Exception: self.stats['failures'] += 1; raise
+        finally: self._loading.pop(guild_id, None)
+        self.guilds[guild_id] = state; self.stats['loads'] += 1; return state
+
+    def drop(self, guild_id): self.guilds.pop(guild_id, None)
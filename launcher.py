@@ -0,0 +1,98 @@
+# Uruchamia bota w kilku procesach: każdy worker to zwykły main.py z własnym zakresem shardów (AutoShardedBot).
+# Stan wspólny idzie przez Postgresa: game_state z powiadomieniami o zmianach, ustawienia przez LISTEN/NOTIFY.
+#   python launcher.py --workers 4                 # liczba shardów wg zalecenia Discorda
+#   python launcher.py --workers 2 --shards 4      # lokalny test: 2 procesy po 2 shardy
+# Procfile może wskazywać "worker: python launcher.py --workers 2" zamiast pojedynczego main.py.
+import argparse
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from sharding import worker_shards
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+IDENTIFY_INTERVAL = 5.0  # Discord: jedno IDENTIFY na kubełek max_concurrency co 5 s
+STOP_TIMEOUT = 30.0  # tyle czekamy na zapisanie stanu przez workery przy zamykaniu
+
+
+def gateway_info(token):
+    """(zalecana liczba shardów, max_concurrency) z GET /gateway/bot."""
+    request = urllib.request.Request("https://discord.com/api/v10/gateway/bot", headers={'Authorization': f"Bot {token}", 'User-Agent': 'zabawy-launcher'})
+    with urllib.request.urlopen(request, timeout=10) as response: info = json.load(response)
+    return info['shards'], info['session_start_limit']['max_concurrency']
+
+
+def worker_env(worker, workers, shard_ids, shard_count, metrics_port):
+    env = dict(os.environ, SHARD_COUNT=str(shard_count), SHARD_IDS=','.join(map(str, shard_ids)), WORKER_ID=str(worker), SETTINGS_LISTEN='true')
+    env['METRICS_PORT'] = str(metrics_port + worker if metrics_port else 0)
+    env['AI_RATE_PER_MINUTE'] = str(float(os.getenv('AI_RATE_PER_MINUTE', 60)) / workers)  # limit Gemini jest wspólny dla całego klucza API
+    if path := os.getenv('LOG_JSONL_PATH', os.path.join(os.path.dirname(MAIN), 'data', 'logs.jsonl')):
+        root, ext = os.path.splitext(path); env['LOG_JSONL_PATH'] = f"{root}.worker{worker}{ext}"  # osobny plik, żeby dopisywane wiersze się nie przeplatały
+    return env
+
+
+class Worker:
+    """Proces main.py z przypisanymi shardami; po awarii uruchamiany ponownie z rosnącym odstępem."""
+
+    def __init__(self, index, shard_ids, env):
+        self.index, self.shard_ids, self.env, self.process, self.restarts, self.restart_at = index, shard_ids, env, None, 0, None
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, MAIN], env=self.env, start_new_session=True); self.restart_at = None  # Ctrl+C trafia tylko do launchera, który przekazuje go dalej raz
+        print(f"[launcher] worker {self.index} (pid {self.process.pid}): shardy {self.shard_ids[0]}-{self.shard_ids[-1]}")
+
+    def poll(self, restart):
+        if self.process is None: return False
+        if (code := self.process.poll()) is None: return True
+        if self.restart_at is None:
+            if code == 0 or not restart: print(f"[launcher] worker {self.index} zakończył pracę (kod {code})"); self.process = None; return False
+            delay = min(60, 2 ** self.restarts); self.restarts += 1; self.restart_at = time.monotonic() + delay
+            print(f"[launcher] worker {self.index} padł (kod {code}), ponowne uruchomienie za {delay} s")
+        elif time.monotonic() >= self.restart_at: self.start()
+        return True
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None: self.process.send_signal(signal.SIGINT)  # bot zamyka się jak po Ctrl+C i zapisuje bufory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WORKERS', 2)))
+    parser.add_argument('--shards', type=int, default=int(os.getenv('SHARD_COUNT', 0)), help="liczba shardów; 0 = zalecana przez Discorda")
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('METRICS_PORT', 9108)), help="port /metrics workera 0; kolejne workery +1; 0 wyłącza")
+    parser.add_argument('--no-restart', action='store_true', help="nie wznawiaj workerów po awarii")
+    args = parser.parse_args()
+
+    shard_count, concurrency = args.shards, 1
+    if not shard_count or os.getenv('DISCORD_TOKEN'):
+        try: recommended, concurrency = gateway_info(os.environ['DISCORD_TOKEN']); shard_count = shard_count or recommended
+        except (KeyError, OSError, ValueError) as e:
+            if not shard_count: sys.exit(f"Nie można pobrać zalecanej liczby shardów ({e}); podaj --shards.")
+    workers = min(args.workers, shard_count)
+    pool = [Worker(n, ids, worker_env(n, workers, ids, shard_count, args.metrics_port)) for n in range(workers) if (ids := worker_shards(n, workers, shard_count))]
+    print(f"[launcher] {shard_count} shardów w {len(pool)} workerach (max_concurrency {concurrency})")
+
+    stopping = []
+    def on_signal(signum, frame): stopping.append(signum)
+    signal.signal(signal.SIGINT, on_signal); signal.signal(signal.SIGTERM, on_signal)
+    for worker in pool:
+        if stopping: break
+        worker.start()
+        time.sleep(math.ceil(len(worker.shard_ids) / concurrency) * IDENTIFY_INTERVAL if worker is not pool[-1] else 0)  # kolejny worker łączy się po IDENTIFY poprzedniego
+    while not stopping and any([w.poll(not args.no_restart) for w in pool]): time.sleep(1)
+
+    for worker in pool: worker.stop()
+    deadline = time.monotonic() + STOP_TIMEOUT
+    for worker in pool:
+        if worker.process is None: continue
+        try: worker.process.wait(max(0.1, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired: print(f"[launcher] worker {worker.index} nie zamknął się w {STOP_TIMEOUT:.0f} s, zabijam"); worker.process.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+from bisect import bisect_left, insort
+
+
+class RankIndex:
+    """Posortowana lista kluczy podzielona na kubełki (~load elementów) z drzewem Fenwicka na ich długościach.
+
+    Wstawienie/usunięcie, pozycja klucza i element o danej pozycji kosztują O(log n) (plus przesunięcie w kubełku o stałym rozmiarze).
+    """
+
+    def __init__(self, load=512):
+        self.load, self.buckets, self.maxes, self.tree, self.size = load, [], [], [0], 0
+
+    def __len__(self): return self.size
+
+    def _build(self):
+        n = len(self.buckets); tree = [0] + [len(b) for b in self.buckets]
+        for i in range(1, n + 1):
+            if (j := i + (i & -i)) <= n: tree[j] += tree[i]
+        self.tree = tree
+
+    def _fen_add(self, b, delta):
+        b += 1
+        while b < len(self.tree): self.tree[b] += delta; b += b & -b
+
+    def _prefix(self, b):
+        total = 0
+        while b: total += self.tree[b]; b -= b & -b
+        return total
+
+    def _locate(self, idx):
+        """(kubełek, pozycja w kubełku) dla idx-tego klucza."""
+        pos, step = 0, 1 << (len(self.buckets).bit_length() - 1) if self.buckets else 0
+        while step:
+            if pos + step < len(self.tree) and self.tree[pos + step] <= idx: pos += step; idx -= self.tree[pos]
+            step >>= 1
+        return pos, idx
+
+    def bulk_load(self, sorted_keys):
+        self.buckets = [list(sorted_keys[i:i + self.load]) for i in range(0, len(sorted_keys), self.load)]
+        self.maxes, self.size = [b[-1] for b in self.buckets], len(sorted_keys); self._build()
+
+    def insert(self, key):
+        if not self.buckets: self.buckets, self.maxes, self.size = [[key]], [key], 1; self._build(); return
+        b = min(bisect_left(self.maxes, key), len(self.buckets) - 1)
+        bucket = self.buckets[b]; insort(bucket, key); self.maxes[b] = bucket[-1]; self.size += 1
+        if len(bucket) > 2 * self.load:
+            self.buckets[b:b + 1] = [bucket[:self.load], bucket[self.load:]]; self.maxes[b:b + 1] = [bucket[self.load - 1], bucket[-1]]; self._build()
+        else: self._fen_add(b, 1)
+
+    def remove(self, key):
+        b = bisect_left(self.maxes, key)
+        if b == len(self.buckets): raise KeyError(key)
+        bucket = self.buckets[b]; i = bisect_left(bucket, key)
+        if i == len(bucket) or bucket[i] != key: raise KeyError(key)
+        del bucket[i]; self.size -= 1
+        if not bucket: del self.buckets[b]; del self.maxes[b]; self._build()
+        else: self.maxes[b] = bucket[-1]; self._fen_add(b, -1)
+
+    def index(self, key):
+        b = bisect_left(self.maxes, key)
+        return self.size if b == len(self.buckets) else self._prefix(b) + bisect_left(self.buckets[b], key)
+
+    def slice(self, start, count):
+        if start >= self.size or count <= 0: return []
+        b, i = self._locate(start); out = []
+        while b < len(self.buckets) and len(out) < count:
+            out.extend(self.buckets[b][i:i + count - len(out)]); b, i = b + 1, 0
+        return out
+
+
+class Leaderboard:
+    """Ranking w pamięci: klucz (-punkty, user_id), więc remisy rozstrzyga niższe id; aktualizowany przy każdej zmianie punktów."""
+
+    def __init__(self, load=512):
+        self.index, self.users = RankIndex(load), {}  # user_id -> (nazwa, punkty)
+
+    def __len__(self): return len(self.users)
+
+    def load(self, rows):
+        """rows: (user_id, user_name, score) posortowane malejąco po punktach, rosnąco po id (jak z indeksu users_score)."""
+        self.users = {uid: (name, score) for uid, name, score in rows}
+        keys = [(-score, uid) for uid, (_, score) in self.users.items()]
+        if any(keys[n] > keys[n + 1] for n in range(len(keys) - 1)): keys.sort()
+        self.index.bulk_load(keys)
+
+    def set(self, user_id, user_name, score):
+        old = self.users.get(user_id)
+        if old is not None and old[1] != score: self.index.remove((-old[1], user_id))
+        if old is None or old[1] != score: self.index.insert((-score, user_id))
+        self.users[user_id] = (str(user_name), score)
+
+    def add(self, user_id, user_name, delta):
+        old = self.users.get(user_id); self.set(user_id, user_name, (old[1] if old else 0) + delta)
+
+    def rank(self, user_id):
+        """Miejsce (od 1) albo None, jeśli gracza nie ma w rankingu."""
+        entry = self.users.get(user_id)
+        return None if entry is None else self.index.index((-entry[1], user_id)) + 1
+
+    def page(self, offset, limit):
+        """[(miejsce, user_id, nazwa, punkty)] od pozycji offset (od 0)."""
+        return [(offset + n + 1, uid, self.users[uid][0], -neg) for n, (neg, uid) in enumerate(self.index.slice(offset, limit))]
+
+    def clear(self): self.index, self.users = RankIndex(self.index.load), {}
@@ -0,0 +1,113 @@
+# Lokalny słownik do gier słownych.
+# Format pliku (.bin): nagłówek "ZLEX" + wersja (u16) + liczba kubełków (u16), potem katalog kubełków
+# (długość u8, poziom u8, offset u32, liczba u32), a dalej posortowane tablice słów o stałej szerokości (ASCII A-Z).
+# Budowanie: python lexicon.py build data/slowa.txt data/lexicon.bin
+import bisect
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+
+MAGIC, VERSION = b'ZLEX', 1
+HEADER, ENTRY = struct.Struct('<4sHH'), struct.Struct('<BBII')
+TIERS = ('łatwy', 'normalny', 'trudny')
+TIER_SHARES = (0.3, 0.4, 0.3)  # podział słów danej długości wg częstości
+MIN_LEN, MAX_LEN = 4, 8
+MIN_VALIDATION_WORDS = 1000  # od tylu słów danej długości sprawdzamy próby graczy; dołączona data/slowa.txt jest mniejsza, więc jej nie wymusza
+
+
+class _Bucket:
+    __slots__ = ('mm', 'offset', 'count', 'width')
+
+    def __init__(self, mm, offset, count, width): self.mm, self.offset, self.count, self.width = mm, offset, count, width
+    def __len__(self): return self.count
+
+    def __getitem__(self, idx):
+        start = self.offset + idx * self.width; return self.mm[start:start + self.width]
+
+
+def read_word_list(path):
+    """Wiersze 'SŁOWO [liczba_wystąpień]'; słowa z polskimi znakami są pomijane (gry używają A-Z).
+    Wiersz bez liczby dostaje częstość wg pozycji w pliku (wcześniej = częstsze), poniżej każdej jawnej liczby."""
+    freq = {}
+    with open(path, encoding='utf-8') as f:
+        for rank, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith('#'): continue
+            word = parts[0].upper()
+            if MIN_LEN <= len(word) <= MAX_LEN and re.fullmatch(r'[A-Z]+', word):
+                count = int(parts[1]) if len(parts) > 1 else -rank; freq[word] = max(freq.get(word, count), count)
+    return freq
+
+
+def build(freq, out_path):
+    buckets = {}
+    for length in range(MIN_LEN, MAX_LEN + 1):
+        words = sorted((w for w in freq if len(w) == length), key=lambda w: (-freq[w], w))
+        start = 0
+        for tier, share in enumerate(TIER_SHARES):
+            end = len(words) if tier == len(TIERS) - 1 else start + round(len(words) * share)
+            buckets[(length, tier)] = sorted(words[start:end]); start = end
+    data_offset = HEADER.size + ENTRY.size * len(buckets)
+    directory, blobs = [], []
+    for (length, tier), words in sorted(buckets.items()):
+        directory.append(ENTRY.pack(length, tier, data_offset, len(words)))
+        blob = ''.join(words).encode('ascii'); blobs.append(blob); data_offset += len(blob)
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(buckets))); f.writelines(directory); f.writelines(blobs)
+    os.replace(tmp, out_path)
+
+
+class Lexicon:
+    def __init__(self, path):
+        with open(path, 'rb') as f: self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION: raise ValueError(f"Nieobsługiwany plik słownika: {path}")
+        self.buckets = {}
+        for n in range(count):
+            length, tier, offset, size = ENTRY.unpack_from(self.mm, HEADER.size + n * ENTRY.size)
+            self.buckets[(length, TIERS[tier])] = _Bucket(self.mm, offset, size, length)
+
+    @classmethod
+    def open(cls, bin_path, source_path=None):
+        """Wczytuje słownik, budując go najpierw z listy słów, jeśli plik binarny nie istnieje lub jest starszy."""
+        if source_path and os.path.exists(source_path) and (not os.path.exists(bin_path) or os.path.getmtime(bin_path) < os.path.getmtime(source_path)):
+            build(read_word_list(source_path), bin_path)
+        return cls(bin_path) if os.path.exists(bin_path) else None
+
+    def count(self, length, difficulty=None):
+        if difficulty: return len(self.buckets.get((length, difficulty), ()))
+        return sum(len(self.buckets.get((length, t), ())) for t in TIERS)
+
+    def random_word(self, length, difficulty, exclude=None, tries=8):
+        bucket = self.buckets.get((length, difficulty))
+        if not bucket: return None
+        for _ in range(tries):
+            word = bucket[random.randrange(len(bucket))].decode('ascii')
+            if not exclude or word not in exclude: return word
+        return None
+
+    def accepts(self, word, min_words=MIN_VALIDATION_WORDS):
+        """Czy przyjąć próbę gracza: przy liście krótszej niż min_words słów tej długości przepuszczamy każde słowo."""
+        return self.count(len(word)) < min_words or word in self
+
+    def __contains__(self, word):
+        word = word.upper()
+        if not re.fullmatch(r'[A-Z]+', word): return False
+        key = word.encode('ascii')
+        for tier in TIERS:
+            bucket = self.buckets.get((len(word), tier))
+            if bucket:
+                idx = bisect.bisect_left(bucket, key)
+                if idx < len(bucket) and bucket[idx] == key: return True
+        return False
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] != 'build': sys.exit("Użycie: python lexicon.py build <lista_słów.txt> <wyjście.bin>")
+    words = read_word_list(sys.argv[2]); build(words, sys.argv[3])
+    lex = Lexicon(sys.argv[3])
+    print(f"Zbudowano {sys.argv[3]}: {len(words)} słów; " + ", ".join(f"{n} liter: {lex.count(n)}" for n in range(MIN_LEN, MAX_LEN + 1)))
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+
+class EditCoalescer:
+    """Pokazuje narastający tekst przez edycje jednej wiadomości: najwyżej jedna edycja na min_interval
+    (limity edycji Discorda), wersje pośrednie nadpisane przed wysłaniem po prostu przepadają."""
+
+    def __init__(self, edit, min_interval=1.0, max_chars=2000):
+        self.edit, self.min_interval, self.max_chars = edit, min_interval, max_chars
+        self.pending, self.shown, self.last_edit, self.edits, self._task = None, None, 0.0, 0, None
+
+    @property
+    def started(self): return self._task is not None
+
+    def update(self, text):
+        self.pending = text
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        while True:
+            if (wait := self.last_edit + self.min_interval - time.monotonic()) > 0: await asyncio.sleep(wait)
+            text, self.pending = self.pending, None
+            if text is None or text == self.shown: return
+            self.last_edit = time.monotonic()
+            try: await self.edit(text[:self.max_chars]); self.shown = text; self.edits += 1
+            except Exception as e: print(f"Błąd edycji wiadomości: {e}")
+
+    async def finish(self, text):
+        """Ostateczna treść: czeka na trwającą edycję i wysyła text (z zachowaniem odstępu między edycjami)."""
+        self.pending = text
+        if self._task is not None and not self._task.done(): await self._task
+        if self.shown != text: self._task = asyncio.get_running_loop().create_task(self._flush()); await self._task
+
+
+def send_then_edit(send):
+    """Funkcja edit dla EditCoalescer: pierwsza wersja idzie przez send(text), kolejne edytują wysłaną wiadomość."""
+    sent = []
+
+    async def edit(text):
+        if sent: await sent[0].edit(content=text)
+        else: sent.append(await send(text))
+    return edit
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+PRIORITY_LEVELS = frozenset({'ERROR', 'WARNING'})  # tych nie próbkujemy i wyrzucamy je z kolejki na samym końcu
+
+
+def entry_size(entry):
+    return len(entry['title']) + len(entry['description']) + sum(len(k) + len(v) for k, v in entry['fields'].items()) + 32
+
+
+class LogPipeline:
+    """Logi wysyłane w tle: ograniczona kolejka, do batch_size embedów na wiadomość, próbkowanie INFO przy zatorze i kopia w JSONL."""
+
+    def __init__(self, sender, max_queue=500, batch_size=10, flush_interval=2.0, max_chars=5500, sample_rate=0.2, jsonl_path=None):
+        self.sender, self.max_queue, self.batch_size, self.flush_interval = sender, max_queue, batch_size, flush_interval
+        self.max_chars, self.sample_rate, self.jsonl_path = max_chars, sample_rate, jsonl_path  # max_chars: Discord dopuszcza 6000 znaków we wszystkich embedach wiadomości
+        self.queue, self.mirror = deque(), []
+        self._wake, self._lock, self._task = asyncio.Event(), asyncio.Lock(), None
+        self.stats = {'queued': 0, 'sent': 0, 'messages': 0, 'sampled_out': 0, 'dropped': 0, 'failed': 0, 'mirrored': 0}
+
+    def post(self, level, title, description="", fields=None, author=None):
+        """Tylko dodaje wpis do kolejki; nigdy nie czeka na Discorda."""
+        entry = {'ts': time.time(), 'level': level, 'title': title, 'description': description or "", 'fields': {str(k): str(v) for k, v in (fields or {}).items()}, 'author': author}
+        if self.jsonl_path:
+            if len(self.mirror) < self.max_queue * 4: self.mirror.append(entry)
+            else: self.stats['dropped'] += 1
+        if level not in PRIORITY_LEVELS:
+            if level == 'INFO' and len(self.queue) >= self.max_queue // 2 and random.random() >= self.sample_rate: self.stats['sampled_out'] += 1; return
+            if len(self.queue) >= self.max_queue: self.stats['dropped'] += 1; return
+        elif len(self.queue) >= self.max_queue:
+            victim = next((e for e in self.queue if e['level'] not in PRIORITY_LEVELS), None)
+            if victim is not None: self.queue.remove(victim)
+            else: self.queue.popleft()
+            self.stats['dropped'] += 1
+        self.queue.append(entry); self.stats['queued'] += 1
+        if len(self.queue) >= self.batch_size: self._wake.set()
+
+    def _next_batch(self):
+        batch, chars = [], 0
+        while self.queue and len(batch) < self.batch_size and (not batch or chars + entry_size(self.queue[0]) <= self.max_chars):
+            entry = self.queue.popleft(); batch.append(entry); chars += entry_size(entry)
+        return batch
+
+    def _write_mirror(self, entries):
+        with open(self.jsonl_path, 'a', encoding='utf-8') as f: f.writelines(json.dumps(e, ensure_ascii=False) + '\n' for e in entries)
+
+    async def flush(self):
+        async with self._lock:
+            while self.queue:
+                batch = self._next_batch()
+                try: await self.sender(batch)
+                except Exception as e: self.stats['failed'] += len(batch); print(f"Błąd wysyłania logów ({len(batch)} wpisów): {e}"); break
+                self.stats['sent'] += len(batch); self.stats['messages'] += 1
+            if self.mirror:
+                entries, self.mirror = self.mirror, []
+                try: await asyncio.to_thread(self._write_mirror, entries); self.stats['mirrored'] += len(entries)
+                except OSError as e: print(f"Błąd zapisu logów do {self.jsonl_path}: {e}")
+
+    async def _run(self):
+        while True:
+            try: await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError: pass
+            self._wake.clear(); await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
+        await self.flush()
+        print(f"Logi: wysłano {self.stats['sent']} w {self.stats['messages']} wiadomościach, odrzucono {self.stats['dropped']}, pominięto (próbkowanie) {self.stats['sampled_out']}.")
@@ -1,144 +1,224 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import os
+import sys
 import google.generativeai as genai
 import re
 import random
 import json
-import psycopg2
-import psycopg2.extras
 import time
 import asyncio
+import hashlib
 import google.api_core.exceptions
+from datetime import datetime, timezone
 from discord import app_commands, ui
 from typing import Literal
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from db import Database
+from settings_cache import SettingsCache
+from score_buffer import ScoreBuffer
+from content_pool import ContentPool
+from quiz_bank import QuizBank, valid_question
+from lexicon import Lexicon, MIN_VALIDATION_WORDS
+from verdict_cache import VerdictCache
+from achievements import AchievementEngine, ACHIEVEMENTS
+from leaderboard import Leaderboard
+from guild_cache import GuildCache
+from game_store import GameStore, MemoryBackend, PostgresBackend, SCOPE_PLAYER, SCOPE_CHANNEL
+from games import Wordle, Hangman, Quiz, TwentyQuestions, TwoTruths, Associations, Story, Taboo, game_from_state
+from deadlines import DeadlineScheduler
+from metrics import Registry, MetricsServer, LoopLagMonitor
+from prompt_budget import PromptBudget, PromptMeter, estimate_tokens, clip_tokens
+from log_pipeline import LogPipeline
+from live_edit import EditCoalescer, send_then_edit
+from outbox import ChannelOutbox, Turn
+from migrations import MigrationError, migrate
+from recent_words import RecentWordsStore
+from near_duplicates import NearDuplicates
+from sharding import ShardOwnership, parse_shard_ids
+from ai_scheduler import AIScheduler, SchedulerRejected, PRIORITY_INTERACTIVE, PRIORITY_VALIDATION, PRIORITY_BACKGROUND
+
+STARTED_AT = time.perf_counter()
 
 # --- KONFIGURACJA ---
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 DATABASE_URL = os.getenv('DATABASE_URL')
 LOG_CHANNEL_ID = 1424709526644326511 # <<<================ ZASTĄP PRAWDZIWYM ID KANAŁU LOGÓW
-
-if not all([DISCORD_TOKEN, GOOGLE_API_KEY, DATABASE_URL]):
-    print("BŁĄD: Brak kluczowych zmiennych środowiskowych.")
-    exit()
+DB_POOL_MIN, DB_POOL_MAX = int(os.getenv('DB_POOL_MIN', 1)), int(os.getenv('DB_POOL_MAX', 10))
+DB_ACQUIRE_TIMEOUT, DB_STATEMENT_TIMEOUT_MS = float(os.getenv('DB_ACQUIRE_TIMEOUT', 10)), int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 5000))
+SCORE_FLUSH_MS, SCORE_FLUSH_EVENTS = int(os.getenv('SCORE_FLUSH_MS', 2000)), int(os.getenv('SCORE_FLUSH_EVENTS', 100))
+AI_RATE_PER_MINUTE, AI_BURST = float(os.getenv('AI_RATE_PER_MINUTE', 60)), int(os.getenv('AI_BURST', 5))
+AI_MAX_IN_FLIGHT, AI_MAX_QUEUE = int(os.getenv('AI_MAX_IN_FLIGHT', 4)), int(os.getenv('AI_MAX_QUEUE', 100))
+AI_MAX_RETRIES, AI_MAX_ATTEMPTS = int(os.getenv('AI_MAX_RETRIES', 3)), int(os.getenv('AI_MAX_ATTEMPTS', 4)) # ponowienia po błędach API / próby przy złej odpowiedzi
+CONTENT_POOL_LOW, CONTENT_POOL_HIGH = int(os.getenv('CONTENT_POOL_LOW', 2)), int(os.getenv('CONTENT_POOL_HIGH', 5)) # progi uzupełniania pul treści
+QUIZ_BANK_MIN_STOCK = int(os.getenv('QUIZ_BANK_MIN_STOCK', 10))
+QUIZ_BANK_CATEGORIES = [c for c in os.getenv('QUIZ_BANK_CATEGORIES', 'historia,geografia,nauka,sport,film,muzyka').split(',') if c.strip()]
+LEXICON_PATH = os.getenv('LEXICON_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'lexicon.bin'))
+LEXICON_SOURCE = os.getenv('LEXICON_SOURCE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'slowa.txt'))
+LEXICON_MIN_VALIDATION_WORDS = int(os.getenv('LEXICON_MIN_VALIDATION_WORDS', MIN_VALIDATION_WORDS)) # minimalna liczba słów danej długości, od której sprawdzamy próby w Wordle (przy pełniejszym słowniku warto podnieść)
+WORDS_FROM_AI = os.getenv('WORDS_FROM_AI', 'true') == 'true' # Gemini jako zapasowe źródło słów, gdy słownik nie wystarcza (pula w tle tylko dla długości/poziomów bez słów w słowniku)
+VERDICT_CACHE_SIZE, VERDICT_TTL_DAYS, VERDICT_MAX_ROWS = int(os.getenv('VERDICT_CACHE_SIZE', 10000)), int(os.getenv('VERDICT_TTL_DAYS', 30)), int(os.getenv('VERDICT_MAX_ROWS', 500000))
+GAME_STORE_FLUSH_MS = int(os.getenv('GAME_STORE_FLUSH_MS', 500)) # jak często zapisujemy zmienione stany gier
+PLAYER_IDLE_TIMEOUT, IDLE_MAX_CONCURRENCY = int(os.getenv('PLAYER_IDLE_TIMEOUT', 900)), int(os.getenv('IDLE_MAX_CONCURRENCY', 8)) # wygasanie porzuconych gier osobistych / ile kanałów obsługujemy naraz
+LOG_QUEUE_MAX, LOG_FLUSH_MS, LOG_INFO_SAMPLE = int(os.getenv('LOG_QUEUE_MAX', 500)), int(os.getenv('LOG_FLUSH_MS', 2000)), float(os.getenv('LOG_INFO_SAMPLE', 0.2)) # część logów INFO zostawiana przy zatorze
+LOG_JSONL_PATH = os.getenv('LOG_JSONL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'logs.jsonl')) # pusta wartość wyłącza kopię logów w pliku
+PROMPT_TOKENS_20Q, PROMPT_TOKENS_STORY = int(os.getenv('PROMPT_TOKENS_20Q', 500)), int(os.getenv('PROMPT_TOKENS_STORY', 700)) # limit kontekstu gry w prompcie (przybliżone tokeny)
+METRICS_HOST, METRICS_PORT = os.getenv('METRICS_HOST', '127.0.0.1'), int(os.getenv('METRICS_PORT', 9108)) # lokalny endpoint /metrics; port 0 wyłącza
+STREAM_EDIT_INTERVAL_MS = int(os.getenv('STREAM_EDIT_INTERVAL_MS', 1200)) # odstęp edycji przy strumieniowaniu odpowiedzi AI (limity Discorda)
+LEGACY_GUILD_ID = int(os.getenv('LEGACY_GUILD_ID')) if os.getenv('LEGACY_GUILD_ID') else None # serwer, do którego migracja przypisze punkty, osiągnięcia i kanały sprzed podziału na serwery (wymagany przy aktualizacji bazy z danymi)
+RECENT_WORDS_DAYS, RECENT_WORDS_MAX = int(os.getenv('RECENT_WORDS_DAYS', 7)), int(os.getenv('RECENT_WORDS_MAX', 2000)) # okno, w którym słowo nie wraca na danym serwerze / limit słów w tym oknie
+WORD_FILTER_CAPACITY = int(os.getenv('WORD_FILTER_CAPACITY', 100000)) # słów na pokolenie filtra Blooma (~120 KB na serwer przy 1% fałszywych trafień)
+SHARD_COUNT, SHARD_IDS = int(os.getenv('SHARD_COUNT', 0)), parse_shard_ids(os.getenv('SHARD_IDS', '')) # 0: jeden proces bez shardów; SHARD_IDS: shardy tego procesu, np. 0-3 (puste = wszystkie)
+WORKER_ID = os.getenv('WORKER_ID', '0') # nazwa procesu w logach i powiadomieniach między workerami (ustawia launcher.py)
+GAME_STATE_BACKEND = os.getenv('GAME_STATE_BACKEND', 'postgres') # memory: gry tylko w pamięci procesu; postgres: game_state wspólne dla workerów i odtwarzane po restarcie
+NEAR_DUP_THRESHOLD = float(os.getenv('NEAR_DUP_THRESHOLD', 0.6)) # szacowane podobieństwo Jaccarda, od którego nowe pytanie lub scenariusz uznajemy za przeformułowanie znanego (1: tylko identyczne)
+shards = ShardOwnership(SHARD_IDS, SHARD_COUNT or 1)
+COMMAND_SYNC = os.getenv('COMMAND_SYNC', 'auto') # auto: synchronizacja komend tylko po zmianie ich definicji; always; never
+SETTINGS_LISTEN = os.getenv('SETTINGS_LISTEN', 'false' if shards.everything else 'true') == 'true' # unieważnianie cache ustawień przez LISTEN/NOTIFY (kilka instancji; domyślnie włączone dla workera z częścią shardów)
 
 genai.configure(api_key=GOOGLE_API_KEY)
 model = genai.GenerativeModel('gemini-pro-latest')
 
 intents = discord.Intents.default(); intents.message_content, intents.members = True, True
-bot = commands.Bot(command_prefix="!", intents=intents)
+class GameBot(commands.AutoShardedBot if SHARD_COUNT else commands.Bot):
+    async def setup_hook(self):
+        startup_times['moduł i logowanie'] = time.perf_counter() - STARTED_AT; await start_metrics(); await timed_step('migracje', setup_database())
+        await asyncio.gather(timed_step('gry', restore_games()), timed_step('ustawienia', settings.load(self)), timed_step('pule treści', content.load()))
+        games.start(); await timed_step('komendy', sync_commands()); self.setup_finished = time.perf_counter()
+
+    async def close(self):
+        await outbox.flush(); await logs.stop(); await super().close(); quiz_bank.stop(); await content.stop(); await scores.stop(); await recent_words.stop(); await near_dups.stop(); idle.stop(); await games.stop(); settings.stop_listening(); await db.close(); loop_lag.stop(); await metrics_server.stop()
 
-player_games, channel_wide_games, recently_used_words = {}, {}, set()
-IDLE_TIMEOUT = 90
+bot = GameBot(command_prefix="!", intents=intents, **({'shard_count': SHARD_COUNT, 'shard_ids': sorted(shards.ids)} if SHARD_COUNT else {}))
+
+IDLE_TIMEOUT, IDLE_RETRY = 90, 30
 POINTS = {"łatwy": 10, "normalny": 15, "trudny": 25}
-ACHIEVEMENTS = {
-    "FIRST_WIN": {"name": "Pierwsze Kroki", "description": "Wygraj grę!", "points": 10},
-    "WORDLE_PRO": {"name": "Słowny Geniusz", "description": "Wordle w 2 próbach.", "points": 50},
-    "QUIZ_MASTER": {"name": "Mózg Operacji", "description": "Wygraj 5 quizów.", "points": 25},
-    "DEDECTIVE": {"name": "Mistrz Dedukcji", "description": "Zgadnij Co w <10 pyt.", "points": 30},
-    "SOCIALITE": {"name": "Dusza Towarzystwa", "description": "Wygraj w Tabu.", "points": 20},
-    "SCRIBE": {"name": "Pisarz", "description": "Dopisz 5 zdań w Historii.", "points": 15},
-}
+
+try: lexicon = Lexicon.open(LEXICON_PATH, LEXICON_SOURCE)
+except (OSError, ValueError) as e: lexicon = None; print(f"Słownik niedostępny: {e}")
 
 # --- FUNKCJE BAZY DANYCH ---
-def get_db_connection(): return psycopg2.connect(DATABASE_URL)
-
-def setup_database():
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""CREATE TABLE IF NOT EXISTS users (user_id BIGINT PRIMARY KEY, user_name TEXT, score INT DEFAULT 0, quiz_wins INT DEFAULT 0, wordle_wins INT DEFAULT 0, story_posts INT DEFAULT 0)""")
-            cur.execute("""CREATE TABLE IF NOT EXISTS achievements (user_id BIGINT, achievement_id TEXT, PRIMARY KEY (user_id, achievement_id))""")
-            cur.execute("""CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)""")
-            cur.execute("""CREATE TABLE IF NOT EXISTS used_questions (question_hash TEXT PRIMARY KEY)""")
-            cur.execute("INSERT INTO settings (key, value) VALUES ('maintenance_mode', 'false') ON CONFLICT (key) DO NOTHING")
-        conn.commit(); print("Baza danych PostgreSQL gotowa.")
-
-def update_user_score(user_id, user_name, points=0, **kwargs):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("INSERT INTO users (user_id, user_name) VALUES (%s, %s) ON CONFLICT (user_id) DO UPDATE SET user_name = EXCLUDED.user_name", (user_id, str(user_name)))
-            parts, params = ["score = score + %s"], [points]
-            if kwargs.get('quiz_win'): parts.append("quiz_wins = quiz_wins + 1")
-            if kwargs.get('wordle_win'): parts.append("wordle_wins = wordle_wins + 1")
-            if kwargs.get('story_post'): parts.append("story_posts = story_posts + 1")
-            query = f"UPDATE users SET {', '.join(parts)} WHERE user_id = %s"
-            params.append(user_id); cur.execute(query, tuple(params))
-        conn.commit()
-
-def add_used_question(question_text):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur: cur.execute("INSERT INTO used_questions (question_hash) VALUES (%s) ON CONFLICT (question_hash) DO NOTHING", (str(hash(question_text)),)); conn.commit()
-
-def get_recent_question_hashes(limit=50):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur: cur.execute("SELECT question_hash FROM used_questions ORDER BY random() LIMIT %s", (limit,)); return [row[0] for row in cur.fetchall()]
-
-def grant_achievement(user_id, ach_id):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT 1 FROM achievements WHERE user_id = %s AND achievement_id = %s", (user_id, ach_id))
-            if cur.fetchone() is None:
-                cur.execute("INSERT INTO achievements (user_id, achievement_id) VALUES (%s, %s)", (user_id, ach_id)); conn.commit(); return True
-    return False
-
-def get_user_stats(uid):
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur: cur.execute("SELECT * FROM users WHERE user_id = %s", (uid,)); return cur.fetchone()
-def get_user_achievements(uid):
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur: cur.execute("SELECT achievement_id FROM achievements WHERE user_id = %s", (uid,)); return cur.fetchall()
-def get_leaderboard(limit=10):
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur: cur.execute("SELECT user_name, score FROM users ORDER BY score DESC LIMIT %s", (limit,)); return cur.fetchall()
-def get_allowed_channels():
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur: cur.execute("SELECT value FROM settings WHERE key = 'allowed_channels'"); row = cur.fetchone(); return json.loads(row['value']) if row else []
-def set_allowed_channels(cids):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur: cur.execute("INSERT INTO settings (key, value) VALUES ('allowed_channels', %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (json.dumps(list(set(cids))),)); conn.commit()
-def get_setting(key):
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur: cur.execute("SELECT value FROM settings WHERE key = %s", (key,)); return cur.fetchone()
-def set_setting(key, value):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur: cur.execute("INSERT INTO settings (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (key, str(value))); conn.commit()
-
-async def post_log(level, title, description="", fields=None, ctx=None):
+# --- METRYKI ---
+metrics = Registry()
+HANDLER_SECONDS = metrics.histogram('zabawy_handler_seconds', 'Czas obsługi on_message i handlerów gier', ('handler',))
+COMMAND_SECONDS = metrics.histogram('zabawy_command_seconds', 'Czas od wywołania komendy do jej zakończenia', ('command', 'status'))
+AI_SECONDS = metrics.histogram('zabawy_ai_call_seconds', 'Czas zapytania do Gemini (z kolejką i ponowieniami)', ('kind',))
+AI_FIRST_TOKEN = metrics.histogram('zabawy_ai_first_token_seconds', 'Czas do pierwszego fragmentu strumieniowanej odpowiedzi Gemini', ('kind',))
+AI_FAILURES = metrics.counter('zabawy_ai_failures_total', 'Nieudane zapytania do Gemini', ('kind', 'reason'))
+AI_RETRIES = metrics.counter('zabawy_ai_retries_total', 'Ponowienia zapytań do Gemini', ('kind',))
+AI_QUEUE = metrics.gauge('zabawy_ai_queue_depth', 'Zapytania czekające w kolejce AI', ('priority',))
+DB_SECONDS = metrics.histogram('zabawy_db_seconds', 'Czekanie na połączenie z puli (wait) i czas operacji (query)', ('phase',))
+DB_FAILURES = metrics.counter('zabawy_db_failures_total', 'Nieudane operacje na bazie (z przekroczeniami czasu)')
+DB_CONNECTIONS = metrics.gauge('zabawy_db_connections', 'Połączenia z bazą: zajęte i maksimum puli', ('state',))
+ACTIVE_GAMES = metrics.gauge('zabawy_active_games', 'Aktywne gry według typu', ('scope', 'type'))
+LOOP_LAG = metrics.gauge('zabawy_event_loop_lag_last_seconds', 'Ostatnie zmierzone opóźnienie pętli zdarzeń')
+OUTBOX_MESSAGES = metrics.gauge('zabawy_outbox_messages', 'Wiadomości przez kolejkę kanałów: zlecone, wysłane, doklejone do poprzednich, nieudane', ('state',))
+STARTUP_SECONDS = metrics.gauge('zabawy_startup_seconds', 'Czas kolejnych kroków startu bota', ('step',))
+LOOP_LAG_SECONDS = metrics.histogram('zabawy_event_loop_lag_seconds', 'Rozkład opóźnień pętli zdarzeń', buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+metrics_server, loop_lag = MetricsServer(metrics, METRICS_HOST, METRICS_PORT), LoopLagMonitor(LOOP_LAG, LOOP_LAG_SECONDS)
+
+def observe_db(wait, run, ok):
+    DB_SECONDS.observe(wait, 'wait'); DB_SECONDS.observe(run, 'query')
+    if not ok: DB_FAILURES.inc()
+
+async def start_metrics():
+    loop_lag.start()
+    if METRICS_PORT:
+        try: await metrics_server.start()
+        except OSError as e: print(f"Nie można uruchomić /metrics na {METRICS_HOST}:{METRICS_PORT}: {e}")
+
+db = Database(DATABASE_URL, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX, acquire_timeout=DB_ACQUIRE_TIMEOUT, statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS, observer=observe_db)
+Q_USER_STATS = db.statement('user_stats', "SELECT * FROM users WHERE guild_id = $1 AND user_id = $2")
+Q_GUILD_RANKING = db.statement('guild_ranking', "SELECT user_id, user_name, score FROM users WHERE guild_id = $1 ORDER BY score DESC, user_id")
+achievements = AchievementEngine(db)
+# gry serwera obsługuje tylko worker z jego shardem; powiadomienia o zmianach potrzebne dopiero przy kilku workerach
+game_backend = PostgresBackend(db, dsn=None if shards.everything else DATABASE_URL, origin=f"{WORKER_ID}:{os.getpid()}") if GAME_STATE_BACKEND == 'postgres' else MemoryBackend()
+games = GameStore(game_backend, flush_interval=GAME_STORE_FLUSH_MS / 1000, factory=game_from_state, owns=shards.owns,
+                  locate=lambda scope, key: guild_of(bot.get_channel(key[0] if scope == SCOPE_PLAYER else key)))
+player_games, channel_wide_games = games.table(SCOPE_PLAYER), games.table(SCOPE_CHANNEL)
+recent_words = RecentWordsStore(db, window=RECENT_WORDS_DAYS * 86400, max_recent=RECENT_WORDS_MAX, capacity=WORD_FILTER_CAPACITY)
+
+@metrics.collect
+def collect_state():
+    DB_CONNECTIONS.set(db.in_use, 'in_use'); DB_CONNECTIONS.set(db.max_size, 'max'); ACTIVE_GAMES.values.clear()
+    for scope, table in (('player', player_games), ('channel', channel_wide_games)):
+        for game in table.values(): ACTIVE_GAMES.values[(scope, game.game_type)] = ACTIVE_GAMES.values.get((scope, game.game_type), 0) + 1
+    for priority, depth in ai.stats()['queue_depth'].items(): AI_QUEUE.set(depth, priority)
+    for state, count in outbox.stats.items(): OUTBOX_MESSAGES.set(count, state)
+
+async def setup_database():
+    try: applied = await migrate(db, params={'legacy_guild_id': LEGACY_GUILD_ID})
+    except MigrationError as e: sys.exit(f"Baza danych: {e}. Ustaw LEGACY_GUILD_ID na ID serwera, do którego należą dotychczasowe punkty i kanały.")
+    if applied: print(f"Baza danych: wykonano migracje {', '.join(map(str, applied))}.")
+    else: print("Baza danych PostgreSQL gotowa (schemat aktualny).")
+
+scores = ScoreBuffer(db, flush_interval=SCORE_FLUSH_MS / 1000, max_events=SCORE_FLUSH_EVENTS)
+settings = SettingsCache(db)
+
+def guild_of(channel): return channel.guild.id if getattr(channel, 'guild', None) else 0  # 0 = wiadomości prywatne
+
+async def load_guild(guild_id):
+    # ranking (z indeksu users_guild_score) i dozwolone kanały serwera; wołane raz, przy pierwszym zdarzeniu z serwera
+    start, board = time.perf_counter(), Leaderboard()
+    rows, _, _ = await asyncio.gather(db.fetchall(Q_GUILD_RANKING, (guild_id,)), settings.load_guild(guild_id), recent_words.load(guild_id))
+    board.load([(r['user_id'], r['user_name'], r['score']) for r in rows])
+    for uid, name, points in scores.pending_points(guild_id): board.add(uid, name, points)
+    print(f"Serwer {guild_id}: ranking {len(board)} graczy w {(time.perf_counter() - start) * 1000:.0f} ms."); return board
+
+guilds = GuildCache(load_guild)  # guild_id -> Leaderboard
+
+def update_user_score(guild_id, user_id, user_name, points=0, **kwargs):
+    scores.add(guild_id, user_id, user_name, points=points, quiz_win=kwargs.get('quiz_win', False), wordle_win=kwargs.get('wordle_win', False), story_post=kwargs.get('story_post', False))
+    if points and (board := guilds.get(guild_id)): board.add(user_id, user_name, points)  # niewczytany serwer dostanie punkty z bufora przy ładowaniu
+
+async def get_user_stats(guild_id, uid): return scores.overlay(guild_id, uid, await db.fetchone(Q_USER_STATS, (guild_id, uid)))
+
+LOG_EMOJIS = {"INFO": "ℹ️", "SUCCESS": "✅", "FAIL": "❌", "ERROR": "🚨", "WARNING": "⚠️"}
+LOG_COLORS = {"INFO": 0x3498db, "SUCCESS": 0x2ecc71, "FAIL": 0xe67e22, "ERROR": 0xe74c3c, "WARNING": 0xf1c40f}
+
+def log_embed(entry):
+    embed = discord.Embed(title=f"{LOG_EMOJIS.get(entry['level'], '❓')} {entry['title']}", description=entry['description'], color=LOG_COLORS.get(entry['level'], 0x99aab5), timestamp=datetime.fromtimestamp(entry['ts'], timezone.utc))
+    if entry['author']: embed.set_author(name=entry['author'][0], icon_url=entry['author'][1])
+    for name, value in entry['fields'].items(): embed.add_field(name=name, value=value or "Brak", inline=False)
+    if not shards.everything: embed.set_footer(text=f"Worker {WORKER_ID} · shardy {shards}")
+    return embed
+
+async def send_log_batch(batch):
     if LOG_CHANNEL_ID == 123456789012345678: return
-    log_channel = bot.get_channel(LOG_CHANNEL_ID)
-    if not log_channel: print(f"BŁĄD: Nie mogę znaleźć kanału logów {LOG_CHANNEL_ID}."); return
-    emojis = {"INFO": "ℹ️", "SUCCESS": "✅", "FAIL": "❌", "ERROR": "🚨", "WARNING": "⚠️"}
-    colors = {"INFO": 0x3498db, "SUCCESS": 0x2ecc71, "FAIL": 0xe67e22, "ERROR": 0xe74c3c, "WARNING": 0xf1c40f}
-    embed = discord.Embed(title=f"{emojis.get(level, '❓')} {title}", description=description, color=colors.get(level, 0x99aab5), timestamp=discord.utils.utcnow())
-    if ctx:
-        user = None
-        if isinstance(ctx, discord.Interaction): user = ctx.user
-        elif isinstance(ctx, discord.Message): user = ctx.author
-        elif isinstance(ctx, (discord.Member, discord.User)): user = ctx
-        if user: embed.set_author(name=user, icon_url=user.display_avatar.url)
-    if fields:
-        for name, value in fields.items(): embed.add_field(name=name, value=str(value) or "Brak", inline=False)
-    try: await log_channel.send(embed=embed)
-    except Exception as e: print(f"Błąd wysyłania logu: {e}")
-
-async def check_and_grant_achievements(user, channel, **kwargs):
-    stats = get_user_stats(user.id)
-    if not stats: return
-    async def announce(ach_id):
-        ach = ACHIEVEMENTS[ach_id]; update_user_score(user.id, user.name, points=ach["points"])
-        await channel.send(f"🏆 {user.mention} odblokował: **{ach['name']}**! (+{ach['points']} pkt)")
-        await post_log("INFO", "Osiągnięcie", description=f"{user.mention} zdobył **{ach['name']}**.", ctx=user)
-    if (stats['quiz_wins'] + stats['wordle_wins']) >= 1 and grant_achievement(user.id, "FIRST_WIN"): await announce("FIRST_WIN")
-    if kwargs.get('wordle_attempts') == 2 and grant_achievement(user.id, "WORDLE_PRO"): await announce("WORDLE_PRO")
-    if stats['quiz_wins'] >= 5 and grant_achievement(user.id, "QUIZ_MASTER"): await announce("QUIZ_MASTER")
-    if kwargs.get('20q_win') and kwargs.get('questions_asked', 21) <= 10 and grant_achievement(user.id, "DEDECTIVE"): await announce("DEDECTIVE")
-    if kwargs.get('taboo_win') and grant_achievement(user.id, "SOCIALITE"): await announce("SOCIALITE")
-    if stats['story_posts'] >= 5 and grant_achievement(user.id, "SCRIBE"): await announce("SCRIBE")
+    # kanał logów jest w cache tylko u workera z shardem jego serwera; pozostałe wysyłają przez samo REST API
+    log_channel = bot.get_channel(LOG_CHANNEL_ID) or bot.get_partial_messageable(LOG_CHANNEL_ID)
+    await log_channel.send(embeds=[log_embed(e) for e in batch])
+
+logs = LogPipeline(send_log_batch, max_queue=LOG_QUEUE_MAX, flush_interval=LOG_FLUSH_MS / 1000, sample_rate=LOG_INFO_SAMPLE, jsonl_path=LOG_JSONL_PATH or None)
+
+def post_log(level, title, description="", fields=None, ctx=None):
+    user = None
+    if isinstance(ctx, discord.Interaction): user = ctx.user
+    elif isinstance(ctx, discord.Message): user = ctx.author
+    elif isinstance(ctx, (discord.Member, discord.User)): user = ctx
+    logs.post(level, title, description, fields, author=(str(user), user.display_avatar.url) if user else None)
+
+outbox = ChannelOutbox()  # wysyłka kolejką per kanał; teksty czekające na ten sam kanał idą jedną wiadomością
+
+async def check_and_grant_achievements(user, channel, turn=None, **event):
+    # z turn ogłoszenie dołącza do wiadomości z ruchem gracza zamiast osobnego wysłania
+    guild_id = guild_of(channel); new = await achievements.check(guild_id, user.id, get_user_stats, **event)
+    if not new: return
+    update_user_score(guild_id, user.id, user.name, points=sum(ACHIEVEMENTS[a]['points'] for a in new))  # premia idzie przez bufor punktów, więc ranking i statystyki jej nie gubią
+    names = ", ".join(f"**{ACHIEVEMENTS[a]['name']}** (+{ACHIEVEMENTS[a]['points']} pkt)" for a in new)
+    if turn is not None: turn.add(f"🏆 {user.mention} odblokował: {names}!")
+    else: outbox.send(channel, f"🏆 {user.mention} odblokował: {names}!")
+    post_log("INFO", "Osiągnięcie", description=f"{user.mention} zdobył {names}.", ctx=user)
 
     # --- FUNKCJE GENERUJĄCE AI ---
-async def generate_from_ai(prompt, is_json=False, temp=0.9):
+ai = AIScheduler(rate_per_minute=AI_RATE_PER_MINUTE, burst=AI_BURST, max_in_flight=AI_MAX_IN_FLIGHT, max_queue=AI_MAX_QUEUE, max_retries=AI_MAX_RETRIES,
+                 retry_on=(google.api_core.exceptions.ResourceExhausted, google.api_core.exceptions.ServiceUnavailable, google.api_core.exceptions.DeadlineExceeded, google.api_core.exceptions.InternalServerError))
+prompts = PromptMeter()
+PROMPT_BUDGETS = {'20_questions': PromptBudget(PROMPT_TOKENS_20Q, window=8), 'story': PromptBudget(PROMPT_TOKENS_STORY, window=6)}
+
+async def generate_from_ai(prompt, is_json=False, temp=0.9, priority=PRIORITY_INTERACTIVE, kind='other', on_text=None):
+    # on_text(tekst_do_tej_pory) włącza strumieniowanie: wołane po każdym fragmencie odpowiedzi
     safety_settings = [
         {"category": HarmCategory.HARM_CATEGORY_HARASSMENT, "threshold": HarmBlockThreshold.BLOCK_NONE},
         {"category": HarmCategory.HARM_CATEGORY_HATE_SPEECH, "threshold": HarmBlockThreshold.BLOCK_NONE},
@@ -146,70 +226,142 @@ async def generate_from_ai(prompt, is_json=False, temp=0.9):
         {"category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, "threshold": HarmBlockThreshold.BLOCK_NONE},
     ]
     try:
-        response = await model.generate_content_async(prompt, generation_config=genai.GenerationConfig(temperature=temp), safety_settings=safety_settings)
+        start, attempts, first_token, config = time.perf_counter(), [], [], genai.GenerationConfig(temperature=temp)
+        async def stream():
+            response, parts = await model.generate_content_async(prompt, generation_config=config, safety_settings=safety_settings, stream=True), []
+            async for chunk in response:
+                if not first_token: first_token.append(time.perf_counter() - start); AI_FIRST_TOKEN.observe(first_token[0], kind)
+                parts.append(chunk.text); on_text(''.join(parts).strip())
+            return response  # po przejściu całego strumienia response.text i usage_metadata są kompletne
+        def request(): attempts.append(1); return stream() if on_text else model.generate_content_async(prompt, generation_config=config, safety_settings=safety_settings)
+        try: response = await ai.call(request, priority)
+        finally:
+            if len(attempts) > 1: AI_RETRIES.inc(len(attempts) - 1, kind)
+        elapsed = time.perf_counter() - start; AI_SECONDS.observe(elapsed, kind)
+        prompts.record(kind, getattr(getattr(response, 'usage_metadata', None), 'prompt_token_count', 0) or estimate_tokens(prompt), elapsed)
         text = response.text.strip()
         if is_json: return json.loads(re.sub(r'```json\s*|\s*```', '', text, flags=re.DOTALL))
         return text
     except google.api_core.exceptions.ResourceExhausted:
-        await post_log("WARNING", "Przekroczono limit API", description="Zbyt wiele zapytań. Czekam 60s."); print("Limit API, czekam 60s...")
-        await asyncio.sleep(60); return await generate_from_ai(prompt, is_json, temp)
+        AI_FAILURES.inc(1, kind, 'quota'); post_log("WARNING", "Przekroczono limit API", description=f"Zbyt wiele zapytań, wyczerpano {AI_MAX_RETRIES} ponowień."); return None
+    except SchedulerRejected as e:
+        AI_FAILURES.inc(1, kind, 'rejected'); print(f"AI odrzuciło zapytanie: {e}"); return None
     except Exception as e:
-        if "response.candidates' is empty" in str(e): await post_log("WARNING", "Odpowiedź AI zablokowana", description="Filtry bezpieczeństwa Google.", fields={"Prompt": f"```{prompt[:1000]}...```"})
-        else: await post_log("ERROR", "Błąd API Google AI", description=f"```\n{e}\n```")
+        AI_FAILURES.inc(1, kind, 'blocked' if "response.candidates' is empty" in str(e) else 'error')
+        if "response.candidates' is empty" in str(e): post_log("WARNING", "Odpowiedź AI zablokowana", description="Filtry bezpieczeństwa Google.", fields={"Prompt": f"```{prompt[:1000]}...```"})
+        else: post_log("ERROR", "Błąd API Google AI", description=f"```\n{e}\n```")
         return None
 
-async def generate_word(length, difficulty, exclude_words=None):
+async def generate_word(length, difficulty, exclude_words=None, priority=PRIORITY_INTERACTIVE):
+    # wykluczenia sprawdzamy lokalnie: lista użytych słów w prompcie rosła bez końca
     diff_prompt = {"łatwy": "popularne", "normalny": "powszechne", "trudny": "rzadkie"}
-    exclusion_prompt = f"Nie może to być żadne z tych słów: {', '.join(exclude_words)}." if exclude_words else ""
-    prompt = f"Jesteś pomocnikiem w grze słownej. Podaj jedno, {diff_prompt[difficulty]} polskie słowo (rzeczownik), {length} liter, bez polskich znaków. {exclusion_prompt} ODPOWIEDZ TYLKO SAMYM SŁOWEM."
-    word = await generate_from_ai(prompt, temp=1.0)
-    if word and len(word) == length and re.match(f"^[A-Z]{{{length}}}$", word) and (not exclude_words or word not in exclude_words): return word
-    else: return await generate_word(length, difficulty, exclude_words)
-
-async def generate_quiz_question(category, difficulty, exclude_hashes=None):
-    exclusion_prompt = f"Unikaj pytań o podobnej tematyce do tych (reprezentowanych przez hashe): {', '.join(map(str, exclude_hashes))}." if exclude_hashes else ""
-    prompt = f'Jesteś kreatywnym twórcą quizów. Stwórz jedno {difficulty} pytanie z kategorii "{category}". Bądź naturalny i pomysłowy. Odpowiedź nie może być zawarta w pytaniu. {exclusion_prompt} Losowo przypisz poprawną odpowiedź. JSON: {{"question": "...", "answers": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "correct_answer": "A"}}'
-    q_data = await generate_from_ai(prompt, is_json=True)
-    if q_data and str(hash(q_data.get('question', ''))) not in (exclude_hashes or []):
-        add_used_question(q_data.get('question'))
-        return q_data
-    else: return await generate_quiz_question(category, difficulty, exclude_hashes)
-
-async def answer_yes_no(question, secret_object, history):
-    hist_text = "\n".join([f"Gracz: {h['q']} | Ty: {h['a']}" for h in history])
-    prompt = f'Grasz w 20 pytań. Jesteś osobą, która wymyśliła hasło. Twoje hasło to: "{secret_object}". Odpowiadaj naturalnie i po ludzku. Historia:\n{hist_text}\n\nNowe pytanie: "{question}"\n\nOdpowiedz krótko, używając wariacji TAK/NIE, np. "Zgadza się", "Pudło", "Nie do końca".'
-    return await generate_from_ai(prompt)
+    prompt = f"Jesteś pomocnikiem w grze słownej. Podaj jedno, {diff_prompt[difficulty]} polskie słowo (rzeczownik), {length} liter, bez polskich znaków. ODPOWIEDZ TYLKO SAMYM SŁOWEM."
+    for _ in range(AI_MAX_ATTEMPTS):
+        word = await generate_from_ai(prompt, temp=1.0, priority=priority)
+        if word and len(word) == length and re.match(f"^[A-Z]{{{length}}}$", word) and (not exclude_words or word not in exclude_words): return word
+    return None
+
+async def generate_quiz_question(category, difficulty, priority=PRIORITY_INTERACTIVE):
+    prompt = f'Jesteś kreatywnym twórcą quizów. Stwórz jedno {difficulty} pytanie z kategorii "{category}". Bądź naturalny i pomysłowy. Odpowiedź nie może być zawarta w pytaniu. Losowo przypisz poprawną odpowiedź. JSON: {{"question": "...", "answers": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "correct_answer": "A"}}'
+    for _ in range(AI_MAX_ATTEMPTS):
+        q_data = await generate_from_ai(prompt, is_json=True, priority=priority)
+        if valid_question(q_data) and (digest := await quiz_bank.add(category, difficulty, q_data)): return digest, q_data
+    return None
+
+async def get_quiz_question(user_id, category, difficulty):
+    if q_data := await quiz_bank.take(user_id, category, difficulty): return q_data
+    if not (generated := await generate_quiz_question(category, difficulty)): return None
+    digest, q_data = generated; await quiz_bank.mark_seen(user_id, digest); return q_data
+
+def valid_tabu_card(card): return isinstance(card, dict) and isinstance(card.get('keyword'), str) and isinstance(card.get('taboo_words'), list) and all(isinstance(w, str) for w in card['taboo_words'])
+def valid_two_truths(data): return isinstance(data, dict) and isinstance(data.get('statements'), list) and len(data['statements']) == 3 and data.get('lie_index') in (0, 1, 2)
+
+async def generate_tabu_card(priority=PRIORITY_INTERACTIVE):
+    card = await generate_from_ai('Stwórz kartę Tabu: słowo kluczowe i 5 zakazanych. JSON: {"keyword": "PSZCZOŁA", "taboo_words": ["MIÓD", "UL"]}', is_json=True, priority=priority)
+    return card if valid_tabu_card(card) else None
+
+async def generate_two_truths(priority=PRIORITY_INTERACTIVE):
+    data = await generate_from_ai('Stwórz 3 stwierdzenia o sobie (AI): 2 prawdziwe, 1 kłamstwo. JSON: {"statements": ["...", "..."], "lie_index": 1}', is_json=True, priority=priority)
+    return data if valid_two_truths(data) else None
+
+async def generate_scenario(priority=PRIORITY_INTERACTIVE, on_text=None):
+    # podobny do znanego generujemy od nowa; przy strumieniowaniu kolejna próba nadpisuje odrzuconą w tej samej wiadomości
+    for _ in range(AI_MAX_ATTEMPTS):
+        text = await generate_from_ai('Stwórz kreatywny scenariusz "Co byś zrobił, gdyby...".', priority=priority, on_text=on_text)
+        if text and await near_dups.admit('scenario', '', text): return text
+    return None
+
+STREAM_CURSOR = " ▌"
+def stream_edits(edit): return EditCoalescer(edit, min_interval=STREAM_EDIT_INTERVAL_MS / 1000)
+
+# --- PULE GOTOWEJ TREŚCI ---
+content = ContentPool(db, low_watermark=CONTENT_POOL_LOW, high_watermark=CONTENT_POOL_HIGH, owner=WORKER_ID)
+WORD_POOL_BUCKETS = [f"{n}:{d}" for n in range(4, 9) for d in POINTS if not lexicon or not lexicon.count(n, d)] # AI w tle tylko dla kubełków, których słownik nie obsłuży
+if WORDS_FROM_AI and WORD_POOL_BUCKETS:
+    content.register('word', lambda b: generate_word(int(b.split(':')[0]), b.split(':')[1], priority=PRIORITY_BACKGROUND), buckets=WORD_POOL_BUCKETS)
+content.register('tabu', lambda b: generate_tabu_card(PRIORITY_BACKGROUND))
+content.register('two_truths', lambda b: generate_two_truths(PRIORITY_BACKGROUND))
+content.register('scenario', lambda b: generate_scenario(PRIORITY_BACKGROUND))
+
+verdicts = VerdictCache(db, max_entries=VERDICT_CACHE_SIZE, ttl=VERDICT_TTL_DAYS * 86400, max_rows=VERDICT_MAX_ROWS)
+near_dups = NearDuplicates(db, threshold=NEAR_DUP_THRESHOLD)
+quiz_bank = QuizBank(db, generator=lambda c, d: generate_quiz_question(c, d, PRIORITY_BACKGROUND), min_stock=QUIZ_BANK_MIN_STOCK, categories=QUIZ_BANK_CATEGORIES, near_dups=near_dups)
+
+async def get_word(length, difficulty, guild_id):
+    # nigdy nie słowo z ostatniego okna serwera; spośród kilku kandydatów wolimy takie, którego filtr jeszcze nie widział
+    used = recent_words.get(guild_id)
+    if lexicon:
+        words = [w for _ in range(4) if (w := lexicon.random_word(length, difficulty, exclude=used))]
+        if words: return next((w for w in words if not used.seen(w)), words[0])
+    if not WORDS_FROM_AI: return None
+    word = content.pop('word', f"{length}:{difficulty}", accept=lambda w: w not in used)
+    return word or await generate_word(length, difficulty, used)
+
+def is_known_word(word, target=None):
+    # walidujemy tylko przy słowniku na tyle dużym, żeby nie odrzucać poprawnych słów; hasło od AI może być spoza słownika
+    return not lexicon or word == target or lexicon.accepts(word, LEXICON_MIN_VALIDATION_WORDS)
+
+async def answer_yes_no(question, game, on_text=None):
+    budget, line = PROMPT_BUDGETS['20_questions'], lambda h: f"Gracz: {h['q']} | Ty: {h['a']}"
+    older = game.history[:-budget.window] if len(game.history) > budget.window else []
+    summary, recent = budget.fit("; ".join(f"{h['q']} → {h['a']}" for h in older), game.history[-budget.window:], render=line)
+    hist_text = (f"Wcześniej ustalono: {summary}\n" if summary else "") + "\n".join(line(h) for h in recent)
+    prompt = f'Grasz w 20 pytań. Jesteś osobą, która wymyśliła hasło. Twoje hasło to: "{game.secret_object}". Odpowiadaj naturalnie i po ludzku. Historia:\n{hist_text}\n\nNowe pytanie: "{question}"\n\nOdpowiedz krótko, używając wariacji TAK/NIE, np. "Zgadza się", "Pudło", "Nie do końca".'
+    return await generate_from_ai(prompt, kind='20_questions', on_text=on_text)
+
+async def story_prompt(game):
+    budget = PROMPT_BUDGETS['story']
+    if pending := budget.overflow(game.full_story, game.summarized):
+        summary = await generate_from_ai(f"Streść zwięźle, w najwyżej 3 zdaniach, tę historię:\n{game.summary} {' '.join(pending)}", temp=0.3, priority=PRIORITY_BACKGROUND, kind='story_summary')
+        if summary: game.summary, game.summarized = clip_tokens(summary, budget.max_tokens // 2), game.summarized + len(pending)
+    summary, recent = budget.fit(game.summary, game.full_story[game.summarized:])
+    return (f"Streszczenie dotychczasowej historii: {summary}\n" if summary else "") + f"Dokończ historię: \"{' '.join(recent)}\""
 
 async def validate_association_ai(last_word, new_word):
     prompt = f'Czy słowo "{new_word}" jest rozsądnym skojarzeniem do słowa "{last_word}"? Dopuszczaj luźne powiązania. Odpowiedz tylko "TAK" lub "NIE".'
-    return await generate_from_ai(prompt)
+    answer = await generate_from_ai(prompt, priority=PRIORITY_VALIDATION)
+    return None if answer is None else "TAK" in answer.upper()
+
+async def validate_association(last_word, new_word):
+    return await verdicts.get_or_compute(last_word, new_word, lambda: validate_association_ai(last_word, new_word))
+
+async def suggest_association(game):
+    if word := await verdicts.suggest(game.last_word, exclude=game.word_history): return word
+    word = await generate_from_ai(f'Podaj jedno skojarzenie do "{game.last_word}".', priority=PRIORITY_BACKGROUND)
+    word = word.strip().split()[0].strip('.,!?"*').upper() if word and word.strip() else None
+    if word and word.isalpha(): await verdicts.record(game.last_word, word, True); return word
+    return None
 
 async def generate_hint(secret_object):
     return await generate_from_ai(f'Podaj krótką podpowiedź o "{secret_object}", nie zdradzając go.')
 
 async def set_channels_lock(lock_status, guild, interaction):
-    cids = get_allowed_channels() or [interaction.channel_id]
+    cids = settings.channels(guild.id) or [interaction.channel_id]
     perms = discord.PermissionOverwrite(send_messages=not lock_status)
-    for cid in cids:
-        if ch := bot.get_channel(cid):
-            try: await ch.set_permissions(guild.default_role, overwrite=perms)
-            except discord.Forbidden: await post_log("ERROR", "Błąd Blokady", description=f"Brak uprawnień do zarządzania {ch.mention}.")
-
-def check_wordle_guess(guess, secret):
-    fb, s_letters, g_letters = ['⬛']*len(secret), list(secret), list(guess)
-    for i in range(len(secret)):
-        if g_letters[i] == s_letters[i]: fb[i], s_letters[i], g_letters[i] = '🟩', None, None
-    for i in range(len(secret)):
-        if g_letters[i] and g_letters[i] in s_letters: fb[i] = '🟨'; s_letters[s_letters.index(g_letters[i])] = None
-    return "".join(fb)
-
-def display_hangman(game):
-    art = ["  +---+\n  |   |\n      |\n      |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n      |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n  |   |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|   |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|\\  |\n      |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|\\  |\n /    |\n      |\n===", "  +---+\n  |   |\n  O   |\n /|\\  |\n / \\  |\n      |\n==="]
-    word = " ".join([l if l in game['guessed_letters'] else "_" for l in game['word']])
-    msg = f"```\n{art[min(game['wrong_guesses'], 6)]}\n```\n**Słowo:** `{word}`\n"
-    if game.get('guessed_letters'): msg += f"**Użyte:** {', '.join(sorted(game.get('guessed_letters', [])))}\n"
-    msg += f"**Błędy:** {game['wrong_guesses']}/{game['max_wrong_guesses']}"
-    return msg
+    async def lock(ch):
+        try: await ch.set_permissions(guild.default_role, overwrite=perms)
+        except discord.Forbidden: post_log("ERROR", "Błąd Blokady", description=f"Brak uprawnień do zarządzania {ch.mention}.")
+    await asyncio.gather(*(lock(ch) for cid in cids if (ch := bot.get_channel(cid))))  # każdy kanał ma własny limit, więc wszystkie naraz
 
 class ConfirmResetView(ui.View):
     def __init__(self, author_id): super().__init__(timeout=60); self.author_id, self.confirmed = author_id, None
@@ -227,166 +379,267 @@ class ConfirmResetView(ui.View):
         for item in self.children: item.disabled = True
         await i.response.edit_message(content="👍 **Anulowano.**", view=self); self.stop()
 
+RANKING_PAGE_SIZE = 10
+
+def ranking_embed(board, page, viewer_id):
+    pages = max(1, -(-len(board) // RANKING_PAGE_SIZE)); page = min(max(page, 0), pages - 1)
+    rows = board.page(page * RANKING_PAGE_SIZE, RANKING_PAGE_SIZE); embed = discord.Embed(title="🏆 Ranking Serwera", color=discord.Color.gold())
+    embed.description = "\n".join([f"{rank}. {name} - {score} pkt" for rank, _, name, score in rows]) if rows else "Ranking jest pusty!"
+    footer = f"Strona {page + 1}/{pages}"
+    if rank := board.rank(viewer_id): footer += f" • Twoje miejsce: #{rank} z {len(board)}"
+    return embed.set_footer(text=footer), page, pages
+
+class RankingView(ui.View):
+    def __init__(self, board, viewer_id, page, pages): super().__init__(timeout=120); self.board, self.viewer_id = board, viewer_id; self.set_page(page, pages)
+    def set_page(self, page, pages): self.page = page; self.previous_page.disabled, self.next_page.disabled = page == 0, page >= pages - 1
+    async def interaction_check(self, i: discord.Interaction):
+        if i.user.id != self.viewer_id: await i.response.send_message("Użyj własnego `/ranking`.", ephemeral=True); return False
+        return True
+    async def show(self, i, page):
+        embed, page, pages = ranking_embed(self.board, page, self.viewer_id); self.set_page(page, pages); await i.response.edit_message(embed=embed, view=self)
+    @ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, i: discord.Interaction, b: ui.Button): await self.show(i, self.page - 1)
+    @ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, i: discord.Interaction, b: ui.Button): await self.show(i, self.page + 1)
+
+TRUTH_LIE_TIMEOUT = 180
+truth_views = {}  # klucz gry -> widok; czas na odpowiedź pilnuje harmonogram terminów, który zatrzymuje widok przy usunięciu gry
+
 class TruthLieView(ui.View):
-    def __init__(self, lie_index, game_key): super().__init__(timeout=180); self.lie_index, self.game_key, self.clicked = lie_index, game_key, False
-    async def on_timeout(self):
-        if self.game_key in player_games and not self.clicked: del player_games[self.game_key]
+    def __init__(self, lie_index, game_key): super().__init__(timeout=None); self.lie_index, self.game_key, self.clicked = lie_index, game_key, False; truth_views[game_key] = self
     async def check_answer(self, i: discord.Interaction, choice_index: int):
         self.clicked=True
         for item in self.children: item.disabled = True
         if choice_index == self.lie_index:
-            text = "✅ Brawo! To było kłamstwo! (+5 pkt)"; update_user_score(i.user.id, i.user.name, points=5); await check_and_grant_achievements(i.user, i.channel)
-            await post_log("SUCCESS", "Dwie Prawdy (Wygrana)", ctx=i)
+            turn = Turn("✅ Brawo! To było kłamstwo! (+5 pkt)"); update_user_score(i.guild_id or 0, i.user.id, i.user.name, points=5); await check_and_grant_achievements(i.user, i.channel, turn)
+            post_log("SUCCESS", "Dwie Prawdy (Wygrana)", ctx=i)
         else:
-            text = f"❌ Niestety! Kłamstwem było stwierdzenie nr {self.lie_index + 1}."; await post_log("FAIL", "Dwie Prawdy (Przegrana)", ctx=i)
-        await i.response.edit_message(content=text, view=self)
+            turn = Turn(f"❌ Niestety! Kłamstwem było stwierdzenie nr {self.lie_index + 1}."); post_log("FAIL", "Dwie Prawdy (Przegrana)", ctx=i)
+        await i.response.edit_message(content=turn.text, view=self)
         if self.game_key in player_games: del player_games[self.game_key]
-    @ui.button(label="1")
+    @ui.button(label="1", custom_id="truth_lie:1")
     async def b1(self, i, b): await self.check_answer(i, 0)
-    @ui.button(label="2")
+    @ui.button(label="2", custom_id="truth_lie:2")
     async def b2(self, i, b): await self.check_answer(i, 1)
-    @ui.button(label="3")
+    @ui.button(label="3", custom_id="truth_lie:3")
     async def b3(self, i, b): await self.check_answer(i, 2)
 
-@tasks.loop(seconds=30)
-async def check_idle_games():
-    for cid, game in list(channel_wide_games.items()):
-        if time.time() - game.get('last_activity', 0) > IDLE_TIMEOUT:
-            if not (ch := bot.get_channel(cid)): del channel_wide_games[cid]; continue
-            if game['game_type'] == 'associations':
-                async with ch.typing(): word = await generate_from_ai(f'Podaj jedno skojarzenie do "{game["last_word"]}".');
-                if word: await ch.send(f"Cisza... może **{word}**? Kto teraz?"); game.update({'last_word': word, 'last_player_id': bot.user.id, 'last_activity': time.time()})
-            elif game['game_type'] == 'story':
-                async with ch.typing(): sentence = await generate_from_ai(f"Dokończ historię: \"{' '.join(game['full_story'])}\"")
-                if sentence: await ch.send(f"*{bot.user.name} dopisuje:*\n> {sentence}"); game.update({'last_player_id': bot.user.id, 'last_activity': time.time()}); game['full_story'].append(sentence)
+# --- TERMINY GIER (bezczynność kanałów, wygasanie gier osobistych) ---
+def game_deadline(scope, game):
+    if isinstance(game, TwoTruths): return game.started + TRUTH_LIE_TIMEOUT
+    if isinstance(game, (Associations, Story)): return game.last_activity + IDLE_TIMEOUT
+    return time.time() + PLAYER_IDLE_TIMEOUT if scope == SCOPE_PLAYER else None
+
+def on_game_change(scope, key, game):
+    if game is None:
+        idle.cancel((scope, key))
+        if scope == SCOPE_PLAYER and (view := truth_views.pop(key, None)): view.stop()
+    elif (when := game_deadline(scope, game)) is not None: idle.schedule((scope, key), when)
+
+async def nudge_channel_game(cid):
+    game = channel_wide_games.get(cid)
+    if game is None: return None
+    if not (ch := bot.get_channel(cid)): del channel_wide_games[cid]; return None
+    if isinstance(game, Associations):
+        async with ch.typing(): word = await suggest_association(game)
+        if word: await ch.send(f"Cisza... może **{word}**? Kto teraz?"); game.accept(word, bot.user.id); channel_wide_games.touch(cid)
+    elif isinstance(game, Story):
+        header, live = f"*{bot.user.name} dopisuje:*\n> ", stream_edits(send_then_edit(ch.send))
+        async with ch.typing(): sentence = await generate_from_ai(await story_prompt(game), priority=PRIORITY_BACKGROUND, kind='story', on_text=lambda t: live.update(header + t + STREAM_CURSOR))
+        if sentence: await live.finish(header + sentence); game.add(sentence, bot.user.id); channel_wide_games.touch(cid)
+        elif live.started: await live.finish(header + "…")
+    return time.time() + IDLE_RETRY  # pomijane, jeśli gra ruszyła i ma już nowy termin
+
+async def expire_player_game(key):
+    if (game := player_games.get(key)) is None: return
+    del player_games[key]
+    if isinstance(game, TwoTruths): return
+    word = getattr(game, 'word', None)
+    if ch := bot.get_channel(key[0]): outbox.send(ch, f"⌛ <@{key[1]}>, Twoja gra (`{game.game_type}`) wygasła z powodu braku aktywności." + (f" Słowo: **{word}**." if word else ""))
+    post_log("INFO", "Gra Wygasła", fields={"Gracz": f"<@{key[1]}>", "Gra": game.game_type})
+
+async def on_game_deadline(entry):
+    scope, key = entry
+    return await nudge_channel_game(key) if scope == SCOPE_CHANNEL else await expire_player_game(key)
+
+idle = DeadlineScheduler(on_game_deadline, max_concurrency=IDLE_MAX_CONCURRENCY); games.watch(on_game_change)
 
                 # --- HANDLERY WIADOMOŚCI ---
+# każdy ruch zbiera odpowiedź, wynik i osiągnięcia w jeden Turn i wysyła go jedną odpowiedzią przez outbox
 async def handle_wordle_guess(msg, game, key):
     guess = msg.content.upper().strip()
-    if len(guess) != len(game['word']) or not guess.isalpha(): return
-    game['attempts'] += 1; game.setdefault('history', []).append(guess); await msg.reply(f"{check_wordle_guess(guess, game['word'])} `({game['attempts']}/{game['max_attempts']})`", mention_author=False)
-    if guess == game['word']:
-        points = POINTS[game['difficulty']] + (len(game['word']) - 4) * 5
-        await msg.channel.send(f"🎉 Zgadza się, {msg.author.mention}! Słowo to **{game['word']}**! Zdobywasz **{points} punktów**."); update_user_score(msg.author.id, msg.author.name, points=points, wordle_win=True);
-        recently_used_words.add(game['word'])
-        await post_log("SUCCESS", "Wordle (Wygrana)", fields={"Słowo": game['word'], "Próby": f"{game['attempts']}/{game['max_attempts']}", "Punkty": points}, ctx=msg);
-        await check_and_grant_achievements(msg.author, msg.channel, wordle_attempts=game['attempts'])
-        del player_games[key]
-    elif game['attempts'] >= game['max_attempts']:
-        await msg.channel.send(f"😔 Tym razem się nie udało, {msg.author.mention}. Słowo to **{game['word']}**."); recently_used_words.add(game['word'])
-        await post_log("FAIL", "Wordle (Przegrana)", fields={"Słowo": game['word']}, ctx=msg); del player_games[key]
+    if len(guess) != len(game.word) or not guess.isalpha(): return
+    if not is_known_word(guess, game.word): outbox.reply(msg, "🤔 Nie znam takiego słowa. Spróbuj innego (próba się nie liczy).", mention_author=False); return
+    turn = Turn(f"{game.guess(guess)} `({game.attempts}/{game.max_attempts})`")
+    if guess == game.word:
+        points = POINTS[game.difficulty] + (len(game.word) - 4) * 5
+        turn.add(f"🎉 Zgadza się, {msg.author.mention}! Słowo to **{game.word}**! Zdobywasz **{points} punktów**."); update_user_score(guild_of(msg.channel), msg.author.id, msg.author.name, points=points, wordle_win=True)
+        post_log("SUCCESS", "Wordle (Wygrana)", fields={"Słowo": game.word, "Próby": f"{game.attempts}/{game.max_attempts}", "Punkty": points}, ctx=msg)
+        del player_games[key]; await check_and_grant_achievements(msg.author, msg.channel, turn, wordle_attempts=game.attempts)
+    elif game.lost:
+        turn.add(f"😔 Tym razem się nie udało, {msg.author.mention}. Słowo to **{game.word}**.")
+        post_log("FAIL", "Wordle (Przegrana)", fields={"Słowo": game.word}, ctx=msg); del player_games[key]
+    outbox.reply(msg, turn.text, mention_author=False)
 
 async def handle_hangman_guess(msg, game, key):
     guess = msg.content.upper().strip()
-    if not guess.isalpha() or len(guess) != 1 or guess in game.get('guessed_letters', []): return
-    game.setdefault('guessed_letters', []).append(guess)
-    if guess not in game['word']: game['wrong_guesses'] += 1
-    await msg.reply(display_hangman(game), mention_author=False)
-    if all(l in game['guessed_letters'] for l in game['word']):
-        points = POINTS[game['difficulty']]; await msg.channel.send(f"🎉 Gratulacje {msg.author.mention}! Hasło: **{game['word']}** (+{points} pkt)")
-        update_user_score(msg.author.id, msg.author.name, points=points, hangman_win=True); recently_used_words.add(game['word'])
-        await post_log("SUCCESS", "Wisielec (Wygrana)", fields={"Hasło": game['word'], "Błędy": f"{game['wrong_guesses']}/{game['max_wrong_guesses']}", "Punkty": points}, ctx=msg)
-        await check_and_grant_achievements(msg.author, msg.channel); del player_games[key]
-    elif game['wrong_guesses'] >= game['max_wrong_guesses']:
-        await msg.channel.send(f"😔 Koniec gry. Hasło: **{game['word']}**."); recently_used_words.add(game['word'])
-        await post_log("FAIL", "Wisielec (Przegrana)", fields={"Hasło": game['word']}, ctx=msg); del player_games[key]
+    if len(guess) != 1 or game.guess(guess) is None: return
+    turn = Turn(game.render())
+    if game.solved:
+        points = POINTS[game.difficulty]; turn.add(f"🎉 Gratulacje {msg.author.mention}! Hasło: **{game.word}** (+{points} pkt)")
+        update_user_score(guild_of(msg.channel), msg.author.id, msg.author.name, points=points, hangman_win=True)
+        post_log("SUCCESS", "Wisielec (Wygrana)", fields={"Hasło": game.word, "Błędy": f"{game.wrong_guesses}/{game.max_wrong_guesses}", "Punkty": points}, ctx=msg)
+        del player_games[key]; await check_and_grant_achievements(msg.author, msg.channel, turn)
+    elif game.lost:
+        turn.add(f"😔 Koniec gry. Hasło: **{game.word}**.")
+        post_log("FAIL", "Wisielec (Przegrana)", fields={"Hasło": game.word}, ctx=msg); del player_games[key]
+    outbox.reply(msg, turn.text, mention_author=False)
 
 async def handle_quiz_answer(msg, game, key):
     guess = msg.content.strip().upper()
-    if guess not in ["A", "B", "C", "D"] or game.get('answered'): return
-    game['answered'] = True; correct_key = game['question_data']['correct_answer']; points = POINTS[game['difficulty']]
-    if guess == correct_key:
-        await msg.reply(f"✅ Zgadza się! Brawo! (+{points} pkt)", mention_author=False); update_user_score(msg.author.id, msg.author.name, points=points, quiz_win=True)
-        await post_log("SUCCESS", "Quiz (Wygrana)", fields={"Kategoria": game.get('category', 'N/A'), "Punkty": points}, ctx=msg)
-        await check_and_grant_achievements(msg.author, msg.channel)
+    if guess not in ["A", "B", "C", "D"] or game.answered: return
+    points = POINTS[game.difficulty]; del player_games[key]
+    if game.answer(guess):
+        turn = Turn(f"✅ Zgadza się! Brawo! (+{points} pkt)"); update_user_score(guild_of(msg.channel), msg.author.id, msg.author.name, points=points, quiz_win=True)
+        post_log("SUCCESS", "Quiz (Wygrana)", fields={"Kategoria": game.category or 'N/A', "Punkty": points}, ctx=msg)
+        await check_and_grant_achievements(msg.author, msg.channel, turn)
     else:
-        correct_text = game['question_data']['answers'][correct_key]; await msg.reply(f"❌ Pudło. Poprawna odpowiedź to **{correct_key}: {correct_text}**.", mention_author=False)
-        await post_log("FAIL", "Quiz (Przegrana)", fields={"Kategoria": game.get('category', 'N/A'), "Odpowiedź": guess, "Poprawna": correct_key}, ctx=msg)
-    del player_games[key]
+        correct_key = game.correct_key; turn = Turn(f"❌ Pudło. Poprawna odpowiedź to **{correct_key}: {game.question_data['answers'][correct_key]}**.")
+        post_log("FAIL", "Quiz (Przegrana)", fields={"Kategoria": game.category or 'N/A', "Odpowiedź": guess, "Poprawna": correct_key}, ctx=msg)
+    outbox.reply(msg, turn.text, mention_author=False)
 
 async def handle_20q_question(msg, game, key):
-    if game['questions_asked'] >= 20: await msg.reply(f"⌛ Koniec pytań! Odpowiedź: **{game['secret_object']}**.", mention_author=False); await post_log("FAIL", "Zgadnij Co (Przegrana)", {"Obiekt": game['secret_object'], "Powód": "Limit pytań"}, ctx=msg); del player_games[key]; return
-    question, game['questions_asked'] = msg.content, game['questions_asked'] + 1
-    async with msg.channel.typing(): answer = await answer_yes_no(question, game['secret_object'], game.get('history',[]))
-    if answer: await msg.reply(f"`Pyt. {game['questions_asked']}/20`: **{answer}**", mention_author=False); game.setdefault('history', []).append({'q': question, 'a': answer})
-    else: await msg.reply("Hmm, coś mi się zacięło. Zadaj inne pytanie.", mention_author=False); game['questions_asked'] -= 1
+    if game.out_of_questions: await msg.reply(f"⌛ Koniec pytań! Odpowiedź: **{game.secret_object}**.", mention_author=False); post_log("FAIL", "Zgadnij Co (Przegrana)", {"Obiekt": game.secret_object, "Powód": "Limit pytań"}, ctx=msg); del player_games[key]; return
+    question = msg.content; game.questions_asked += 1
+    prefix, live = f"`Pyt. {game.questions_asked}/{game.MAX_QUESTIONS}`: ", stream_edits(send_then_edit(lambda text: msg.reply(text, mention_author=False)))
+    async with msg.channel.typing(): answer = await answer_yes_no(question, game, on_text=lambda t: live.update(f"{prefix}**{t}**{STREAM_CURSOR}"))
+    if answer: await live.finish(f"{prefix}**{answer}**"); game.record(question, answer)
+    else: await live.finish("Hmm, coś mi się zacięło. Zadaj inne pytanie."); game.questions_asked -= 1
 
 async def handle_association(msg, game):
-    if msg.author.id == game.get('last_player_id'): return
+    if msg.author.id == game.last_player_id: return
     new_word = msg.content.strip().upper().split()[0]
-    if not new_word.isalpha() or new_word in game.get('word_history',[]): return
-    async with msg.channel.typing(): is_valid = await validate_association_ai(game['last_word'], new_word)
-    if is_valid and "TAK" in is_valid.upper():
-        await msg.reply(f"**{game['last_word']}** → **{new_word}**. Pasuje! Kto następny?", mention_author=False)
-        game.update({'last_word': new_word, 'last_player_id': msg.author.id, 'last_activity': time.time()})
-    else: await msg.reply(f"Hmm, {msg.author.mention}, nie jestem pewien, czy to dobre skojarzenie. Spróbuj czegoś innego!", mention_author=False)
+    if not new_word.isalpha() or new_word in game.word_history: return
+    async with msg.channel.typing(): is_valid = await validate_association(game.last_word, new_word)
+    if is_valid:
+        text = f"**{game.last_word}** → **{new_word}**. Pasuje! Kto następny?"; game.accept(new_word, msg.author.id); outbox.reply(msg, text, mention_author=False)
+    else: outbox.reply(msg, f"Hmm, {msg.author.mention}, nie jestem pewien, czy to dobre skojarzenie. Spróbuj czegoś innego!", mention_author=False)
 
 async def handle_story_addition(msg, game):
-    if msg.author.id == game.get('last_player_id'): return
+    if msg.author.id == game.last_player_id: return
     sentence = msg.content.strip()
     if not sentence: return
-    game.update({'last_player_id': msg.author.id, 'last_activity': time.time()}); game.setdefault('full_story',[]).append(sentence)
-    update_user_score(msg.author.id, msg.author.name, story_post=True); await check_and_grant_achievements(msg.author, msg.channel); await msg.add_reaction('✅')
+    game.add(sentence, msg.author.id)
+    update_user_score(guild_of(msg.channel), msg.author.id, msg.author.name, story_post=True); await asyncio.gather(msg.add_reaction('✅'), check_and_grant_achievements(msg.author, msg.channel))
 
 async def handle_taboo_message(msg, game):
-    content_upper = msg.content.upper()
-    if msg.author.id == game.get('describing_player_id'):
-        forbidden = game.get('taboo_words',[]) + [game.get('keyword')]
-        if any(w in re.findall(r'\b\w+\b', content_upper) for w in forbidden):
-            used = next((w for w in forbidden if w in re.findall(r'\b\w+\b', content_upper)), ""); await msg.reply(f"🚨 Użyłeś słowa **{used}**! Koniec.")
-            await post_log("FAIL", "Tabu (Przegrana)", {"Powód": "Zakazane słowo", "Hasło": game.get('keyword'), "Opisujący": f"<@{game.get('describing_player_id')}>"}, msg); del channel_wide_games[msg.channel.id]
-    else:
-        if game.get('keyword') in re.findall(r'\b\w+\b', content_upper):
-            guesser, describer = msg.author, await bot.fetch_user(game.get('describing_player_id')); await msg.reply(f"🎉 Tak! {guesser.mention} odgadł: **{game['keyword']}**! (+15 pkt!)")
-            update_user_score(guesser.id, guesser.name, points=15); await check_and_grant_achievements(guesser, msg.channel, taboo_win=True)
-            update_user_score(describer.id, describer.name, points=15); await check_and_grant_achievements(describer, msg.channel, taboo_win=True)
-            await post_log("SUCCESS", "Tabu (Wygrana)", {"Hasło": game.get('keyword'), "Zgadujący": f"{guesser.mention}", "Opisujący": f"{describer.mention}"}, msg); del channel_wide_games[msg.channel.id]
+    describer = msg.author.id == game.describing_player_id; hit = game.card.match(msg.content, describer)
+    if describer:
+        if used := hit:
+            outbox.reply(msg, f"🚨 Użyłeś słowa **{used}**! Koniec.")
+            post_log("FAIL", "Tabu (Przegrana)", {"Powód": "Zakazane słowo", "Hasło": game.keyword, "Opisujący": f"<@{game.describing_player_id}>"}, msg); del channel_wide_games[msg.channel.id]
+    elif hit:
+        del channel_wide_games[msg.channel.id]; guesser, turn = msg.author, Turn(f"🎉 Tak! {msg.author.mention} odgadł: **{game.keyword}**! (+15 pkt!)")
+        describer = (msg.guild and msg.guild.get_member(game.describing_player_id)) or await bot.fetch_user(game.describing_player_id)  # członek serwera z cache, bez zapytania REST
+        update_user_score(guild_of(msg.channel), guesser.id, guesser.name, points=15); update_user_score(guild_of(msg.channel), describer.id, describer.name, points=15)
+        await asyncio.gather(check_and_grant_achievements(guesser, msg.channel, turn, taboo_win=True), check_and_grant_achievements(describer, msg.channel, turn, taboo_win=True))
+        outbox.reply(msg, turn.text)
+        post_log("SUCCESS", "Tabu (Wygrana)", {"Hasło": game.keyword, "Zgadujący": f"{guesser.mention}", "Opisujący": f"{describer.mention}"}, msg)
+
+PLAYER_HANDLERS = {Wordle: handle_wordle_guess, Hangman: handle_hangman_guess, Quiz: handle_quiz_answer, TwentyQuestions: handle_20q_question}
+CHANNEL_HANDLERS = {Associations: handle_association, Story: handle_story_addition, Taboo: handle_taboo_message}
+
+async def restore_games():
+    restored, now = await games.restore(), time.time()
+    for scope, key, game in restored:
+        if isinstance(game, TwoTruths):
+            if now - game.started >= TRUTH_LIE_TIMEOUT or game.message_id is None: del player_games[key]; continue
+            bot.add_view(TruthLieView(game.lie_index, key), message_id=game.message_id)
+        on_game_change(scope, key, game)
+    print(f"Przywrócono {games.stats['restored']} gier w {games.stats['restore_seconds'] * 1000:.0f} ms.")
+
+# --- START ---
+startup_times = {}
+
+async def timed_step(name, coro):
+    start = time.perf_counter()
+    try: return await coro
+    finally: startup_times[name] = time.perf_counter() - start; STARTUP_SECONDS.set(startup_times[name], name)
+
+def commands_hash():
+    payload = [cmd.to_dict(bot.tree) for cmd in sorted(bot.tree.get_commands(), key=lambda c: c.name)]
+    return hashlib.sha256(json.dumps([bot.application_id, payload], sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+async def sync_commands():
+    # globalna synchronizacja to limitowane wywołanie REST - robimy ją tylko, gdy definicje komend się zmieniły
+    if COMMAND_SYNC == 'never' or not shards.owns(0): return  # przy kilku workerach synchronizuje tylko właściciel shardu 0
+    try:
+        digest = commands_hash()
+        if COMMAND_SYNC != 'always' and await db.fetchval("SELECT value FROM settings WHERE key = 'commands_hash'") == digest: print("Komendy bez zmian, pomijam synchronizację."); return
+        synced = await bot.tree.sync(); print(f"Zsynchronizowano {len(synced)} komend.")
+        await db.execute("INSERT INTO settings (key, value) VALUES ('commands_hash', %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (digest,))
+    except Exception as e: print(f"Błąd synchronizacji: {e}")
+
+def start_background_tasks():
+    # każde start() nic nie robi, gdy zadanie już działa, więc on_ready po ponownym połączeniu niczego nie dubluje
+    scores.start(); content.start(); quiz_bank.start(); idle.start(); logs.start(); recent_words.start(); near_dups.start(); games.start()
+    if SETTINGS_LISTEN and not settings.listening: settings.listen(DATABASE_URL)
 
 @bot.event
 async def on_ready():
-    print(f'Zalogowano jako {bot.user}'); setup_database(); check_idle_games.start()
-    try: synced = await bot.tree.sync(); print(f"Zsynchronizowano {len(synced)} komend.")
-    except Exception as e: print(f"Błąd synchronizacji: {e}")
+    start_background_tasks()
+    if 'gateway' in startup_times: print(f'Ponownie połączono jako {bot.user}'); return
+    now = time.perf_counter(); startup_times['gateway'] = now - bot.setup_finished; STARTUP_SECONDS.set(startup_times['gateway'], 'gateway'); STARTUP_SECONDS.set(now - STARTED_AT, 'total')
+    breakdown = " | ".join(f"{name} {seconds:.2f} s" for name, seconds in startup_times.items())
+    where = f" (worker {WORKER_ID}, shardy {shards})" if SHARD_COUNT else ""
+    print(f'Zalogowano jako {bot.user}{where}. Gotowy po {now - STARTED_AT:.2f} s: {breakdown}')
+    post_log("INFO", "Bot uruchomiony", description=f"Gotowy po {now - STARTED_AT:.2f} s{where}", fields={name: f"{seconds:.2f} s" for name, seconds in startup_times.items()})
 
 @bot.event
 async def on_message(message):
+    with HANDLER_SECONDS.time('on_message'): await route_message(message)
+
+async def route_message(message):
     if message.author.bot or message.content.startswith('/'): return
-    app_info = await bot.application_info()
-    maintenance = get_setting('maintenance_mode')
-    if maintenance and maintenance['value'] == 'true' and message.author.id != app_info.owner.id: return
-    allowed = get_allowed_channels()
-    if allowed and message.channel.id not in allowed: return
     key = (message.channel.id, message.author.id)
-    if key in player_games:
-        game = player_games[key]; handlers = {'wordle': handle_wordle_guess, 'hangman': handle_hangman_guess, 'quiz': handle_quiz_answer, '20_questions': handle_20q_question}
-        if game.get('game_type') in handlers: await handlers[game['game_type']](message, game, key); return
-    if message.channel.id in channel_wide_games:
-        game = channel_wide_games[message.channel.id]; handlers = {'associations': handle_association, 'story': handle_story_addition, 'taboo': handle_taboo_message}
-        if game.get('game_type') in handlers: await handlers[game.get('game_type')](message, game)
+    if key not in player_games and message.channel.id not in channel_wide_games: return
+    guild_id = guild_of(message.channel)
+    if guilds.get(guild_id) is None: await guilds.ensure(guild_id)
+    if settings.blocks(message.author.id, guild_id, message.channel.id): return
+    if (game := player_games.get(key)) is not None and (handler := PLAYER_HANDLERS.get(type(game))):
+        with HANDLER_SECONDS.time(handler.__name__): await handler(message, game, key)
+        player_games.touch(key); return
+    if (game := channel_wide_games.get(message.channel.id)) is not None and (handler := CHANNEL_HANDLERS.get(type(game))):
+        with HANDLER_SECONDS.time(handler.__name__): await handler(message, game)
+        channel_wide_games.touch(message.channel.id)
+
+@bot.event
+async def on_app_command_completion(i: discord.Interaction, command):
+    COMMAND_SECONDS.observe((discord.utils.utcnow() - i.created_at).total_seconds(), command.name, 'ok')
 
 @bot.tree.error
 async def on_app_command_error(i: discord.Interaction, error: app_commands.AppCommandError):
     err = error.original if hasattr(error, 'original') else error
-    await post_log("ERROR", f"Błąd w komendzie: /{i.command.name if i.command else 'Nieznana'}", description=f"```python\n{type(err).__name__}: {err}\n```", ctx=i)
+    COMMAND_SECONDS.observe((discord.utils.utcnow() - i.created_at).total_seconds(), i.command.name if i.command else 'unknown', 'error')
+    post_log("ERROR", f"Błąd w komendzie: /{i.command.name if i.command else 'Nieznana'}", description=f"```python\n{type(err).__name__}: {err}\n```", ctx=i)
     try:
         if not i.response.is_done(): await i.response.send_message("Ups! Coś poszło nie tak.", ephemeral=True)
         else: await i.followup.send("Ups! Coś poszło nie tak.", ephemeral=True)
     except discord.errors.InteractionResponded:
         await i.followup.send("Ups! Wystąpił błąd krytyczny.", ephemeral=True)
 
-async def is_bot_owner(i: discord.Interaction) -> bool: app_info = await i.client.application_info(); return i.user.id == app_info.owner.id
+async def is_bot_owner(i: discord.Interaction) -> bool: return i.user.id == settings.owner_id
 def is_admin(): return app_commands.check(lambda i: i.user.guild_permissions.administrator)
 async def check_channel_and_game(i: discord.Interaction, player_game: bool):
-    maintenance = get_setting('maintenance_mode'); app_info = await bot.application_info()
-    if maintenance and maintenance['value'] == 'true' and i.user.id != app_info.owner.id:
+    if settings.maintenance and i.user.id != settings.owner_id:
         await i.response.send_message("🛠️ Bot jest w trybie konserwacji.", ephemeral=True); return False
-    allowed = get_allowed_channels()
-    if allowed and i.channel.id not in allowed:
+    await guilds.ensure(i.guild_id or 0)
+    if (allowed := settings.channels(i.guild_id or 0)) and i.channel.id not in allowed:
         await i.response.send_message("Bota można używać tylko na wyznaczonych kanałach.", ephemeral=True); return False
     if player_game and (i.channel.id, i.user.id) in player_games:
         await i.response.send_message("Masz już grę osobistą. Użyj `/koniec`.", ephemeral=True); return False
     elif not player_game and i.channel.id in channel_wide_games:
-        await i.response.send_message(f"Gra (`{channel_wide_games[i.channel.id].get('game_type')}`) już trwa.", ephemeral=True); return False
+        await i.response.send_message(f"Gra (`{channel_wide_games[i.channel.id].game_type}`) już trwa.", ephemeral=True); return False
     return True
 
 @bot.tree.command(name="info", description="Wyświetla listę gier i komend.")
@@ -402,22 +655,23 @@ async def info(i: discord.Interaction):
 @app_commands.choices(trudność=[app_commands.Choice(name=v.title(), value=v) for v in ["łatwy", "normalny", "trudny"]])
 async def wordle(i: discord.Interaction, długość: app_commands.Range[int, 4, 8] = 5, trudność: str = "normalny"):
     if not await check_channel_and_game(i, True): return
-    await i.response.send_message("🤖 Generuję słowo...", ephemeral=True); word = await generate_word(długość, trudność, exclude_words=recently_used_words)
+    await i.response.send_message("🤖 Generuję słowo...", ephemeral=True); word = await get_word(długość, trudność, i.guild_id or 0)
     if not word: return await i.followup.send("Błąd AI.", ephemeral=True)
-    player_games[(i.channel.id, i.user.id)] = {'game_type': 'wordle', 'word': word, 'attempts': 0, 'max_attempts': 6, 'difficulty': trudność, 'hints_used': 0}
-    await post_log("INFO", "Rozpoczęto: Wordle", fields={"Gracz": i.user.mention, "Parametry": f"Dł: {długość}, Tr: {trudność}", "Słowo": f"||{word}||"}, ctx=i)
+    recent_words.add(i.guild_id or 0, word)
+    player_games[(i.channel.id, i.user.id)] = Wordle(word, trudność)
+    post_log("INFO", "Rozpoczęto: Wordle", fields={"Gracz": i.user.mention, "Parametry": f"Dł: {długość}, Tr: {trudność}", "Słowo": f"||{word}||"}, ctx=i)
     await i.followup.send(f"✅ **Twoja gra w Wordle, {i.user.mention}!** Masz 6 prób.", ephemeral=False)
 
 @bot.tree.command(name="wisielec", description="Rozpocznij osobistą grę w wisielca.")
 @app_commands.choices(trudność=[app_commands.Choice(name=v.title(), value=v) for v in ["łatwy", "normalny", "trudny"]])
 async def hangman(i: discord.Interaction, trudność: str = "normalny"):
     if not await check_channel_and_game(i, True): return
-    await i.response.send_message("🤖 Generuję hasło...", ephemeral=True); word = await generate_word(random.randint(5, 8), trudność, exclude_words=recently_used_words)
+    await i.response.send_message("🤖 Generuję hasło...", ephemeral=True); word = await get_word(random.randint(5, 8), trudność, i.guild_id or 0)
     if not word: return await i.followup.send("Błąd AI.", ephemeral=True)
-    game = {'game_type': 'hangman', 'word': word, 'guessed_letters': [], 'wrong_guesses': 0, 'max_wrong_guesses': 6, 'difficulty': trudność, 'hints_used': 0}
-    player_games[(i.channel.id, i.user.id)] = game
-    await post_log("INFO", "Rozpoczęto: Wisielec", fields={"Gracz": i.user.mention, "Trudność": trudność, "Słowo": f"||{word}||"}, ctx=i)
-    await i.followup.send(f"✅ **Twój Wisielec, {i.user.mention}!**\n" + display_hangman(game))
+    recent_words.add(i.guild_id or 0, word)
+    game = player_games[(i.channel.id, i.user.id)] = Hangman(word, trudność)
+    post_log("INFO", "Rozpoczęto: Wisielec", fields={"Gracz": i.user.mention, "Trudność": trudność, "Słowo": f"||{word}||"}, ctx=i)
+    await i.followup.send(f"✅ **Twój Wisielec, {i.user.mention}!**\n" + game.render())
 
 @bot.tree.command(name="quiz", description="Rozpocznij osobisty quiz.")
 @app_commands.describe(kategoria="Kategoria", trudność="Poziom trudności")
@@ -425,26 +679,26 @@ async def hangman(i: discord.Interaction, trudność: str = "normalny"):
 async def quiz(i: discord.Interaction, kategoria: str, trudność: str = "normalny"):
     if not await check_channel_and_game(i, True): return
     await i.response.send_message(f"🤖 Myślę nad pytaniem...", ephemeral=True)
-    used_hashes = get_recent_question_hashes()
-    data = await generate_quiz_question(kategoria, trudność, exclude_hashes=used_hashes)
+    data = await get_quiz_question(i.user.id, kategoria, trudność)
     if not data: return await i.followup.send("Nie udało się wygenerować pytania.", ephemeral=True)
-    player_games[(i.channel.id, i.user.id)] = {'game_type': 'quiz', 'question_data': data, 'answered': False, 'difficulty': trudność, 'category': kategoria}
+    player_games[(i.channel.id, i.user.id)] = Quiz(data, trudność, kategoria)
     embed = discord.Embed(title=f"🧠 Twój QUIZ: {kategoria.title()}", description=data.get('question'), color=discord.Color.blue())
     for key, value in data.get('answers', {}).items(): embed.add_field(name=f"**{key}**", value=value, inline=False)
-    await post_log("INFO", "Rozpoczęto: Quiz", fields={"Gracz": i.user.mention, "Parametry": f"Kat: {kategoria}, Tr: {trudność}"}, ctx=i)
+    post_log("INFO", "Rozpoczęto: Quiz", fields={"Gracz": i.user.mention, "Parametry": f"Kat: {kategoria}, Tr: {trudność}"}, ctx=i)
     await i.followup.send(f"{i.user.mention}, Twoje pytanie:", embed=embed)
 
 @bot.tree.command(name="dwie_prawdy", description="Zagraj w Dwie Prawdy i Kłamstwo.")
 async def two_truths(i: discord.Interaction):
     if not await check_channel_and_game(i, True): return
     await i.response.send_message("🤖 Myślę nad historiami...", ephemeral=True)
-    data = await generate_from_ai('Stwórz 3 stwierdzenia o sobie (AI): 2 prawdziwe, 1 kłamstwo. JSON: {"statements": ["...", "..."], "lie_index": 1}', is_json=True)
+    data = content.pop('two_truths') or await generate_two_truths()
     if not data: return await i.followup.send("Błąd AI.", ephemeral=True)
-    key = (i.channel.id, i.user.id); player_games[key] = {'game_type': 'two_truths'}
+    key = (i.channel.id, i.user.id); player_games[key] = game = TwoTruths(data['lie_index'])
     desc = f"Zgadnij fałsz!\n\n1. {data['statements'][0]}\n2. {data['statements'][1]}\n3. {data['statements'][2]}"
     embed = discord.Embed(title="🕵️ Dwie Prawdy i Kłamstwo", description=desc, color=discord.Color.purple())
-    await post_log("INFO", "Rozpoczęto: Dwie Prawdy", fields={"Gracz": i.user.mention}, ctx=i)
-    await i.followup.send(f"{i.user.mention}, Twoja gra:", embed=embed, view=TruthLieView(data['lie_index'], key))
+    post_log("INFO", "Rozpoczęto: Dwie Prawdy", fields={"Gracz": i.user.mention}, ctx=i)
+    sent = await i.followup.send(f"{i.user.mention}, Twoja gra:", embed=embed, view=TruthLieView(data['lie_index'], key))
+    game.message_id = sent.id; player_games.touch(key)
 
 @bot.tree.command(name="zgadnij_co", description="Rozpocznij grę w 20 pytań.")
 @app_commands.describe(kategoria="Kategoria obiektu")
@@ -452,106 +706,106 @@ async def twenty_questions(i: discord.Interaction, kategoria: str):
     if not await check_channel_and_game(i, True): return
     await i.response.send_message("🤔 Myślę o czymś...", ephemeral=True); secret = await generate_from_ai(f"Podaj jeden rzeczownik z kategorii '{kategoria}'.")
     if not secret: return await i.followup.send("Błąd AI.", ephemeral=True)
-    player_games[(i.channel.id, i.user.id)] = {'game_type': '20_questions', 'secret_object': secret.upper(), 'questions_asked': 0, 'history': [], 'hints_used': 0}
-    await post_log("INFO", "Rozpoczęto: Zgadnij Co", fields={"Gracz": i.user.mention, "Kategoria": kategoria, "Obiekt": f"||{secret.upper()}||"}, ctx=i)
+    player_games[(i.channel.id, i.user.id)] = TwentyQuestions(secret.upper())
+    post_log("INFO", "Rozpoczęto: Zgadnij Co", fields={"Gracz": i.user.mention, "Kategoria": kategoria, "Obiekt": f"||{secret.upper()}||"}, ctx=i)
     await i.followup.send(f"✅ {i.user.mention}, pomyślałem o czymś! Masz 20 pytań.")
 
 @bot.tree.command(name="skojarzenia", description="Rozpocznij grę w skojarzenia.")
 async def associations(i: discord.Interaction):
     if not await check_channel_and_game(i, False): return
-    await i.response.send_message("🤖 Losuję słowo..."); word = await generate_word(random.randint(4, 7), "normalny")
+    await i.response.send_message("🤖 Losuję słowo..."); word = await get_word(random.randint(4, 7), "normalny", i.guild_id or 0)
     if not word: return await i.edit_original_response(content="Błąd AI.")
-    channel_wide_games[i.channel.id] = {'game_type': 'associations', 'last_word': word, 'last_player_id': bot.user.id, 'last_activity': time.time()}
-    await post_log("INFO", "Rozpoczęto: Skojarzenia", fields={"Rozpoczął": i.user.mention, "Kanał": i.channel.mention}, ctx=i)
+    channel_wide_games[i.channel.id] = Associations(word, bot.user.id)
+    post_log("INFO", "Rozpoczęto: Skojarzenia", fields={"Rozpoczął": i.user.mention, "Kanał": i.channel.mention}, ctx=i)
     await i.edit_original_response(content=f"**Skojarzenia**! Słowo: **{word}**")
 
 @bot.tree.command(name="historia", description="Rozpocznij wspólną historię.")
 async def story(i: discord.Interaction, temat: str):
     if not await check_channel_and_game(i, False): return
-    await i.response.send_message(f"✍️ Myślę nad początkiem..."); sentence = await generate_from_ai(f"Napisz zdanie rozpoczynające historię o: '{temat}'.")
-    if not sentence: return await i.edit_original_response(content="Błąd AI.")
-    channel_wide_games[i.channel.id] = {'game_type': 'story', 'full_story': [sentence], 'last_player_id': bot.user.id, 'last_activity': time.time()}
-    await post_log("INFO", "Rozpoczęto: Historia", fields={"Rozpoczął": i.user.mention, "Temat": temat}, ctx=i)
-    await i.edit_original_response(content=f"**Wspólne pisanie**! Początek:\n> {sentence}")
+    await i.response.send_message(f"✍️ Myślę nad początkiem..."); header, live = "**Wspólne pisanie**! Początek:\n> ", stream_edits(lambda text: i.edit_original_response(content=text))
+    sentence = await generate_from_ai(f"Napisz zdanie rozpoczynające historię o: '{temat}'.", on_text=lambda t: live.update(header + t + STREAM_CURSOR))
+    if not sentence: return await live.finish("Błąd AI.")
+    channel_wide_games[i.channel.id] = Story(sentence, bot.user.id)
+    post_log("INFO", "Rozpoczęto: Historia", fields={"Rozpoczął": i.user.mention, "Temat": temat}, ctx=i)
+    await live.finish(header + sentence)
 
 @bot.tree.command(name="tabu", description="Rozpocznij grę w Tabu.")
 async def taboo(i: discord.Interaction, gracz: discord.Member):
     if not await check_channel_and_game(i, False): return
     if gracz.bot: return await i.response.send_message("Nie możesz wyznaczyć bota!", ephemeral=True)
-    await i.response.send_message(f"🤖 Generuję kartę dla {gracz.mention}..."); card = await generate_from_ai('Stwórz kartę Tabu: słowo kluczowe i 5 zakazanych. JSON: {"keyword": "PSZCZOŁA", "taboo_words": ["MIÓD", "UL"]}', is_json=True)
+    await i.response.send_message(f"🤖 Generuję kartę dla {gracz.mention}..."); card = content.pop('tabu') or await generate_tabu_card()
     if not card: return await i.edit_original_response(content="Błąd AI.")
-    channel_wide_games[i.channel.id] = {'game_type': 'tabu', 'keyword': card['keyword'], 'taboo_words': card['taboo_words'], 'describing_player_id': gracz.id}
+    channel_wide_games[i.channel.id] = Taboo(card['keyword'], card['taboo_words'], gracz.id)
     try:
         embed = discord.Embed(title="🤫 Twoja Karta Tabu", description=f"Opiisz: **{card['keyword']}**.", color=discord.Color.orange())
         embed.add_field(name="Zakazane:", value="- " + "\n- ".join(card['taboo_words'])); await gracz.send(embed=embed)
-        await i.edit_original_response(content=f"✅ Karta wysłana do {gracz.mention}!"); await post_log("INFO", "Rozpoczęto: Tabu", fields={"Opisujący": gracz.mention, "Hasło": f"||{card['keyword']}||"}, ctx=i)
+        await i.edit_original_response(content=f"✅ Karta wysłana do {gracz.mention}!"); post_log("INFO", "Rozpoczęto: Tabu", fields={"Opisujący": gracz.mention, "Hasło": f"||{card['keyword']}||"}, ctx=i)
     except discord.Forbidden: del channel_wide_games[i.channel.id]; await i.edit_original_response(content=f"⚠️ {gracz.mention} ma zablokowane DM-y.")
 
 @bot.tree.command(name="scenariusz", description="Generuje kreatywny scenariusz.")
 async def scenario(i: discord.Interaction):
-    await i.response.send_message("🤔 Tworzę scenariusz..."); text = await generate_from_ai('Stwórz kreatywny scenariusz "Co byś zrobił, gdyby...".')
-    await i.edit_original_response(content=f"**Co byś zrobił, gdyby...**\n> {text or 'Błąd AI'}")
-
-@bot.tree.command(name="ranking", description="Wyświetla top 10 graczy.")
-async def ranking(i: discord.Interaction):
-    lb = get_leaderboard(); embed = discord.Embed(title="🏆 Ranking Serwera", color=discord.Color.gold())
-    if not lb: embed.description = "Ranking jest pusty!"
-    else: embed.description = "\n".join([f"{idx+1}. {row['user_name']} - {row['score']} pkt" for idx, row in enumerate(lb)])
-    await i.response.send_message(embed=embed)
+    await i.response.send_message("🤔 Tworzę scenariusz..."); header, live = "**Co byś zrobił, gdyby...**\n> ", stream_edits(lambda text: i.edit_original_response(content=text))
+    text = content.pop('scenario') or await generate_scenario(on_text=lambda t: live.update(header + t + STREAM_CURSOR))
+    await live.finish(header + (text or 'Błąd AI'))
+
+@bot.tree.command(name="ranking", description="Wyświetla ranking graczy.")
+@app_commands.describe(strona="Numer strony (po 10 graczy)")
+async def ranking(i: discord.Interaction, strona: app_commands.Range[int, 1, None] = 1):
+    board = await guilds.ensure(i.guild_id or 0); embed, page, pages = ranking_embed(board, strona - 1, i.user.id)
+    await i.response.send_message(embed=embed, view=RankingView(board, i.user.id, page, pages))
     
 @bot.tree.command(name="profil", description="Wyświetla statystyki gracza.")
 async def profile(i: discord.Interaction, użytkownik: discord.Member = None):
-    user = użytkownik or i.user; stats = get_user_stats(user.id)
+    user, guild_id = użytkownik or i.user, i.guild_id or 0; board, stats = await asyncio.gather(guilds.ensure(guild_id), get_user_stats(guild_id, user.id))
     if not stats: return await i.response.send_message(f"{user.name} nie ma statystyk.", ephemeral=True)
     embed = discord.Embed(title=f"📊 Profil: {user.name}", color=discord.Color.teal()).set_thumbnail(url=user.display_avatar.url)
     embed.add_field(name="Punkty", value=stats['score']); embed.add_field(name="Quizy", value=stats['quiz_wins']); embed.add_field(name="Wordle", value=stats['wordle_wins'])
-    if achs := get_user_achievements(user.id): embed.add_field(name="🏆 Osiągnięcia", value="\n".join([f"**{ACHIEVEMENTS[a['achievement_id']]['name']}**" for a in achs]), inline=False)
+    if rank := board.rank(user.id): embed.add_field(name="Ranking", value=f"#{rank} z {len(board)}")
+    if owned := await achievements.granted(guild_id, user.id): embed.add_field(name="🏆 Osiągnięcia", value="\n".join([f"**{data['name']}**" for id, data in ACHIEVEMENTS.items() if id in owned]), inline=False)
     await i.response.send_message(embed=embed)
 
 @bot.tree.command(name="osiagniecia", description="Wyświetla listę osiągnięć.")
 async def achievements_list(i: discord.Interaction):
-    user_achs = [a['achievement_id'] for a in get_user_achievements(i.user.id)]; embed = discord.Embed(title="🏆 Dostępne Osiągnięcia", color=discord.Color.gold())
+    user_achs = await achievements.granted(i.guild_id or 0, i.user.id); embed = discord.Embed(title="🏆 Dostępne Osiągnięcia", color=discord.Color.gold())
     embed.description = "\n".join([f"{'✅' if id in user_achs else '❌'} **{data['name']}**: *{data['description']}*" for id, data in ACHIEVEMENTS.items()])
     await i.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="podpowiedz", description="Daje podpowiedź w twojej grze.")
 async def hint(i: discord.Interaction):
     game = player_games.get((i.channel.id, i.user.id))
-    if not game or game.get('hints_used', 0) > 0: return await i.response.send_message("Nie masz gry do podpowiedzi lub już ją wykorzystałeś.", ephemeral=True)
-    if game['game_type'] == 'hangman':
-        if game['wrong_guesses'] >= game['max_wrong_guesses'] - 1: return await i.response.send_message("Za późno!", ephemeral=True)
-        unrevealed = [l for l in game['word'] if l not in game.get('guessed_letters',[])]
-        if unrevealed: game.setdefault('guessed_letters',[]).append(random.choice(unrevealed)); game['wrong_guesses']+=1; game['hints_used']=1; await i.response.send_message("💡 Odsłaniam literę! (Koszt: 1 błąd)", ephemeral=True); await i.channel.send(display_hangman(game))
-    elif game['game_type'] == '20_questions':
-        game['hints_used']=1; game['questions_asked']+=2; await i.response.defer(ephemeral=True); text = await generate_hint(game['secret_object']); await i.followup.send(f"💡 Podpowiedź (koszt: 2 pytania): **{text or 'Brak'}**")
-    elif game['game_type'] == 'wordle':
-        game['hints_used']=1; game['attempts']+=1
-        green = {game['history'][j][idx] for j in range(len(game.get('history',[]))) for idx in range(len(game['word'])) if game['history'][j][idx] == game['word'][idx]}
-        pool = list(set(game['word']) - green)
+    if not game or getattr(game, 'hints_used', 0) > 0: return await i.response.send_message("Nie masz gry do podpowiedzi lub już ją wykorzystałeś.", ephemeral=True)
+    if isinstance(game, Hangman):
+        if game.wrong_guesses >= game.max_wrong_guesses - 1: return await i.response.send_message("Za późno!", ephemeral=True)
+        if game.reveal_hint(): await i.response.send_message(f"💡 {i.user.mention} odsłania literę! (Koszt: 1 błąd)\n{game.render()}")  # jedna odpowiedź zamiast odpowiedzi i osobnej wiadomości
+    elif isinstance(game, TwentyQuestions):
+        game.hints_used = 1; game.questions_asked += 2; await i.response.defer(ephemeral=True); text = await generate_hint(game.secret_object); await i.followup.send(f"💡 Podpowiedź (koszt: 2 pytania): **{text or 'Brak'}**")
+    elif isinstance(game, Wordle):
+        game.hints_used = 1; game.attempts += 1; pool = game.hint_letters()
         if pool: await i.response.send_message(f"💡 Litera **{random.choice(pool)}** jest w słowie. (Koszt: 1 próba)", ephemeral=True)
         else: await i.response.send_message("Brak liter do podpowiedzenia!", ephemeral=True)
     else: await i.response.send_message("Ta gra nie obsługuje podpowiedzi.", ephemeral=True)
+    player_games.touch((i.channel.id, i.user.id))
 
 @bot.tree.command(name="odgaduje", description="Podaj ostateczną odpowiedź w 'Zgadnij Co'.")
 async def guess(i: discord.Interaction, próba: str):
     key, game = (i.channel.id, i.user.id), player_games.get((i.channel.id, i.user.id))
-    if not game or game.get('game_type') != '20_questions': return await i.response.send_message("Tylko w 'Zgadnij Co'.", ephemeral=True)
+    if not isinstance(game, TwentyQuestions): return await i.response.send_message("Tylko w 'Zgadnij Co'.", ephemeral=True)
     points = POINTS['normalny'] + 10
-    if próba.upper() == game['secret_object']:
-        await i.response.send_message(f"🎉 Niesamowite! Odpowiedź to **{game['secret_object']}**! (+{points} pkt)")
-        update_user_score(i.user.id, i.user.name, points=points); await check_and_grant_achievements(i.user, i.channel, **{'20q_win': True, 'questions_asked': game['questions_asked']})
-        await post_log("SUCCESS", "Zgadnij Co (Wygrana)", fields={"Obiekt": game['secret_object'], "Pytania": game['questions_asked'], "Punkty": points}, ctx=i); del player_games[key]
+    if game.is_correct(próba):
+        turn = Turn(f"🎉 Niesamowite! Odpowiedź to **{game.secret_object}**! (+{points} pkt)"); update_user_score(i.guild_id or 0, i.user.id, i.user.name, points=points)
+        await check_and_grant_achievements(i.user, i.channel, turn, **{'20q_win': True, 'questions_asked': game.questions_asked}); await i.response.send_message(turn.text)
+        post_log("SUCCESS", "Zgadnij Co (Wygrana)", fields={"Obiekt": game.secret_object, "Pytania": game.questions_asked, "Punkty": points}, ctx=i); del player_games[key]
     else:
-        game['questions_asked']+=1; await i.response.send_message(f"❌ Niestety, to nie **{próba.upper()}**. (Pytanie {game['questions_asked']}/20)"); await post_log("INFO", "Zgadnij Co (Zła próba)", fields={"Próba": próba}, ctx=i)
+        game.questions_asked += 1; player_games.touch(key); await i.response.send_message(f"❌ Niestety, to nie **{próba.upper()}**. (Pytanie {game.questions_asked}/{game.MAX_QUESTIONS})"); post_log("INFO", "Zgadnij Co (Zła próba)", fields={"Próba": próba}, ctx=i)
 
 @bot.tree.command(name="koniec", description="Zakończ swoją grę osobistą.")
 async def stop_my_game(i: discord.Interaction):
     game = player_games.pop((i.channel.id, i.user.id), None)
     if game:
-        msg = f"Twoja gra (`{game.get('game_type')}`) została zakończona."
-        if 'word' in game: msg += f" Słowo: **{game['word']}**."
+        msg = f"Twoja gra (`{game.game_type}`) została zakończona."
+        if word := getattr(game, 'word', None): msg += f" Słowo: **{word}**."
         await i.response.send_message(msg, ephemeral=True)
-        await post_log("INFO", f"Gra Zakończona Ręcznie", description=f"{i.user.mention} zakończył swoją grę.", fields={"Gra": game.get('game_type')}, ctx=i)
+        post_log("INFO", f"Gra Zakończona Ręcznie", description=f"{i.user.mention} zakończył swoją grę.", fields={"Gra": game.game_type}, ctx=i)
     else: await i.response.send_message("Nie masz aktywnej gry.", ephemeral=True)
 
 @bot.tree.command(name="koniec_kanal", description="[Admin] Zakończ grę grupową.")
@@ -559,70 +813,87 @@ async def stop_my_game(i: discord.Interaction):
 async def stop_channel_game(i: discord.Interaction):
     game = channel_wide_games.pop(i.channel.id, None)
     if game:
-        await i.response.send_message(f"Gra (`{game.get('game_type')}`) zakończona.")
-        await post_log("WARNING", f"Gra Zakończona przez Admina", description=f"{i.user.mention} zakończył grę.", fields={"Gra": game.get('game_type')}, ctx=i)
+        await i.response.send_message(f"Gra (`{game.game_type}`) zakończona.")
+        post_log("WARNING", f"Gra Zakończona przez Admina", description=f"{i.user.mention} zakończył grę.", fields={"Gra": game.game_type}, ctx=i)
     else: await i.response.send_message("Brak gry grupowej.", ephemeral=True)
 
 @bot.tree.command(name="historia_koniec", description="Zakończ i wyświetl historię.")
 async def story_end(i: discord.Interaction):
     game = channel_wide_games.pop(i.channel.id, None)
-    if game and game.get('game_type') == 'story':
-        embed = discord.Embed(title="Oto Wasza Historia!", description=" ".join(game['full_story']), color=discord.Color.green())
+    if isinstance(game, Story):
+        embed = discord.Embed(title="Oto Wasza Historia!", description=game.text, color=discord.Color.green())
         await i.response.send_message(embed=embed)
-        await post_log("INFO", "Zakończono: Historia", description=f"Zakończona przez {i.user.mention}.", ctx=i)
+        post_log("INFO", "Zakończono: Historia", description=f"Zakończona przez {i.user.mention}.", ctx=i)
     else: await i.response.send_message("Nie jest tworzona żadna historia.", ephemeral=True)
 
 @bot.tree.command(name="ustaw_kanal", description="[Admin] Dodaje ten kanał do dozwolonych.")
 @is_admin()
 async def set_channel(i: discord.Interaction):
-    channels = get_allowed_channels(); channels.append(i.channel.id); set_allowed_channels(channels)
+    await guilds.ensure(i.guild_id or 0); await settings.add_channel(i.guild_id or 0, i.channel.id)
     await i.response.send_message(f"✅ Kanał {i.channel.mention} dodany.", ephemeral=True)
         
 @bot.tree.command(name="usun_kanal", description="[Admin] Usuwa ten kanał z dozwolonych.")
 @is_admin()
 async def remove_channel(i: discord.Interaction):
-    channels = get_allowed_channels()
-    if i.channel.id in channels: channels.remove(i.channel.id); set_allowed_channels(channels); await i.response.send_message(f"✅ Kanał {i.channel.mention} usunięty.", ephemeral=True)
+    await guilds.ensure(i.guild_id or 0)
+    if i.channel.id in settings.channels(i.guild_id or 0): await settings.remove_channel(i.guild_id or 0, i.channel.id); await i.response.send_message(f"✅ Kanał {i.channel.mention} usunięty.", ephemeral=True)
     else: await i.response.send_message("Tego kanału nie ma na liście.", ephemeral=True)
         
-@bot.tree.command(name="db_reset_ranking", description="[Właściciel] Resetuje ranking.")
+@bot.tree.command(name="db_reset_ranking", description="[Właściciel] Resetuje ranking tego serwera.")
 @app_commands.check(is_bot_owner)
 async def db_reset_ranking(i: discord.Interaction):
-    view = ConfirmResetView(i.user.id); await i.response.send_message(embed=discord.Embed(title="🚨 Potwierdzenie", description="Czy na pewno chcesz usunąć WSZYSTKIE punkty i osiągnięcia?", color=discord.Color.red()), view=view, ephemeral=True)
+    view = ConfirmResetView(i.user.id); await i.response.send_message(embed=discord.Embed(title="🚨 Potwierdzenie", description="Czy na pewno chcesz usunąć WSZYSTKIE punkty i osiągnięcia na tym serwerze?", color=discord.Color.red()), view=view, ephemeral=True)
     await view.wait()
     if view.confirmed:
         try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cur: cur.execute("DELETE FROM users"); cur.execute("DELETE FROM achievements"); conn.commit()
+            guild_id = i.guild_id or 0; scores.discard(guild_id); achievements.reset(guild_id)
+            await db.run(lambda cur: (cur.execute("DELETE FROM users WHERE guild_id = %s", (guild_id,)), cur.execute("DELETE FROM achievements WHERE guild_id = %s", (guild_id,)))); guilds.drop(guild_id)
             await i.edit_original_response(embed=discord.Embed(title="✔️ Reset Zakończony", color=discord.Color.green()), view=None)
-            await post_log("WARNING", "Zresetowano Ranking", description=f"Ranking zresetowany przez {i.user.mention}.", ctx=i); await i.channel.send("📢 Ranking został zresetowany!")
+            post_log("WARNING", "Zresetowano Ranking", description=f"Ranking zresetowany przez {i.user.mention}.", ctx=i); await i.channel.send("📢 Ranking został zresetowany!")
         except Exception as e:
             await i.edit_original_response(embed=discord.Embed(title="❌ Błąd", description=f"`{e}`", color=discord.Color.dark_red()), view=None)
-            await post_log("ERROR", "Błąd przy resecie bazy danych", description=f"```\n{e}\n```", ctx=i)
+            post_log("ERROR", "Błąd przy resecie bazy danych", description=f"```\n{e}\n```", ctx=i)
 
 @db_reset_ranking.error
 async def on_db_reset_error(i, error):
     if isinstance(error, app_commands.CheckFailure): await i.response.send_message("⛔ Tylko dla właściciela.", ephemeral=True)
     else: await i.response.send_message(f"Błąd: {error}", ephemeral=True)
     
+@bot.tree.command(name="status_ai", description="[Właściciel] Stan kolejki zapytań AI.")
+@app_commands.check(is_bot_owner)
+async def ai_status(i: discord.Interaction):
+    st = ai.stats(); embed = discord.Embed(title="🤖 Kolejka AI", color=discord.Color.blurple())
+    embed.add_field(name="Kolejka", value="\n".join(f"{k}: {v}" for k, v in st['queue_depth'].items()))
+    embed.add_field(name="Średnie czekanie", value="\n".join(f"{k}: {v:.2f}s" for k, v in st['avg_wait_s'].items()))
+    embed.add_field(name="Bezpiecznik", value=f"{st['circuit']} (W toku: {st['in_flight']}, tokeny: {st['tokens']})")
+    if ps := prompts.summary(): embed.add_field(name="Prompty", value="\n".join(f"{k}: {v['calls']}×, śr. {v['avg_tokens']:.0f} tok. (maks. {v['max_tokens']}), {v['avg_s']:.2f}s (maks. {v['max_s']:.2f}s)" for k, v in ps.items()), inline=False)
+    vs = verdicts.stats; embed.add_field(name="Cache skojarzeń", value=f"Trafienia: {verdicts.hit_rate():.0%} (L1 {vs['l1_hits']}, L2 {vs['l2_hits']}, wspólne {vs['coalesced']}, chybienia {vs['misses']}, podpowiedzi {vs['suggestions']})", inline=False)
+    qs, ns = quiz_bank.stats, near_dups.stats; embed.add_field(name="Powtórki treści", value=f"Pytania: identyczne {qs['duplicates']}, podobne {qs['near_duplicates']}\nPodpisy: przyjęte {ns['admitted']}, odrzucone {ns['rejected']}, wczytane {ns['loaded']}, uzupełnione {ns['backfilled']}", inline=False)
+    embed.add_field(name="Liczniki", value=f"Wysłane: {st['submitted']}, OK: {st['completed']}, Błędy: {st['failed']}, Ponowienia: {st['retries']}\nOdrzucone: kolejka {st['rejected_queue']}, bezpiecznik {st['rejected_circuit']}, maks. czekanie {st['max_wait_s']:.2f}s", inline=False)
+    await i.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="maintenance", description="[Właściciel] Tryb konserwacji.")
 @app_commands.describe(status="Włącz lub wyłącz", powód="Opcjonalny powód przerwy")
 @app_commands.choices(status=[app_commands.Choice(name="ON", value="true"), app_commands.Choice(name="OFF", value="false")])
 @app_commands.check(is_bot_owner)
 async def maintenance_mode(i: discord.Interaction, status: str, powód: str = "Trwają prace nad botem."):
-    is_on = (status == 'true'); set_setting('maintenance_mode', status)
+    is_on = (status == 'true'); await settings.set_maintenance(is_on)
     await i.response.send_message(f"🔧 Tryb konserwacji **{'WŁĄCZONY' if is_on else 'WYŁĄCZONY'}**.", ephemeral=True)
-    await post_log("WARNING", "Zmieniono Tryb Konserwacji", description=f"Tryb konserwacji: **{'WŁĄCZONY' if is_on else 'WYŁĄCZONY'}**.", ctx=i)
+    post_log("WARNING", "Zmieniono Tryb Konserwacji", description=f"Tryb konserwacji: **{'WŁĄCZONY' if is_on else 'WYŁĄCZONY'}**.", ctx=i)
     await set_channels_lock(lock_status=is_on, guild=i.guild, interaction=i)
     
     embed = discord.Embed(title="🛠️ Przerwa Techniczna" if is_on else "✅ Koniec Przerwy", color=discord.Color.orange() if is_on else discord.Color.green())
     if is_on: embed.description = f"**Powód:** {powód}\n\nPisanie i gra na kanałach bota są tymczasowo **zablokowane**."
     else: embed.description = "Wszystkie funkcje zostały **przywrócone**. Miłej zabawy!"
         
-    for cid in get_allowed_channels() or [i.channel.id]:
-        if ch := bot.get_channel(cid):
-            try: await ch.send(embed=embed)
-            except discord.Forbidden: pass
+    async def announce(ch):
+        try: await ch.send(embed=embed)
+        except discord.Forbidden: pass
+    await asyncio.gather(*(announce(ch) for cid in settings.channels(i.guild_id) or [i.channel.id] if (ch := bot.get_channel(cid))))
         
 # --- URUCHOMIENIE BOTA ---
-bot.run(DISCORD_TOKEN)
+if __name__ == '__main__':
+    if not all([DISCORD_TOKEN, GOOGLE_API_KEY, DATABASE_URL]):
+        print("BŁĄD: Brak kluczowych zmiennych środowiskowych.")
+        exit()
+    bot.run(DISCORD_TOKEN)
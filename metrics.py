@@ -0,0 +1,135 @@
+# Metryki w formacie tekstowym Prometheusa, serwowane lokalnie pod /metrics (bez zewnętrznych zależności).
+import asyncio
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value): return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames, self.values = name, help, tuple(labelnames), {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {value:g}" for key, value in self.values.items()]
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *labels): self.values[labels] = self.values.get(labels, 0) + amount
+    def set(self, value, *labels): self.values[labels] = value  # dla liczników prowadzonych gdzie indziej (np. db.stats)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, *labels): self.values[labels] = value
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels): self.histogram, self.labels = histogram, labels
+    def __enter__(self): self.start = time.perf_counter(); return self
+    def __exit__(self, *exc): self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames); self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        entry = self.values.get(labels)
+        if entry is None: entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1; entry[1] += value; entry[2] += 1
+
+    def time(self, *labels): return _Timer(self, labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n; le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:g}"); lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self): self.metrics, self.collectors = [], []
+
+    def _add(self, metric): self.metrics.append(metric); return metric
+    def counter(self, name, help, labelnames=()): return self._add(Counter(name, help, labelnames))
+    def gauge(self, name, help, labelnames=()): return self._add(Gauge(name, help, labelnames))
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS): return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, fn):
+        """fn() jest wołane przed każdym odczytem /metrics (do ustawiania wartości chwilowych)."""
+        self.collectors.append(fn); return fn
+
+    def render(self):
+        for fn in self.collectors:
+            try: fn()
+            except Exception as e: print(f"Błąd zbierania metryk ({getattr(fn, '__name__', fn)}): {e}")
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+class MetricsServer:
+    """Minimalny serwer HTTP: GET /metrics zwraca registry.render(), reszta 404."""
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        self.registry, self.host, self.port, self.server = registry, host, port, None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while (line := await asyncio.wait_for(reader.readline(), 5)) not in (b'\r\n', b'\n', b''): pass
+            parts = request.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body, ctype = '200 OK', self.registry.render().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+            else: status, body, ctype = '404 Not Found', b'not found\n', 'text/plain'
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError): pass
+        finally: writer.close()
+
+    async def start(self):
+        if self.server is None: self.server = await asyncio.start_server(self._handle, self.host, self.port); print(f"Metryki: http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.server is not None: self.server.close(); await self.server.wait_closed(); self.server = None
+
+
+class LoopLagMonitor:
+    """Mierzy opóźnienie pętli zdarzeń: o ile później niż planowano budzi się sleep(interval)."""
+
+    def __init__(self, gauge, histogram, interval=0.5):
+        self.gauge, self.histogram, self.interval, self._task = gauge, histogram, interval, None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time(); await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval); self.gauge.set(lag); self.histogram.observe(lag)
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
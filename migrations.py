@@ -0,0 +1,106 @@
+# Wersjonowane migracje schematu. Każda wykonuje się raz, w jednej transakcji razem z wpisem w schema_version.
+# Nowe zmiany schematu dopisujemy na końcu MIGRATIONS z kolejnym numerem; starych wpisów nie edytujemy.
+# Instrukcje dostają parametry jak w psycopg2 (%(nazwa)s), więc dosłowny znak procentu zapisujemy jako %%.
+LOCK_ID = 0x7A616261  # pg_advisory_xact_lock: równolegle startujące instancje migrują po kolei
+DEFAULT_PARAMS = {'legacy_guild_id': None}  # serwer, do którego trafiają dane sprzed podziału na serwery
+# parametry, bez których migracja nie może ruszyć istniejących danych: wersja -> (parametr, zapytanie "czy są dane do przeniesienia")
+REQUIRED_PARAMS = {
+    7: ('legacy_guild_id', "SELECT EXISTS (SELECT 1 FROM users) OR EXISTS (SELECT 1 FROM achievements) OR EXISTS (SELECT 1 FROM settings WHERE key = 'allowed_channels')"),
+}
+# dawny układ: "schemat bazowy" (1) zawierał tabele dzisiejszych migracji 1-6, a kolejne miały numery 2-6
+LEGACY_BASELINE, LEGACY_MERGED, LEGACY_SHIFT = "schemat bazowy", range(1, 7), 5
+
+
+class MigrationError(Exception): pass
+
+MIGRATIONS = [
+    (1, "tabele sprzed migracji: users, achievements, settings", [
+        "CREATE TABLE IF NOT EXISTS users (user_id BIGINT PRIMARY KEY, user_name TEXT, score INT DEFAULT 0, quiz_wins INT DEFAULT 0, wordle_wins INT DEFAULT 0, story_posts INT DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS achievements (user_id BIGINT, achievement_id TEXT, PRIMARY KEY (user_id, achievement_id))",
+        "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)",
+        "INSERT INTO settings (key, value) VALUES ('maintenance_mode', 'false') ON CONFLICT (key) DO NOTHING",
+    ]),
+    (2, "pule gotowej treści (content_pool)", [
+        "CREATE TABLE IF NOT EXISTS content_pool (id BIGSERIAL PRIMARY KEY, kind TEXT NOT NULL, bucket TEXT NOT NULL DEFAULT '', payload TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS content_pool_kind_bucket ON content_pool (kind, bucket, id)",
+    ]),
+    (3, "bank pytań quizowych i pytania widziane przez graczy", [
+        "CREATE TABLE IF NOT EXISTS quiz_bank (digest TEXT PRIMARY KEY, category TEXT NOT NULL, difficulty TEXT NOT NULL, question TEXT NOT NULL, answers TEXT NOT NULL, correct_answer TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS quiz_bank_category_difficulty ON quiz_bank (category, difficulty, digest)",
+        "CREATE TABLE IF NOT EXISTS quiz_seen (user_id BIGINT, digest TEXT, PRIMARY KEY (user_id, digest))",
+    ]),
+    (4, "werdykty skojarzeń (association_verdicts)", [
+        "CREATE TABLE IF NOT EXISTS association_verdicts (last_word TEXT, new_word TEXT, verdict BOOLEAN NOT NULL, created_at TIMESTAMPTZ NOT NULL DEFAULT now(), PRIMARY KEY (last_word, new_word))",
+    ]),
+    (5, "stan trwających gier (game_state)", [
+        "CREATE TABLE IF NOT EXISTS game_state (scope CHAR(1), channel_id BIGINT, user_id BIGINT, state BYTEA NOT NULL, updated_at TIMESTAMPTZ NOT NULL DEFAULT now(), PRIMARY KEY (scope, channel_id, user_id))",
+    ]),
+    (6, "indeks rankingu users_score", [
+        "CREATE INDEX IF NOT EXISTS users_score ON users (score DESC, user_id)",
+    ]),
+    (7, "dane per serwer: klucze (guild_id, user_id), tabela allowed_channels", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS guild_id BIGINT NOT NULL DEFAULT 0",
+        "UPDATE users SET guild_id = %(legacy_guild_id)s",
+        "ALTER TABLE users ALTER COLUMN guild_id DROP DEFAULT, DROP CONSTRAINT IF EXISTS users_pkey, ADD PRIMARY KEY (guild_id, user_id)",
+        "DROP INDEX IF EXISTS users_score",
+        "CREATE INDEX IF NOT EXISTS users_guild_score ON users (guild_id, score DESC, user_id)",
+        "ALTER TABLE achievements ADD COLUMN IF NOT EXISTS guild_id BIGINT NOT NULL DEFAULT 0",
+        "UPDATE achievements SET guild_id = %(legacy_guild_id)s",
+        "ALTER TABLE achievements ALTER COLUMN guild_id DROP DEFAULT, DROP CONSTRAINT IF EXISTS achievements_pkey, ADD PRIMARY KEY (guild_id, user_id, achievement_id)",
+        "CREATE TABLE IF NOT EXISTS allowed_channels (guild_id BIGINT, channel_id BIGINT, PRIMARY KEY (guild_id, channel_id))",
+        "INSERT INTO allowed_channels (guild_id, channel_id) SELECT %(legacy_guild_id)s, json_array_elements_text(value::json)::bigint FROM settings WHERE key = 'allowed_channels' ON CONFLICT DO NOTHING",
+        "DELETE FROM settings WHERE key = 'allowed_channels'",
+    ]),
+    (8, "ostatnio użyte słowa per serwer: used_words i filtry Blooma", [
+        "CREATE TABLE IF NOT EXISTS used_words (guild_id BIGINT, word TEXT, used_at TIMESTAMPTZ NOT NULL, PRIMARY KEY (guild_id, word))",
+        "CREATE INDEX IF NOT EXISTS used_words_guild_used_at ON used_words (guild_id, used_at)",
+        "CREATE TABLE IF NOT EXISTS word_filters (guild_id BIGINT PRIMARY KEY, current BYTEA NOT NULL, current_count INT NOT NULL, previous BYTEA, previous_count INT NOT NULL DEFAULT 0)",
+    ]),
+    (9, "serwer gry w game_state (odtwarzanie gier według shardów)", [
+        "ALTER TABLE game_state ADD COLUMN IF NOT EXISTS guild_id BIGINT",
+    ]),
+    (10, "podpisy MinHash wygenerowanej treści (odrzucanie przeformułowanych pytań i scenariuszy)", [
+        "CREATE TABLE IF NOT EXISTS content_signatures (kind TEXT, category TEXT, item_key TEXT, signature BYTEA NOT NULL, PRIMARY KEY (kind, category, item_key))",
+    ]),
+    (11, "pule treści per worker (bez wydawania tego samego elementu w dwóch procesach)", [
+        "ALTER TABLE content_pool ADD COLUMN IF NOT EXISTS owner TEXT NOT NULL DEFAULT '0'",
+        "CREATE INDEX IF NOT EXISTS content_pool_owner ON content_pool (owner, id)",
+    ]),
+]
+
+
+def latest_version(migrations=MIGRATIONS): return max(version for version, _, _ in migrations)
+
+
+def renumber_legacy(cur, migrations):
+    """Baza zmigrowana w dawnym układzie: przesuwa późniejsze wpisy o LEGACY_SHIFT i oznacza migracje 1-6 jako wykonane."""
+    cur.execute("SELECT 1 FROM schema_version WHERE version = 1 AND description = %s", (LEGACY_BASELINE,))
+    if not cur.fetchone(): return
+    cur.execute("UPDATE schema_version SET version = version + %s WHERE version > 1", (LEGACY_SHIFT,))
+    cur.execute("DELETE FROM schema_version WHERE version = 1")
+    for version, description, _ in migrations:
+        if version in LEGACY_MERGED: cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)", (version, description))
+
+
+async def migrate(db, migrations=MIGRATIONS, params=None):
+    """Wykonuje brakujące migracje i zwraca ich numery. Gdy schemat jest aktualny, kosztuje dwa proste SELECT-y bez blokad."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    def op(cur):
+        cur.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+        if cur.fetchone()[0]:
+            cur.execute("SELECT coalesce(max(version), 0) FROM schema_version")
+            if cur.fetchone()[0] >= latest_version(migrations): return []
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_ID,))
+        cur.execute("CREATE TABLE IF NOT EXISTS schema_version (version INT PRIMARY KEY, description TEXT NOT NULL, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())")
+        renumber_legacy(cur, migrations)
+        cur.execute("SELECT version FROM schema_version"); done, applied = {row[0] for row in cur.fetchall()}, []
+        for version, description, statements in sorted(migrations, key=lambda m: m[0]):
+            if version in done: continue
+            if (required := REQUIRED_PARAMS.get(version)) and params.get(required[0]) is None:
+                cur.execute(required[1])
+                if cur.fetchone()[0]: raise MigrationError(f"migracja {version} ({description}) przenosi istniejące dane i wymaga parametru {required[0]}")
+                params[required[0]] = 0  # pusta baza: nie ma czego przenosić
+            for sql in statements: cur.execute(sql, params)
+            cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)", (version, description)); applied.append(version)
+        return applied
+    return await db.run(op)
@@ -0,0 +1,135 @@
+# Wykrywanie prawie-duplikatów wygenerowanej treści (pytania quizowe, scenariusze) przez MinHash + LSH.
+# Tekst -> rdzenie słów bez słów funkcyjnych -> podpis MinHash (NUM_PERM minimów) -> pasma w indeksie LSH.
+# Podobieństwo Jaccarda zbiorów rdzeni szacujemy odsetkiem zgodnych pozycji podpisów.
+import asyncio
+import hashlib
+import random
+from array import array
+from bisect import bisect_left, insort
+
+import psycopg2.extras
+
+from polish_text import TOKEN, fold, stem
+
+NUM_PERM, BANDS = 64, 16  # 16 pasm po 4 wiersze: próg krzywej LSH ~(1/16)^(1/4) = 0.5, J = 0.6 trafia w kandydatów w ~90%, J = 0.7 w ~99%
+PRIME, ID_BITS = (1 << 61) - 1, 24  # wpis pasma = (skrót pasma << ID_BITS) | numer elementu; do 16 mln elementów na kategorię
+_rng = random.Random(0x6D696E68)  # stałe ziarno: podpisy zapisane w bazie muszą pasować po restarcie
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(PRIME)) for _ in range(NUM_PERM)]
+STOPWORDS = frozenset(fold(w) for w in """a aby ale albo bo by być co czy czyli do dla gdy gdzie i ile ich im jak jaka jaki jakie jakiego jakim jakiej
+    jako jest je jego jej już kiedy kto która które którego której który którym którzy ma mają może na nad nie o od oraz po pod przez przy
+    się są ta tak te tego tej ten to tu tym w we z za ze że podaj wskaż wymień nazwę nazywa nazywamy
+    byś gdyby zrobił zrobiła zrobiłbyś""".split())  # ostatnie wiersze: stałe zwroty pytań i początek scenariuszy
+UPSERT_SQL = "INSERT INTO content_signatures (kind, category, item_key, signature) VALUES %s ON CONFLICT DO NOTHING"
+
+
+def features(text):
+    """Zbiór rdzeni słów treściowych (po sprowadzeniu do ASCII); "Jaka jest stolica Francji?" -> {STOLIC, FRANCJ}."""
+    words = TOKEN.findall(fold(text))
+    return {stem(w) for w in words if w not in STOPWORDS} or set(words)
+
+
+def content_key(text): return hashlib.sha1(' '.join(sorted(features(text))).encode()).hexdigest()
+
+
+def signature(text):
+    hashes = [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), 'little') for f in features(text)] or [0]
+    return array('I', [min((a * x + b) % PRIME for x in hashes) & 0xFFFFFFFF for a, b in PERMUTATIONS])
+
+
+def similarity(sig, other): return sum(x == y for x, y in zip(sig, other)) / len(sig)
+
+
+class LSHIndex:
+    """Podpisy jednej kategorii i ich pasma w posortowanych tablicach array('Q') (zamiast słowników: ~12 B na wpis pasma)."""
+    __slots__ = ('rows', 'bands', 'signatures', 'keys')
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS):
+        self.rows, self.bands = num_perm // bands, [array('Q') for _ in range(bands)]
+        self.signatures, self.keys = array('I'), []  # podpis elementu n: signatures[n * num_perm:(n + 1) * num_perm]
+
+    def __len__(self): return len(self.keys)
+
+    def _band_hashes(self, sig):
+        raw, width, mask = sig.tobytes(), 4 * self.rows, (1 << (64 - ID_BITS)) - 1  # skróty tylko w pamięci procesu, więc losowy hash() bajtów nie przeszkadza
+        return [hash(raw[i:i + width]) & mask for i in range(0, len(raw), width)]
+
+    def add(self, key, sig):
+        n = len(self.keys); self.keys.append(key); self.signatures.extend(sig)
+        for band, h in zip(self.bands, self._band_hashes(sig)): insort(band, h << ID_BITS | n)
+
+    def extend(self, items):
+        """Wczytanie wielu (klucz, podpis) naraz: jedno sortowanie na pasmo zamiast wstawiania po kolei."""
+        entries = [list(band) for band in self.bands]
+        for key, sig in items:
+            n = len(self.keys); self.keys.append(key); self.signatures.extend(sig)
+            for entry, h in zip(entries, self._band_hashes(sig)): entry.append(h << ID_BITS | n)
+        self.bands = [array('Q', sorted(entry)) for entry in entries]
+
+    def candidates(self, sig):
+        found = set()
+        for band, h in zip(self.bands, self._band_hashes(sig)):
+            i = bisect_left(band, h << ID_BITS)
+            while i < len(band) and band[i] >> ID_BITS == h: found.add(band[i] & ((1 << ID_BITS) - 1)); i += 1
+        return found
+
+    def nearest(self, sig):
+        """(klucz, szacowane podobieństwo) najbliższego kandydata albo None, gdy żadne pasmo się nie zgadza."""
+        width, best = len(sig), None
+        for n in self.candidates(sig):
+            score = similarity(sig, self.signatures[n * width:(n + 1) * width])
+            if best is None or score > best[1]: best = (self.keys[n], score)
+        return best
+
+
+class NearDuplicates:
+    """Prawie-duplikaty per (rodzaj, kategoria): podpisy w tabeli content_signatures, indeks LSH kategorii wczytywany
+    przy jej pierwszym użyciu. admit() odrzuca tekst, którego podobieństwo do już znanego przekracza threshold."""
+
+    def __init__(self, db, threshold=0.6, flush_interval=10.0):
+        self.db, self.threshold, self.flush_interval = db, threshold, flush_interval
+        self.indexes, self._loading, self._rows, self._task = {}, {}, [], None
+        self.stats = {'admitted': 0, 'rejected': 0, 'loaded': 0, 'backfilled': 0}
+
+    async def ensure(self, kind, category='', missing=None):
+        """Indeks kategorii; missing() -> [(klucz, tekst)] dokłada elementy, które nie mają jeszcze podpisów w bazie."""
+        if (index := self.indexes.get((kind, category))) is not None: return index
+        task = self._loading.get((kind, category))
+        if task is None: task = self._loading[(kind, category)] = asyncio.get_running_loop().create_task(self._load(kind, category, missing))
+        return await asyncio.shield(task)
+
+    async def _load(self, kind, category, missing):
+        try:
+            rows = await self.db.fetchall("SELECT item_key, signature FROM content_signatures WHERE kind = %s AND category = %s", (kind, category))
+            items = [(row['item_key'], array('I', bytes(row['signature']))) for row in rows]
+            texts, index = await missing() if missing else [], LSHIndex()
+            def build():
+                backfill = [(key, signature(text)) for key, text in texts]; index.extend(items + backfill); return backfill
+            backfill = await asyncio.to_thread(build)  # ~2.5 s dla 100 tys. podpisów: nie w pętli zdarzeń
+        finally: self._loading.pop((kind, category), None)
+        self._rows += [(kind, category, key, psycopg2.Binary(sig.tobytes())) for key, sig in backfill]
+        self.indexes[(kind, category)] = index; self.stats['loaded'] += len(rows); self.stats['backfilled'] += len(backfill); return index
+
+    async def admit(self, kind, category, text, key=None, missing=None):
+        """Zapamiętuje tekst i zwraca True albo zwraca False, gdy jest zbyt podobny do już znanego."""
+        index, sig = await self.ensure(kind, category, missing), signature(text)
+        if (match := index.nearest(sig)) and match[1] >= self.threshold: self.stats['rejected'] += 1; return False
+        key = key or content_key(text); index.add(key, sig); self._rows.append((kind, category, key, psycopg2.Binary(sig.tobytes())))
+        self.stats['admitted'] += 1; return True
+
+    async def flush(self):
+        if not self._rows: return
+        rows, self._rows = self._rows, []
+        try: await self.db.run(lambda cur: psycopg2.extras.execute_values(cur, UPSERT_SQL, rows, page_size=500))
+        except Exception as e: self._rows[:0] = rows; print(f"Błąd zapisu podpisów treści: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
+        await self.flush()
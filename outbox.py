@@ -0,0 +1,87 @@
+import asyncio
+from collections import deque
+
+PLAIN_KWARGS = frozenset({'reference', 'mention_author'})  # tylko takie wiadomości (sam tekst, ta sama odpowiedź) można sklejać
+
+
+class Turn:
+    """Tekst jednego ruchu gracza zbierany po kawałku (odpowiedź, wynik, osiągnięcia) i wysyłany jedną wiadomością."""
+    __slots__ = ('lines',)
+
+    def __init__(self, *lines): self.lines = [line for line in lines if line]
+
+    def add(self, line):
+        if line: self.lines.append(line)
+
+    def __bool__(self): return bool(self.lines)
+
+    @property
+    def text(self): return "\n".join(self.lines)
+
+
+def split_text(text, max_chars):
+    """Dzieli za długi tekst na części do max_chars znaków, w miarę możliwości na końcach linii."""
+    parts = []
+    while len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars + 1)
+        cut = cut if cut > 0 else max_chars
+        parts.append(text[:cut]); text = text[cut:].lstrip("\n")
+    return parts + [text] if text else parts
+
+
+class ChannelOutbox:
+    """Wiadomości wysyłane kolejką per kanał. Discord limituje wysyłanie jednym kubełkiem na kanał, więc do kanału
+    wysyłamy po kolei, zamiast odbijać się od 429; teksty, które uzbierały się w trakcie trwającej wysyłki, idą razem
+    jedną wiadomością. Różne kanały obsługiwane są równolegle."""
+
+    def __init__(self, max_chars=2000):
+        self.max_chars, self.queues, self._tasks = max_chars, {}, {}  # channel_id -> deque[(kanał, treść, kwargs, future)]
+        self.stats = {'requested': 0, 'sent': 0, 'merged': 0, 'failed': 0}
+
+    def send(self, channel, content=None, **kwargs):
+        """Dodaje wiadomość do kolejki kanału; zwraca future z wysłaną wiadomością (nie trzeba na nią czekać)."""
+        loop, queue = asyncio.get_running_loop(), self.queues.setdefault(channel.id, deque())
+        for part in split_text(content, self.max_chars) if content else [content]:
+            future = self._future(loop); queue.append((channel, part, kwargs, future)); self.stats['requested'] += 1
+        if channel.id not in self._tasks: self._tasks[channel.id] = loop.create_task(self._drain(channel.id))
+        return future
+
+    def reply(self, message, content=None, **kwargs): return self.send(message.channel, content, reference=message, **kwargs)
+
+    async def flush(self):
+        """Czeka, aż wszystkie kolejki zostaną wysłane (przy zamykaniu bota)."""
+        while self._tasks: await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    @staticmethod
+    def _future(loop):
+        future = loop.create_future(); future.add_done_callback(lambda f: f.cancelled() or f.exception())  # błąd nieodebranej wysyłki nie trafia do logu asyncio
+        return future
+
+    def _next_batch(self, queue):
+        channel, content, kwargs, future = queue.popleft(); futures = [future]
+        if content is None or not set(kwargs) <= PLAIN_KWARGS: return channel, content, kwargs, futures
+        reference = kwargs.get('reference')
+        while queue:
+            _, more, extra, future = queue[0]
+            if more is None or not set(extra) <= PLAIN_KWARGS or extra.get('reference') is not reference or extra.get('mention_author') != kwargs.get('mention_author'): break
+            if len(content) + 1 + len(more) > self.max_chars: break
+            queue.popleft(); content += "\n" + more; futures.append(future); self.stats['merged'] += 1
+        return channel, content, kwargs, futures
+
+    async def _drain(self, channel_id):
+        queue = self.queues[channel_id]
+        try:
+            while queue:
+                channel, content, kwargs, futures = self._next_batch(queue)
+                try: message = await channel.send(content, **kwargs)
+                except Exception as e:
+                    self.stats['failed'] += 1; print(f"Błąd wysyłania na kanał {channel_id}: {e}")
+                    for future in futures:
+                        if not future.done(): future.set_exception(e)
+                    continue
+                self.stats['sent'] += 1
+                for future in futures:
+                    if not future.done(): future.set_result(message)
+        finally:
+            self._tasks.pop(channel_id, None)
+            if not queue: self.queues.pop(channel_id, None)
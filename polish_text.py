@@ -0,0 +1,20 @@
+# Wspólna normalizacja polskiego tekstu: sprowadzenie do ASCII i przybliżony rdzeń przez odcięcie końcówki fleksyjnej.
+# Używają jej Tabu (taboo_matcher) i wykrywanie prawie-duplikatów (near_duplicates).
+import re
+
+TOKEN = re.compile(r'\w+')
+FOLD = str.maketrans("ĄĆĘŁŃÓŚŹŻ", "ACELNOSZZ")
+# końcówki po sprowadzeniu do ASCII (Ą -> A, Ę -> E, Ó -> O); od najdłuższych
+SUFFIXES = tuple(sorted({"A", "E", "I", "O", "U", "Y", "AM", "EM", "OM", "IE", "OW", "MI", "EJ", "YM", "IM", "ACH", "AMI", "OWI", "EGO", "EMU",
+                         "YMI", "IMI", "YCH", "ICH", "OWIE", "OWA", "OWE", "OWY", "OWEJ", "OWEGO", "OWYM", "OWYCH"}, key=lambda s: (-len(s), s)))
+MIN_STEM = 2  # krótszych rdzeni nie ucinamy ("UL" -> "ULEM", ale nie "OK" -> "OKO")
+
+
+def fold(text): return text.upper().translate(FOLD)
+
+
+def stem(word):
+    """Rdzeń słowa (już po fold): odcina najdłuższą pasującą końcówkę, zostawiając co najmniej MIN_STEM liter."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM: return word[:-len(suffix)]
+    return word
@@ -0,0 +1,43 @@
+def estimate_tokens(text):
+    """Przybliżona liczba tokenów (ok. 4 znaki na token); wystarcza do pilnowania limitów."""
+    return (len(text) + 3) // 4
+
+
+def clip_tokens(text, max_tokens):
+    """Ucina tekst od początku tak, by zostało najwyżej max_tokens (najnowsza część jest ważniejsza)."""
+    max_chars = max(0, max_tokens * 4)
+    if len(text) <= max_chars: return text
+    return "…" + text[len(text) - max_chars + 1:] if max_chars else ""
+
+
+class PromptBudget:
+    """Limit kontekstu promptu dla typu gry: ostatnie `window` wpisów dosłownie, starsze tylko w zwięzłym streszczeniu."""
+
+    def __init__(self, max_tokens, window, min_window=2):
+        self.max_tokens, self.window, self.min_window = max_tokens, window, min_window
+
+    def overflow(self, entries, summarized):
+        """Wpisy, które wypadły z okna, a nie trafiły jeszcze do streszczenia."""
+        return entries[summarized:max(summarized, len(entries) - self.window)]
+
+    def fit(self, summary, entries, render=str):
+        """(streszczenie, wpisy) mieszczące się w max_tokens: najpierw zwężamy okno do min_window, potem przycinamy streszczenie."""
+        recent = list(entries[-self.window:])
+        cost = lambda: estimate_tokens(summary) + sum(estimate_tokens(render(e)) for e in recent)
+        while len(recent) > self.min_window and cost() > self.max_tokens: recent.pop(0)
+        if cost() > self.max_tokens: summary = clip_tokens(summary, self.max_tokens - sum(estimate_tokens(render(e)) for e in recent))
+        return summary, recent
+
+
+class PromptMeter:
+    """Liczniki tokenów promptu i czasu odpowiedzi per rodzaj zapytania."""
+
+    def __init__(self): self.kinds = {}
+
+    def record(self, kind, prompt_tokens, seconds):
+        st = self.kinds.setdefault(kind, {'calls': 0, 'tokens': 0, 'max_tokens': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+        st['calls'] += 1; st['tokens'] += prompt_tokens; st['max_tokens'] = max(st['max_tokens'], prompt_tokens)
+        st['seconds'] += seconds; st['max_seconds'] = max(st['max_seconds'], seconds)
+
+    def summary(self):
+        return {kind: {'calls': st['calls'], 'avg_tokens': st['tokens'] / st['calls'], 'max_tokens': st['max_tokens'], 'avg_s': st['seconds'] / st['calls'], 'max_s': st['max_seconds']} for kind, st in self.kinds.items()}
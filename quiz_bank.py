@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import re
+import secrets
+import unicodedata
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKD', str(text).lower().replace('ł', 'l'))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def question_digest(question_text):
+    """Stabilny (niezależny od procesu) skrót treści pytania."""
+    return hashlib.sha1(normalize_text(question_text).encode('utf-8')).hexdigest()
+
+
+def normalize_category(category): return ' '.join(str(category).lower().split())
+
+
+def signature_text(q):
+    """Tekst do wykrywania przeformułowanych pytań: z poprawną odpowiedzią, bo "kiedy zaczęła się" i "kiedy skończyła się"
+    II wojna to różne pytania, choć różnią się jednym słowem."""
+    return f"{q['question']} {q['answers'][q['correct_answer']]}"
+
+
+def valid_question(q):
+    return (isinstance(q, dict) and isinstance(q.get('question'), str) and q['question'].strip() and isinstance(q.get('answers'), dict)
+            and set(q['answers']) == {'A', 'B', 'C', 'D'} and q.get('correct_answer') in q['answers'])
+
+
+class QuizBank:
+    """Baza pytań quizowych z deduplikacją po skrócie (i opcjonalnie po podobieństwie, near_dups) oraz śledzeniem, co który gracz już widział."""
+
+    def __init__(self, db, generator=None, min_stock=20, refill_interval=300.0, categories=(), max_tracked=100, near_dups=None):
+        self.db, self.generator, self.min_stock, self.refill_interval, self.max_tracked = db, generator, min_stock, refill_interval, max_tracked
+        self.near_dups = near_dups
+        self.demand = dict.fromkeys((normalize_category(c), d) for c in categories for d in ('łatwy', 'normalny', 'trudny'))  # kolejność = ostatnie użycie
+        self.stats = {'served_from_bank': 0, 'bank_misses': 0, 'added': 0, 'duplicates': 0, 'near_duplicates': 0}
+        self._task, self._wake = None, asyncio.Event()
+
+    async def add(self, category, difficulty, q):
+        """Zapisuje pytanie; zwraca skrót albo None, jeśli takie (albo bardzo podobne) pytanie już było."""
+        digest, category = question_digest(q['question']), normalize_category(category)
+        if self.near_dups and not await self.near_dups.admit('quiz', category, signature_text(q), digest, missing=lambda: self._unindexed(category)):
+            self.stats['near_duplicates'] += 1; return None
+        inserted = await self.db.fetchval(
+            "INSERT INTO quiz_bank (digest, category, difficulty, question, answers, correct_answer) VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (digest) DO NOTHING RETURNING digest",
+            (digest, category, difficulty, q['question'], json.dumps(q['answers'], ensure_ascii=False), q['correct_answer']))
+        self.stats['added' if inserted else 'duplicates'] += 1
+        return inserted
+
+    async def _unindexed(self, category):
+        """Pytania kategorii sprzed indeksu podobieństwa (bez podpisu w content_signatures)."""
+        rows = await self.db.fetchall("""SELECT q.digest, q.question, q.answers, q.correct_answer FROM quiz_bank q WHERE q.category = %s
+            AND NOT EXISTS (SELECT 1 FROM content_signatures s WHERE s.kind = 'quiz' AND s.category = q.category AND s.item_key = q.digest)""", (category,))
+        return [(row['digest'], signature_text({'question': row['question'], 'answers': json.loads(row['answers']), 'correct_answer': row['correct_answer']}))
+                for row in rows if row['correct_answer'] in json.loads(row['answers'])]
+
+    async def mark_seen(self, user_id, digest):
+        await self.db.execute("INSERT INTO quiz_seen (user_id, digest) VALUES (%s, %s) ON CONFLICT DO NOTHING", (user_id, digest))
+
+    async def take(self, user_id, category, difficulty):
+        """Losowe pytanie z banku, którego gracz jeszcze nie widział (przeszukanie indeksu od losowego skrótu)."""
+        category = normalize_category(category); self._track(category, difficulty)
+        def op(cur):
+            start = secrets.token_hex(20)
+            for bound in ("AND q.digest >= %s", ""):
+                params = (category, difficulty, user_id) + ((start,) if bound else ())
+                cur.execute(f"""SELECT q.digest, q.question, q.answers, q.correct_answer FROM quiz_bank q
+                    WHERE q.category = %s AND q.difficulty = %s AND NOT EXISTS (SELECT 1 FROM quiz_seen s WHERE s.user_id = %s AND s.digest = q.digest)
+                    {bound} ORDER BY q.digest LIMIT 1""", params)
+                if row := cur.fetchone():
+                    cur.execute("INSERT INTO quiz_seen (user_id, digest) VALUES (%s, %s) ON CONFLICT DO NOTHING", (user_id, row['digest']))
+                    return {'question': row['question'], 'answers': json.loads(row['answers']), 'correct_answer': row['correct_answer']}
+            return None
+        q = await self.db.run(op)
+        self.stats['served_from_bank' if q else 'bank_misses'] += 1
+        return q
+
+    def _track(self, category, difficulty):
+        self.demand.pop((category, difficulty), None); self.demand[(category, difficulty)] = None
+        while len(self.demand) > self.max_tracked: self.demand.pop(next(iter(self.demand)))
+        self._wake.set()
+
+    async def refill(self):
+        for category, difficulty in list(self.demand):
+            stock = await self.db.fetchval("SELECT count(*) FROM (SELECT 1 FROM quiz_bank WHERE category = %s AND difficulty = %s LIMIT %s) t", (category, difficulty, self.min_stock), 0)
+            for _ in range(self.min_stock - stock):
+                if not await self.generator(category, difficulty): break
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try: await self.refill()
+            except Exception as e: print(f"Błąd uzupełniania banku pytań: {e}")
+            try: await asyncio.wait_for(self._wake.wait(), self.refill_interval)
+            except asyncio.TimeoutError: pass
+
+    def start(self):
+        if self.generator and (self._task is None or self._task.done()): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+
+import psycopg2.extras
+
+UPSERT_WORDS_SQL = "INSERT INTO used_words (guild_id, word, used_at) VALUES %s ON CONFLICT (guild_id, word) DO UPDATE SET used_at = EXCLUDED.used_at"
+UPSERT_FILTER_SQL = """INSERT INTO word_filters (guild_id, current, current_count, previous, previous_count) VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (guild_id) DO UPDATE SET current = EXCLUDED.current, current_count = EXCLUDED.current_count, previous = EXCLUDED.previous, previous_count = EXCLUDED.previous_count"""
+
+
+class BloomFilter:
+    """Filtr Blooma na bytearray; k pozycji z podwójnego haszowania jednego skrótu blake2b."""
+    __slots__ = ('bits', 'size', 'hashes', 'count')
+
+    def __init__(self, capacity, error_rate=0.01, bits=None, count=0):
+        size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2) + 7) // 8 * 8
+        self.size, self.hashes = size, max(1, round(size / capacity * math.log(2)))
+        self.bits = bytearray(size // 8) if bits is None or len(bits) != size // 8 else bytearray(bits)
+        self.count = count if bits is not None and len(bits) == size // 8 else 0  # inny rozmiar (zmiana konfiguracji) = pusty filtr
+
+    def _positions(self, word):
+        digest = hashlib.blake2b(word.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + n * h2) % self.size for n in range(self.hashes)]
+
+    def add(self, word):
+        for p in self._positions(word): self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, word):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(word))
+
+
+class RotatingBloom:
+    """Dwa pokolenia filtrów Blooma: po zapełnieniu bieżącego poprzednie jest porzucane.
+    Pamięć i odsetek fałszywych trafień nie rosną z czasem; pamiętane jest ostatnie 1-2 x capacity słów.
+    Każde pokolenie dostaje połowę error_rate, bo słowo sprawdzamy w obu."""
+    __slots__ = ('capacity', 'error_rate', 'current', 'previous')
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity, self.error_rate = capacity, error_rate / 2
+        self.current, self.previous = BloomFilter(capacity, self.error_rate), None
+
+    def add(self, word):
+        if self.current.count >= self.capacity: self.previous, self.current = self.current, BloomFilter(self.capacity, self.error_rate)
+        self.current.add(word)
+
+    def __contains__(self, word): return word in self.current or (self.previous is not None and word in self.previous)
+
+    def memory(self): return len(self.current.bits) + (len(self.previous.bits) if self.previous is not None else 0)
+
+    def dump(self):
+        return bytes(self.current.bits), self.current.count, bytes(self.previous.bits) if self.previous is not None else None, self.previous.count if self.previous is not None else 0
+
+    def restore(self, current, current_count, previous, previous_count):
+        self.current = BloomFilter(self.capacity, self.error_rate, current, current_count)
+        if current and not self.current.count: self.current = BloomFilter(self.capacity, self.error_rate * 2, current, current_count)  # pierwsze pokolenie zapisane dawniej z pełnym error_rate
+        self.previous = BloomFilter(self.capacity, self.error_rate, previous, previous_count) if previous is not None else None
+
+
+class RecentWords:
+    """Słowa jednego serwera: `word in recent` = użyte w ostatnim oknie (nie losujemy ponownie), seen() = kiedykolwiek (wg filtra)."""
+    __slots__ = ('window', 'max_recent', 'recent', 'filter')
+
+    def __init__(self, window, max_recent, capacity, error_rate):
+        self.window, self.max_recent = window, max_recent
+        self.recent, self.filter = OrderedDict(), RotatingBloom(capacity, error_rate)  # słowo -> czas użycia, od najstarszego
+
+    def _expire(self, now):
+        recent, horizon = self.recent, now - self.window
+        while recent and (len(recent) > self.max_recent or next(iter(recent.values())) < horizon): recent.popitem(last=False)
+
+    def __contains__(self, word):
+        used_at = self.recent.get(word)
+        return used_at is not None and used_at >= time.time() - self.window
+
+    def __len__(self): return len(self.recent)
+
+    def seen(self, word): return word in self.recent or word in self.filter
+
+    def add(self, word, used_at=None):
+        used_at = time.time() if used_at is None else used_at
+        if word not in self.filter: self.filter.add(word)
+        self.recent[word] = used_at; self.recent.move_to_end(word); self._expire(used_at)
+
+
+class RecentWordsStore:
+    """Ostatnio użyte słowa per serwer, zapisywane w tle: okno w used_words, filtr Blooma w word_filters."""
+
+    def __init__(self, db, window=7 * 86400, max_recent=2000, capacity=100000, error_rate=0.01, flush_interval=30.0):
+        self.db, self.window, self.max_recent, self.capacity, self.error_rate, self.flush_interval = db, window, max_recent, capacity, error_rate, flush_interval
+        self.guilds, self._rows, self._dirty, self._task, self._lock = {}, [], set(), None, asyncio.Lock()
+
+    def get(self, guild_id):
+        words = self.guilds.get(guild_id)
+        if words is None: words = self.guilds[guild_id] = RecentWords(self.window, self.max_recent, self.capacity, self.error_rate)
+        return words
+
+    def add(self, guild_id, word):
+        now = time.time(); self.get(guild_id).add(word, now); self._rows.append((guild_id, word, now)); self._dirty.add(guild_id)
+
+    async def load(self, guild_id):
+        """Wczytuje stan serwera z bazy i dokłada do tego, co już jest w pamięci (słowa dodane przed wczytaniem nie giną)."""
+        def op(cur):
+            cur.execute("SELECT word, extract(epoch FROM used_at) FROM used_words WHERE guild_id = %s AND used_at > to_timestamp(%s) ORDER BY used_at", (guild_id, time.time() - self.window))
+            rows = cur.fetchall(); cur.execute("SELECT current, current_count, previous, previous_count FROM word_filters WHERE guild_id = %s", (guild_id,))
+            return rows, cur.fetchone()
+        rows, blob = await self.db.run(op)
+        words, fresh = self.get(guild_id), RecentWords(self.window, self.max_recent, self.capacity, self.error_rate)
+        if blob: fresh.filter.restore(bytes(blob[0]), blob[1], bytes(blob[2]) if blob[2] is not None else None, blob[3])
+        for word, used_at in [*rows, *((w, t) for w, t in words.recent.items())]: fresh.add(word, float(used_at))
+        self.guilds[guild_id] = fresh
+
+    async def flush(self):
+        async with self._lock:
+            if not self._rows and not self._dirty: return
+            rows, dirty, self._rows, self._dirty = self._rows, self._dirty, [], set()
+            filters = [(gid, *self.guilds[gid].filter.dump()) for gid in dirty if gid in self.guilds]
+            def op(cur):
+                if rows: psycopg2.extras.execute_values(cur, UPSERT_WORDS_SQL, rows, template="(%s, %s, to_timestamp(%s))", page_size=500)
+                for params in filters: cur.execute(UPSERT_FILTER_SQL, params)
+                cur.execute("DELETE FROM used_words WHERE guild_id = ANY(%s) AND used_at < to_timestamp(%s)", (list(dirty), time.time() - self.window))
+            try: await self.db.run(op)
+            except Exception as e:
+                self._rows[:0] = rows; self._dirty |= dirty; print(f"Błąd zapisu użytych słów: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
+        await self.flush()
@@ -0,0 +1,77 @@
+import asyncio
+
+import psycopg2.extras
+
+FIELDS = ('score', 'quiz_wins', 'wordle_wins', 'story_posts')
+UPSERT_SQL = """INSERT INTO users (guild_id, user_id, user_name, score, quiz_wins, wordle_wins, story_posts) VALUES %s
+ON CONFLICT (guild_id, user_id) DO UPDATE SET user_name = EXCLUDED.user_name, score = users.score + EXCLUDED.score,
+quiz_wins = users.quiz_wins + EXCLUDED.quiz_wins, wordle_wins = users.wordle_wins + EXCLUDED.wordle_wins, story_posts = users.story_posts + EXCLUDED.story_posts"""
+
+
+class ScoreBuffer:
+    """Zbiera przyrosty punktów/statystyk w pamięci i zapisuje je jednym zbiorczym upsertem."""
+
+    def __init__(self, db, flush_interval=2.0, max_events=100):
+        self.db, self.flush_interval, self.max_events = db, flush_interval, max_events
+        self.pending = {}  # (guild_id, user_id) -> [user_name, score, quiz_wins, wordle_wins, story_posts]
+        self.inflight = {}  # partia właśnie zapisywana: nadal widoczna dla odczytów, dopóki zapis się nie powiedzie
+        self.stats = {'events_absorbed': 0, 'rows_written': 0, 'flushes': 0, 'failed_flushes': 0}
+        self._events_since_flush, self._lock, self._task, self._flush_soon = 0, asyncio.Lock(), None, None
+
+    def add(self, guild_id, user_id, user_name, points=0, quiz_win=False, wordle_win=False, story_post=False):
+        entry = self.pending.get((guild_id, user_id))
+        if entry is None: entry = self.pending[(guild_id, user_id)] = [str(user_name), 0, 0, 0, 0]
+        entry[0] = str(user_name); entry[1] += points; entry[2] += int(bool(quiz_win)); entry[3] += int(bool(wordle_win)); entry[4] += int(bool(story_post))
+        self.stats['events_absorbed'] += 1; self._events_since_flush += 1
+        if self._events_since_flush >= self.max_events and self._task is not None and (self._flush_soon is None or self._flush_soon.done()):
+            self._flush_soon = asyncio.get_running_loop().create_task(self.flush())
+
+    def overlay(self, guild_id, user_id, row):
+        """Nakłada niezapisane przyrosty na wiersz z bazy (odczyt własnych zapisów)."""
+        entries = [e for e in (self.inflight.get((guild_id, user_id)), self.pending.get((guild_id, user_id))) if e is not None]
+        if not entries: return dict(row) if row else None
+        merged = dict(row) if row else {'guild_id': guild_id, 'user_id': user_id, **{f: 0 for f in FIELDS}}
+        merged['user_name'] = entries[-1][0]
+        for idx, field in enumerate(FIELDS, start=1): merged[field] = (merged.get(field) or 0) + sum(e[idx] for e in entries)
+        return merged
+
+    async def flush(self):
+        async with self._lock:
+            if not self.pending: return 0
+            batch, self.pending, self._events_since_flush = self.pending, {}, 0
+            self.inflight = batch
+            rows = [(gid, uid, *entry) for (gid, uid), entry in batch.items()]
+            try: await self.db.run(lambda cur: psycopg2.extras.execute_values(cur, UPSERT_SQL, rows, page_size=500))
+            except Exception as e:
+                self.stats['failed_flushes'] += 1
+                for key, entry in batch.items():  # przyrosty wracają do bufora, nic nie ginie
+                    cur = self.pending.setdefault(key, [entry[0], 0, 0, 0, 0])
+                    for idx in range(1, 5): cur[idx] += entry[idx]
+                print(f"Błąd zapisu punktów ({len(rows)} wierszy): {e}"); return 0
+            finally: self.inflight = {}
+            self.stats['flushes'] += 1; self.stats['rows_written'] += len(rows); return len(rows)
+
+    def pending_points(self, guild_id):
+        """(user_id, user_name, punkty) jeszcze niezapisane dla serwera - do uzupełnienia świeżo wczytanego rankingu."""
+        points = {}
+        for batch in (self.inflight, self.pending):
+            for (gid, uid), entry in batch.items():
+                if gid == guild_id and entry[1]: points[uid] = (entry[0], points.get(uid, (None, 0))[1] + entry[1])
+        return [(uid, name, value) for uid, (name, value) in points.items()]
+
+    def discard(self, guild_id):
+        for batch in (self.pending, self.inflight):
+            for key in [key for key in batch if key[0] == guild_id]: del batch[key]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done(): self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None: self._task.cancel(); self._task = None
+        await self.flush()
+        print(f"Bufor punktów: {self.stats['events_absorbed']} zdarzeń → {self.stats['rows_written']} wierszy w {self.stats['flushes']} zapisach.")
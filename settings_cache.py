@@ -0,0 +1,66 @@
+import asyncio
+
+from db import listen, unlisten
+
+NOTIFY_CHANNEL = 'zabawy_settings'
+
+
+CHANNELS_PREFIX = 'allowed_channels:'  # powiadomienie o zmianie kanałów jednego serwera: 'allowed_channels:<guild_id>'
+
+
+class SettingsCache:
+    """Ustawienia trzymane w pamięci procesu; odczyty na gorącej ścieżce nie robią żadnego I/O.
+    Flagi globalne wczytuje load(), dozwolone kanały serwera - load_guild() przy pierwszym zdarzeniu z tego serwera."""
+
+    def __init__(self, db):
+        self.db = db
+        self.maintenance, self.owner_id = False, None
+        self.allowed = {}  # guild_id -> frozenset(channel_id), tylko serwery wczytane w tym procesie
+        self._listen_conn = None
+
+    def channels(self, guild_id): return self.allowed.get(guild_id, frozenset())
+
+    def blocks(self, user_id, guild_id, channel_id):
+        if self.maintenance and user_id != self.owner_id: return True
+        allowed = self.allowed.get(guild_id)
+        return bool(allowed) and channel_id not in allowed
+
+    async def reload(self):
+        self.maintenance = await self.db.fetchval("SELECT value FROM settings WHERE key = 'maintenance_mode'") == 'true'
+
+    async def load(self, bot):
+        await self.reload()
+        if self.owner_id is None: self.owner_id = (await bot.application_info()).owner.id
+
+    async def load_guild(self, guild_id):
+        rows = await self.db.fetchall("SELECT channel_id FROM allowed_channels WHERE guild_id = %s", (guild_id,))
+        self.allowed[guild_id] = frozenset(row['channel_id'] for row in rows)
+
+    async def _write(self, payload, query, params):
+        def op(cur): cur.execute(query, params); cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+        await self.db.run(op)
+
+    async def set_maintenance(self, is_on):
+        await self._write('maintenance_mode', "INSERT INTO settings (key, value) VALUES ('maintenance_mode', %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", ('true' if is_on else 'false',))
+        self.maintenance = is_on
+
+    async def add_channel(self, guild_id, cid):
+        await self._write(f"{CHANNELS_PREFIX}{guild_id}", "INSERT INTO allowed_channels (guild_id, channel_id) VALUES (%s, %s) ON CONFLICT DO NOTHING", (guild_id, cid))
+        self.allowed[guild_id] = self.channels(guild_id) | {cid}
+
+    async def remove_channel(self, guild_id, cid):
+        await self._write(f"{CHANNELS_PREFIX}{guild_id}", "DELETE FROM allowed_channels WHERE guild_id = %s AND channel_id = %s", (guild_id, cid))
+        self.allowed[guild_id] = self.channels(guild_id) - {cid}
+
+    def _on_notify(self, payload):
+        loop = asyncio.get_running_loop()
+        if not payload.startswith(CHANNELS_PREFIX): loop.create_task(self.reload()); return
+        if (guild_id := int(payload[len(CHANNELS_PREFIX):])) in self.allowed: loop.create_task(self.load_guild(guild_id))
+
+    @property
+    def listening(self): return self._listen_conn is not None and not self._listen_conn.closed
+
+    # --- UNIEWAŻNIANIE MIĘDZY INSTANCJAMI (LISTEN/NOTIFY) ---
+    def listen(self, dsn): self._listen_conn = listen(dsn, NOTIFY_CHANNEL, self._on_notify)
+
+    def stop_listening(self): unlisten(self._listen_conn); self._listen_conn = None
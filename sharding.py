@@ -0,0 +1,35 @@
+# Podział serwerów między shardy i procesy (workery). Discord kieruje zdarzenia serwera do shardu
+# (guild_id >> 22) % shard_count, a wiadomości prywatne do shardu 0, więc tylko worker z danym shardem widzi jego serwery.
+
+
+def shard_for(guild_id, shard_count): return (guild_id >> 22) % shard_count if shard_count > 1 else 0
+
+
+def parse_shard_ids(text):
+    """'0-3,7' -> [0, 1, 2, 3, 7]; pusty napis -> []."""
+    ids = set()
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        first, _, last = part.partition('-')
+        ids.update(range(int(first), int(last or first) + 1))
+    return sorted(ids)
+
+
+def worker_shards(worker, workers, shard_count):
+    """Ciągły zakres shardów workera: sąsiednie shardy łączą się w tych samych kubełkach max_concurrency."""
+    return list(range(worker * shard_count // workers, (worker + 1) * shard_count // workers))
+
+
+class ShardOwnership:
+    """Shardy obsługiwane przez ten proces; owns(guild_id) mówi, czy zdarzenia serwera trafiają właśnie tutaj."""
+
+    def __init__(self, shard_ids=None, shard_count=1):
+        self.count = max(1, shard_count)
+        self.ids = frozenset(range(self.count) if not shard_ids else shard_ids)
+        if not self.ids <= set(range(self.count)): raise ValueError(f"shardy {sorted(self.ids)} spoza zakresu 0-{self.count - 1}")
+
+    @property
+    def everything(self): return len(self.ids) == self.count
+
+    def owns(self, guild_id): return self.everything or shard_for(guild_id or 0, self.count) in self.ids
+
+    def __str__(self): return f"{','.join(map(str, sorted(self.ids)))}/{self.count}"
@@ -0,0 +1,51 @@
+# Dopasowywanie słów w Tabu: polskie znaki sprowadzone do ASCII, odmiana przez końcówki fleksyjne.
+from functools import lru_cache
+
+from polish_text import FOLD, MIN_STEM, SUFFIXES, TOKEN, fold, stem
+
+MIN_PART = 3  # w wielowyrazowych hasłach pomijamy krótkie słowa ("W", "NA")
+
+
+def forms(word):
+    """Zbiór form słowa rozpoznawanych w wiadomościach: samo słowo, rdzeń + każda końcówka i (dla dłuższych) goły rdzeń."""
+    base = stem(word); out = {word, *(base + s for s in SUFFIXES)}
+    if len(base) > MIN_STEM: out.add(base)
+    return out
+
+
+def parts(phrase):
+    words = TOKEN.findall(fold(phrase))
+    return ([w for w in words if len(w) >= MIN_PART] or words) if len(words) > 1 else words
+
+
+class TabooCard:
+    """Skompilowana karta: słownik forma -> zakazane słowo dla opisującego i forma -> bity części hasła dla zgadujących."""
+    __slots__ = ('keyword', 'forbidden', 'keyword_forms', 'keyword_mask')
+
+    def __init__(self, keyword, taboo_words):
+        self.keyword, self.forbidden, self.keyword_forms = keyword, {}, {}
+        for word in taboo_words:
+            for part in parts(word):
+                for form in forms(part): self.forbidden.setdefault(form, word)
+        keyword_parts = parts(keyword)
+        for n, part in enumerate(keyword_parts):
+            for form in forms(part): self.forbidden.setdefault(form, keyword); self.keyword_forms[form] = self.keyword_forms.get(form, 0) | 1 << n
+        self.keyword_mask = (1 << len(keyword_parts)) - 1
+
+    def match(self, text, describer):
+        """Jedno przejście tokenizera po wiadomości. Opisujący: pierwsze użyte zakazane słowo (albo hasło).
+        Zgadujący: hasło, jeśli padły wszystkie jego części. W przeciwnym razie None."""
+        # fold tylko na unikalnych tokenach: translate z polskimi znakami jest wolniejsze od samego findall
+        tokens = {token.translate(FOLD) for token in set(TOKEN.findall(text.upper()))}
+        if describer:
+            if not (hits := self.forbidden.keys() & tokens): return None
+            return next(self.forbidden[token] for token in TOKEN.findall(fold(text)) if token in hits)  # pierwsze w kolejności wiadomości
+        missing = self.keyword_mask
+        for form in self.keyword_forms.keys() & tokens: missing &= ~self.keyword_forms[form]
+        return self.keyword if not missing and self.keyword_mask else None
+
+
+@lru_cache(maxsize=256)
+def compile_card(keyword, taboo_words):
+    """Karta kompilowana raz na grę (taboo_words jako krotka); kolejne wiadomości biorą ją z cache."""
+    return TabooCard(keyword, taboo_words)
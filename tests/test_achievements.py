@@ -0,0 +1,30 @@
+import asyncio
+
+from achievements import AchievementEngine
+
+
+class Cursor:
+    def __init__(self, db): self.db, self.rows = db, []
+
+    def execute(self, sql, params):
+        self.db.sql.append(sql); self.rows = [(aid,) for aid in params[2] if aid not in self.db.granted]; self.db.granted.update(params[2])
+
+    def fetchall(self): return self.rows
+
+
+class FakeDB:
+    def __init__(self): self.granted, self.sql = set(), []
+    def statement(self, name, sql): return sql
+    async def fetchall(self, query, params=()): return [{'achievement_id': aid} for aid in self.granted]
+    async def run(self, fn, *args): return fn(Cursor(self), *args)
+
+
+def test_grant_records_achievements_without_touching_scores():
+    async def run():
+        db = FakeDB(); engine = AchievementEngine(db)
+        async def stats(guild_id, user_id): return {'quiz_wins': 1, 'wordle_wins': 0, 'score': 10, 'story_posts': 0}
+        first = await engine.check(1, 7, stats, taboo_win=True); again = await engine.check(1, 7, stats, taboo_win=True)
+        return first, again, db.sql
+    first, again, sql = asyncio.run(run())
+    assert sorted(first) == ['FIRST_WIN', 'SOCIALITE'] and again == []
+    assert len(sql) == 1 and 'users' not in sql[0]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from ai_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, AIScheduler, CircuitBreaker, CircuitOpen, QueueFull
+
+
+class Flaky(Exception): pass
+
+
+def scheduler(**kwargs):
+    options = dict(rate_per_minute=60000, burst=100, max_in_flight=4, backoff_base=0, backoff_max=0, retry_on=(Flaky,)); options.update(kwargs)
+    return AIScheduler(**options)
+
+
+def test_interactive_requests_jump_the_queue():
+    async def run():
+        ai, order, gate = scheduler(max_in_flight=1), [], asyncio.Event()
+        async def job(name):
+            order.append(name); await gate.wait(); return name
+        first = asyncio.create_task(ai.call(lambda: job('start'))); await asyncio.sleep(0)
+        tasks = [asyncio.create_task(ai.call(lambda: job('tło'), PRIORITY_BACKGROUND)), asyncio.create_task(ai.call(lambda: job('gracz'), PRIORITY_INTERACTIVE))]
+        await asyncio.sleep(0); gate.set(); await asyncio.gather(first, *tasks)
+        return order
+    assert asyncio.run(run()) == ['start', 'gracz', 'tło']
+
+
+def test_retries_then_succeeds():
+    async def run():
+        ai, calls = scheduler(), []
+        async def job():
+            calls.append(1)
+            if len(calls) < 3: raise Flaky()
+            return 'ok'
+        return await ai.call(job), ai.counters['retries']
+    assert asyncio.run(run()) == ('ok', 2)
+
+
+def test_half_open_breaker_lets_a_single_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0); breaker.failure()
+    probe = breaker.allow()
+    assert probe and breaker.allow() is False
+    breaker.end_probe(object()); assert breaker.allow() is False
+    breaker.success(); assert breaker.state == 'closed' and breaker.allow() is True
+
+
+def test_failed_probe_reopens_and_unfinished_probe_is_released():
+    breaker = CircuitBreaker(threshold=1, cooldown=0); breaker.failure()
+    probe = breaker.allow(); breaker.end_probe(probe); assert breaker.allow()
+    breaker.failure(); breaker.cooldown = 60; assert breaker.state == 'open' and not breaker.allow()
+
+
+def test_scheduler_rejects_calls_while_the_probe_is_in_flight():
+    async def run():
+        ai, gate = scheduler(breaker_threshold=1, breaker_cooldown=0, max_retries=0), asyncio.Event()
+        async def fail(): raise Flaky()
+        async def slow(): await gate.wait(); return 'ok'
+        with pytest.raises(Flaky): await ai.call(fail)
+        probe = asyncio.create_task(ai.call(slow)); await asyncio.sleep(0)
+        with pytest.raises(CircuitOpen): await ai.call(slow)
+        gate.set(); return await probe, ai.breaker.state
+    assert asyncio.run(run()) == ('ok', 'closed')
+
+
+def test_queue_limit_ignores_cancelled_waiters():
+    async def run():
+        ai, gate = scheduler(max_in_flight=1, max_queue=2), asyncio.Event()
+        async def job(): await gate.wait()
+        running = asyncio.create_task(ai.call(job)); await asyncio.sleep(0)
+        for _ in range(5):
+            waiter = asyncio.create_task(ai.call(job)); await asyncio.sleep(0); waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        queued = [asyncio.create_task(ai.call(job)) for _ in range(2)]; await asyncio.sleep(0)
+        with pytest.raises(QueueFull): await ai.call(job)
+        gate.set(); await asyncio.gather(running, *queued)
+        return ai._live, ai.in_flight
+    assert asyncio.run(run()) == (0, 0)
@@ -0,0 +1,55 @@
+import asyncio
+import itertools
+import json
+
+from content_pool import ContentPool
+
+
+class FakeDB:
+    """Tabela content_pool jako lista słowników."""
+
+    def __init__(self): self.rows, self.ids = [], itertools.count(1)
+
+    async def fetchall(self, query, params=()): return [row for row in self.rows if row['owner'] == params[0]]
+
+    async def fetchval(self, query, params=()):
+        kind, bucket, payload, owner = params; row = {'id': next(self.ids), 'kind': kind, 'bucket': bucket, 'payload': payload, 'owner': owner}
+        self.rows.append(row); return row['id']
+
+    async def execute(self, query, params=()): self.rows = [row for row in self.rows if row['id'] not in params[0]]
+
+
+def test_refill_tops_up_each_bucket_to_the_high_watermark():
+    async def run():
+        db, made = FakeDB(), itertools.count()
+        pool = ContentPool(db, low_watermark=2, high_watermark=3)
+        async def producer(bucket): return f"{bucket}-{next(made)}"
+        pool.register('word', producer, buckets=['4', '5']); await pool.refill()
+        return pool.size('word', '4'), pool.size('word', '5'), len(db.rows)
+    assert asyncio.run(run()) == (3, 3, 6)
+
+
+def test_pop_skips_rejected_items_and_deletes_consumed_rows():
+    async def run():
+        db = FakeDB(); pool = ContentPool(db)
+        for word in ("KOT", "PIES", "LAS"): await db.fetchval("", ('word', '', json.dumps(word), '0'))
+        await pool.load(); item = pool.pop('word', accept=lambda w: w != "KOT"); await pool.stop()
+        return item, [json.loads(row['payload']) for row in db.rows], pool.pop('other'), pool.stats['misses']
+    assert asyncio.run(run()) == ("PIES", ["LAS"], None, 1)
+
+
+def test_workers_only_load_their_own_rows():
+    async def run():
+        db = FakeDB()
+        await db.fetchval("", ('tabu', '', json.dumps("a"), '0')); await db.fetchval("", ('tabu', '', json.dumps("b"), '1'))
+        first, second = ContentPool(db, owner='0'), ContentPool(db, owner='1'); await first.load(); await second.load()
+        return first.pop('tabu'), second.pop('tabu'), first.pop('tabu')
+    assert asyncio.run(run()) == ("a", "b", None)
+
+
+def test_producer_returning_nothing_stops_the_fill():
+    async def run():
+        pool = ContentPool(FakeDB())
+        async def producer(bucket): return None
+        pool.register('two_truths', producer); await pool.refill(); return pool.size('two_truths'), pool.stats['rejected']
+    assert asyncio.run(run()) == (0, 1)
@@ -0,0 +1,64 @@
+import asyncio
+
+import psycopg2
+import pytest
+
+from db import Database
+
+
+class Cursor:
+    def __init__(self, conn): self.conn, self.connection = conn, conn
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+    def execute(self, sql, params=None):
+        self.conn.log.append(sql)
+        if self.conn.fail_on and sql.startswith(self.conn.fail_on): raise self.conn.error("błąd zapytania")
+
+    def fetchone(self): return (1,)
+
+
+class Connection:
+    def __init__(self): self.log, self.prepared, self.closed, self.fail_on, self.error, self.commits, self.rollbacks = [], set(), 0, None, None, 0, 0
+    def cursor(self, cursor_factory=None): return Cursor(self)
+    def commit(self): self.commits += 1
+    def rollback(self): self.rollbacks += 1
+
+
+class Pool:
+    def __init__(self): self.conn, self.returned = Connection(), []
+    def getconn(self): return self.conn
+    def putconn(self, conn, close=False): self.returned.append(close)
+
+
+def database():
+    db, pool = Database('postgresql://test', max_size=2), Pool(); db._get_pool = lambda: pool
+    return db, pool
+
+
+def test_statement_is_prepared_once_per_connection():
+    async def run():
+        db, pool = database(); stmt = db.statement('user_stats', "SELECT 1 WHERE $1 = $2")
+        await db.fetchone(stmt, (1, 2)); await db.fetchone(stmt, (3, 4)); await db.close(); return pool.conn.log
+    assert asyncio.run(run()) == ["PREPARE user_stats AS SELECT 1 WHERE $1 = $2", "EXECUTE user_stats (%s, %s)", "EXECUTE user_stats (%s, %s)"]
+
+
+def test_query_error_deallocates_and_prepares_again():
+    async def run():
+        db, pool = database(); stmt = db.statement('user_stats', "SELECT 1"); conn = pool.conn
+        await db.fetchone(stmt); conn.fail_on, conn.error = "EXECUTE", psycopg2.ProgrammingError
+        with pytest.raises(psycopg2.ProgrammingError): await db.fetchone(stmt)
+        after_error = (conn.rollbacks, list(conn.prepared), conn.log[-1]); conn.fail_on = None; conn.log.clear()
+        await db.fetchone(stmt); await db.close()
+        return after_error, conn.log, pool.returned, db.stats['errors']
+    after_error, log, returned, errors = asyncio.run(run())
+    assert after_error == (1, [], "DEALLOCATE ALL") and log[0].startswith("PREPARE user_stats")
+    assert returned == [False, False, False] and errors == 1
+
+
+def test_broken_connection_is_discarded():
+    async def run():
+        db, pool = database(); pool.conn.fail_on, pool.conn.error = "SELECT", psycopg2.OperationalError
+        with pytest.raises(psycopg2.OperationalError): await db.execute("SELECT 1")
+        await db.close(); return pool.returned, pool.conn.rollbacks, db.stats['discarded']
+    assert asyncio.run(run()) == ([True], 0, 1)
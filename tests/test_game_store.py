@@ -0,0 +1,59 @@
+import asyncio
+
+from game_store import SCOPE_CHANNEL, SCOPE_PLAYER, GameStore, decode_state, encode_state
+from games import Story, Wordle, game_from_state
+
+
+class FakeBackend:
+    """game_state w słowniku klucz wiersza -> (guild_id, stan); fail=True symuluje błąd zapisu."""
+
+    def __init__(self): self.rows, self.fail, self.saves = {}, False, 0
+
+    async def save(self, rows, deleted):
+        if self.fail: raise RuntimeError("baza niedostępna")
+        self.saves += 1
+        for scope, channel_id, user_id, guild_id, blob in rows: self.rows[(scope, channel_id, user_id)] = (guild_id, blob.adapted)
+        for rk in deleted: self.rows.pop(rk, None)
+
+    async def load(self, keys=None): return [(*rk, guild_id, blob) for rk, (guild_id, blob) in self.rows.items() if keys is None or rk in keys]
+    def listen(self, on_keys): pass
+    def close(self): pass
+
+
+def store(backend, **kwargs):
+    games = GameStore(backend, factory=game_from_state, **kwargs); return games, games.table(SCOPE_PLAYER), games.table(SCOPE_CHANNEL)
+
+
+def test_state_round_trip_compresses_only_large_games():
+    small, large = Story("Był sobie smok.", 1), Story("Był sobie smok.", 1); large.full_story += [f"Zdanie numer {n} o smoku." for n in range(100)]
+    assert encode_state(small)[:1] == b'j' and encode_state(large)[:1] == b'z'
+    assert game_from_state(decode_state(encode_state(large))).full_story == large.full_story
+
+
+def test_changes_are_flushed_and_restored_after_restart():
+    async def run():
+        backend = FakeBackend(); games, players, channels = store(backend, locate=lambda scope, key: 99)
+        players[(10, 7)] = Wordle("KOTEK", "normalny"); channels[20] = Story("Był sobie smok.", 1); channels[21] = Story("Inna historia.", 1)
+        players[(10, 7)].attempts = 3; players.touch((10, 7)); del channels[21]
+        await games.flush(); await games.flush()
+        restored, players, channels = store(backend); found = await restored.restore()
+        return backend.saves, sorted(rk for rk in backend.rows), players[(10, 7)].attempts, channels[20].full_story, len(found)
+    saves, rows, attempts, story, found = asyncio.run(run())
+    assert saves == 1 and rows == [('c', 20, 0), ('p', 10, 7)] and attempts == 3 and story == ["Był sobie smok."] and found == 2
+
+
+def test_failed_flush_keeps_changes_for_the_next_one():
+    async def run():
+        backend = FakeBackend(); games, players, _ = store(backend); players[(1, 2)] = Wordle("DOMEK", "łatwy")
+        backend.fail = True; await games.flush(); backend.fail = False; await games.flush()
+        return list(backend.rows)
+    assert asyncio.run(run()) == [('p', 1, 2)]
+
+
+def test_restore_loads_only_guilds_owned_by_this_worker():
+    async def run():
+        backend = FakeBackend(); games, players, _ = store(backend, locate=lambda scope, key: key[0])
+        players[(1, 5)] = Wordle("KOTEK", "łatwy"); players[(2, 5)] = Wordle("DOMEK", "łatwy"); await games.flush()
+        worker, players, _ = store(backend, owns=lambda guild_id: guild_id % 2 == 0); await worker.restore()
+        return list(players)
+    assert asyncio.run(run()) == [(2, 5)]
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from leaderboard import Leaderboard, RankIndex
+
+
+def test_rank_index_matches_a_sorted_list_under_random_updates():
+    rng, index, reference = random.Random(14), RankIndex(load=4), []
+    for _ in range(2000):
+        if reference and rng.random() < 0.4: key = rng.choice(reference); reference.remove(key); index.remove(key)
+        else: key = (rng.randrange(-50, 0), rng.randrange(10 ** 6)); reference.append(key); index.insert(key)
+        reference.sort()
+    assert len(index) == len(reference) and index.slice(0, len(reference)) == reference
+    for n in range(0, len(reference), 7): assert index.index(reference[n]) == n and index.slice(n, 3) == reference[n:n + 3]
+
+
+def test_bulk_load_and_missing_keys():
+    index = RankIndex(load=3); index.bulk_load([(k, 0) for k in range(10)])
+    assert index.index((4, 0)) == 4 and index.index((99, 0)) == 10 and index.slice(8, 5) == [(8, 0), (9, 0)] and index.slice(10, 1) == []
+    with pytest.raises(KeyError): index.remove((4, 1))
+
+
+def test_leaderboard_ranks_break_ties_by_lower_id():
+    board = Leaderboard(load=2); board.load([(3, "c", 50), (1, "a", 20), (2, "b", 20)])
+    board.add(4, "d", 20); board.add(2, "b", 40)
+    assert [board.rank(uid) for uid in (2, 3, 1, 4)] == [1, 2, 3, 4] and board.rank(99) is None
+    assert board.page(1, 2) == [(2, 3, "c", 50), (3, 1, "a", 20)]
+
+
+def test_load_sorts_rows_that_arrive_unsorted():
+    board = Leaderboard(); board.load([(1, "a", 5), (2, "b", 30)])
+    assert board.page(0, 10) == [(1, 2, "b", 30), (2, 1, "a", 5)]
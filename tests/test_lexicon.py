@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from lexicon import MAX_LEN, MIN_LEN, Lexicon, build, read_word_list
+
+WORD_LIST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'slowa.txt')
+
+
+@pytest.fixture(scope='module')
+def lexicon(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('lexicon') / 'lexicon.bin'); build(read_word_list(WORD_LIST), path)
+    return Lexicon(path)
+
+
+def test_shipped_list_covers_every_length_and_tier(lexicon):
+    assert all(lexicon.count(n, d) for n in range(MIN_LEN, MAX_LEN + 1) for d in ('łatwy', 'normalny', 'trudny'))
+
+
+def test_incomplete_bucket_accepts_common_words_outside_the_list(lexicon):
+    for word in ('STOLEK', 'ZABKA', 'KRZESLO', 'OGROD', 'WIDELCE', 'ŻABKA'):
+        assert word not in lexicon and lexicon.accepts(word)
+
+
+def test_complete_bucket_rejects_made_up_words(lexicon):
+    assert lexicon.accepts('NOGA', min_words=10) and not lexicon.accepts('QWXZ', min_words=10)
+
+
+def test_tiers_follow_list_order(tmp_path):
+    source, path = tmp_path / 'slowa.txt', str(tmp_path / 'lexicon.bin')
+    source.write_text("# komentarz\n" + "\n".join(f"KOT{c}" for c in "ABCDEFGHIJ") + "\nKOTZ 5\nŻABA\n", encoding='utf-8')
+    freq = read_word_list(str(source)); build(freq, path); lex = Lexicon(path)
+    assert 'ŻABA' not in freq and freq['KOTZ'] > freq['KOTA'] > freq['KOTJ']
+    assert sorted(lex.buckets[(4, 'łatwy')][i].decode() for i in range(3)) == ['KOTA', 'KOTB', 'KOTZ']
+    assert lex.buckets[(4, 'trudny')][len(lex.buckets[(4, 'trudny')]) - 1] == b'KOTJ'
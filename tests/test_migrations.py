@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from migrations import LOCK_ID, MIGRATIONS, MigrationError, latest_version, migrate
+
+
+class Cursor:
+    """schema_version w słowniku; pozostałe instrukcje tylko zapisywane w logu."""
+
+    def __init__(self, versions=None, has_data=False):
+        self.versions, self.has_data, self.log, self.result = versions, has_data, [], None
+
+    def execute(self, sql, params=None):
+        self.log.append((sql, params)); versions = self.versions or {}
+        if sql.startswith("SELECT to_regclass"): self.result = [(self.versions is not None,)]
+        elif sql.startswith("SELECT coalesce(max(version)"): self.result = [(max(versions, default=0),)]
+        elif sql.startswith("CREATE TABLE IF NOT EXISTS schema_version"): self.versions = versions
+        elif sql.startswith("SELECT 1 FROM schema_version"): self.result = [(1,)] if versions.get(1) == params[0] else []
+        elif sql.startswith("UPDATE schema_version"): self.versions = {v + params[0] if v > 1 else v: d for v, d in versions.items()}
+        elif sql.startswith("DELETE FROM schema_version"): del self.versions[1]
+        elif sql.startswith("INSERT INTO schema_version"): self.versions[params[0]] = params[1]
+        elif sql.startswith("SELECT version FROM schema_version"): self.result = [(v,) for v in versions]
+        elif sql.startswith("SELECT EXISTS"): self.result = [(self.has_data,)]
+
+    def fetchone(self): return self.result[0] if self.result else None
+    def fetchall(self): return self.result
+
+
+class FakeDB:
+    def __init__(self, cur): self.cur = cur
+    async def run(self, fn): return fn(self.cur)
+
+
+def test_steps_are_numbered_in_order():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == list(range(1, len(MIGRATIONS) + 1)) and len({d for _, d, _ in MIGRATIONS}) == len(MIGRATIONS)
+
+
+def test_empty_database_runs_everything_under_the_lock():
+    cur = Cursor(); applied = asyncio.run(migrate(FakeDB(cur)))
+    assert applied == list(range(1, latest_version() + 1)) and sorted(cur.versions) == applied
+    assert ("SELECT pg_advisory_xact_lock(%s)", (LOCK_ID,)) in cur.log
+    assert ("UPDATE users SET guild_id = %(legacy_guild_id)s", {'legacy_guild_id': 0}) in cur.log
+
+
+def test_current_schema_takes_the_fast_path():
+    cur = Cursor({v: d for v, d, _ in MIGRATIONS}); assert asyncio.run(migrate(FakeDB(cur))) == []
+    assert len(cur.log) == 2 and not any("pg_advisory" in sql for sql, _ in cur.log)
+
+
+def test_moving_existing_data_requires_the_legacy_guild():
+    cur = Cursor({1: MIGRATIONS[0][1]}, has_data=True)
+    with pytest.raises(MigrationError): asyncio.run(migrate(FakeDB(cur)))
+    assert asyncio.run(migrate(FakeDB(Cursor({1: MIGRATIONS[0][1]}, has_data=True)), params={'legacy_guild_id': 5}))[0] == 2
+
+
+def test_old_numbering_is_mapped_onto_the_split_steps():
+    old = {1: "schemat bazowy", 2: "dane per serwer", 3: "used_words", 4: "game_state.guild_id"}
+    cur = Cursor(old); applied = asyncio.run(migrate(FakeDB(cur)))
+    assert applied == [10, 11] and sorted(cur.versions) == list(range(1, 12))
+    assert cur.versions[7] == "dane per serwer" and cur.versions[1] == MIGRATIONS[0][1]
@@ -0,0 +1,38 @@
+import asyncio
+
+from near_duplicates import LSHIndex, NearDuplicates, features, signature, similarity
+from polish_text import fold, stem
+
+QUESTION = "Jaka jest stolica Francji, w której stoi wieża Eiffla?"
+
+
+class FakeDB:
+    async def fetchall(self, query, params=()): return []
+
+
+def test_normalisation_folds_and_stems():
+    assert fold("Żółć") == "ZOLC" and stem("KOTAMI") == "KOT" and stem("OK") == "OK"
+    assert features("Jaka jest stolica Francji?") == {"STOLIC", "FRANCJ"}
+
+
+def test_reworded_question_is_close_and_unrelated_is_far():
+    sig = signature(QUESTION)
+    assert similarity(sig, signature("Stolicą Francji, gdzie stoi wieża Eiffla, jest które miasto?")) >= 0.6
+    assert similarity(sig, signature("Ile nóg ma pająk krzyżak żyjący w ogrodzie?")) < 0.3
+
+
+def test_lsh_finds_the_near_duplicate_among_many():
+    index = LSHIndex(); index.extend((f"q{n}", signature(f"Pytanie {n} o zwierzę numer {n * 7} z lasu {n * 13}")) for n in range(500))
+    index.add("paris", signature(QUESTION))
+    assert index.nearest(signature("Stolica Francji z wieżą Eiffla to?"))[0] == "paris"
+    assert "paris" not in {index.keys[n] for n in index.candidates(signature("Najdłuższa rzeka Afryki płynie przez Egipt"))}
+
+
+def test_admit_rejects_near_duplicates_per_category():
+    async def run():
+        near = NearDuplicates(FakeDB())
+        first = await near.admit('quiz', 'geografia', QUESTION)
+        again = await near.admit('quiz', 'geografia', QUESTION.upper().replace('?', '!'))
+        other = await near.admit('quiz', 'historia', QUESTION)
+        return first, again, other, near.stats['rejected']
+    assert asyncio.run(run()) == (True, False, True, 1)
@@ -0,0 +1,43 @@
+import asyncio
+
+from outbox import ChannelOutbox
+
+
+class Channel:
+    id = 1
+
+    def __init__(self): self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(0); self.sent.append((content, kwargs.get('reference'))); return content
+
+
+def deliver(*messages):
+    async def run():
+        outbox, channel = ChannelOutbox(), Channel()
+        await asyncio.gather(*(outbox.send(channel, text, **kwargs) for text, kwargs in messages))
+        return channel.sent
+    return asyncio.run(run())
+
+
+def test_plain_send_is_not_threaded_under_a_reply():
+    guess = object()
+    assert deliver(("wynik", {'reference': guess}), ("gra wygasła", {})) == [("wynik", guess), ("gra wygasła", None)]
+
+
+def test_replies_to_the_same_message_are_merged():
+    guess = object()
+    assert deliver(("a", {'reference': guess}), ("b", {'reference': guess})) == [("a\nb", guess)]
+
+
+def test_replies_to_different_messages_stay_separate():
+    first, second = object(), object()
+    assert deliver(("a", {'reference': first}), ("b", {'reference': second})) == [("a", first), ("b", second)]
+
+
+def test_flush_waits_for_queued_messages():
+    async def run():
+        outbox, channel = ChannelOutbox(), Channel()
+        outbox.send(channel, "a"); outbox.send(channel, "b", embed=object()); await outbox.flush()
+        return [text for text, _ in channel.sent], outbox._tasks
+    assert asyncio.run(run()) == (["a", "b"], {})
@@ -0,0 +1,75 @@
+import asyncio
+
+from quiz_bank import QuizBank, question_digest, valid_question
+
+
+def question(text, correct='A'): return {'question': text, 'answers': {'A': "Paryż", 'B': "Lyon", 'C': "Nicea", 'D': "Lille"}, 'correct_answer': correct}
+
+
+class Row(dict):
+    def __lt__(self, other): return self['digest'] < other['digest']
+
+
+class Cursor:
+    def __init__(self, db): self.db, self.row = db, None
+
+    def execute(self, sql, params):
+        if sql.startswith("INSERT INTO quiz_seen"): self.db.seen.add(params); return
+        category, difficulty, user_id, *start = params
+        rows = sorted(row for row in self.db.bank.values() if row['category'] == category and row['difficulty'] == difficulty
+                      and (user_id, row['digest']) not in self.db.seen and (not start or row['digest'] >= start[0]))
+        self.row = rows[0] if rows else None
+
+    def fetchone(self): return self.row
+
+
+class FakeDB:
+    """quiz_bank i quiz_seen w pamięci."""
+
+    def __init__(self): self.bank, self.seen = {}, set()
+
+    async def fetchval(self, query, params=(), default=None):
+        digest, category, difficulty, text, answers, correct = params
+        if digest in self.bank: return None
+        self.bank[digest] = Row(digest=digest, category=category, difficulty=difficulty, question=text, answers=answers, correct_answer=correct); return digest
+
+    async def run(self, fn): return fn(Cursor(self))
+
+
+def test_digest_ignores_case_diacritics_and_punctuation():
+    assert question_digest("Jaka jest stolica Francji?") == question_digest("  jaka JEST stolica francji!! ")
+    assert question_digest("Gdzie leży Łódź?") == question_digest("gdzie lezy lodz") != question_digest("Gdzie leży Kraków?")
+
+
+def test_invalid_questions_are_rejected():
+    assert valid_question(question("Stolica Francji?"))
+    assert not valid_question({**question("Stolica Francji?"), 'correct_answer': 'E'}) and not valid_question({**question(" "), 'answers': {}})
+
+
+def test_exact_duplicate_is_stored_once():
+    async def run():
+        bank = QuizBank(FakeDB())
+        first = await bank.add("Geografia", "łatwy", question("Stolica Francji?")); again = await bank.add("geografia ", "łatwy", question("stolica francji"))
+        return first == question_digest("Stolica Francji?"), again, bank.stats['added'], bank.stats['duplicates']
+    assert asyncio.run(run()) == (True, None, 1, 1)
+
+
+def test_near_duplicate_index_can_veto_a_question():
+    class Reject:
+        async def admit(self, *args, **kwargs): return False
+    async def run():
+        db = FakeDB(); bank = QuizBank(db, near_dups=Reject())
+        return await bank.add("geografia", "łatwy", question("Stolica Francji?")), db.bank, bank.stats['near_duplicates']
+    assert asyncio.run(run()) == (None, {}, 1)
+
+
+def test_take_serves_each_question_once_per_player():
+    async def run():
+        bank = QuizBank(FakeDB())
+        for n in range(3): await bank.add("historia", "trudny", question(f"Pytanie numer {n}?"))
+        served = [await bank.take(7, "Historia", "trudny") for _ in range(4)]
+        other = await bank.take(8, "historia", "trudny")
+        return served, other, bank.stats['bank_misses']
+    served, other, misses = asyncio.run(run())
+    assert len({q['question'] for q in served[:3]}) == 3 and served[3] is None and misses == 1
+    assert other['answers']['A'] == "Paryż" and other['correct_answer'] == 'A'
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from recent_words import BloomFilter, RotatingBloom  # noqa: E402
+
+
+def test_dump_restore_round_trip():
+    bloom = RotatingBloom(100, 0.01)
+    for n in range(150): bloom.add(f"W{n}")
+    restored = RotatingBloom(100, 0.01); restored.restore(*bloom.dump())
+    assert restored.dump() == bloom.dump()
+    assert all(f"W{n}" in restored for n in range(150))
+
+
+def test_restore_first_generation():
+    bloom = RotatingBloom(100, 0.01); bloom.add('W1')
+    restored = RotatingBloom(100, 0.01); restored.restore(*bloom.dump())
+    assert 'W1' in restored and restored.current.count == 1
+
+
+def test_restore_legacy_full_rate_generation():
+    legacy = BloomFilter(100, 0.01); legacy.add('W1')
+    restored = RotatingBloom(100, 0.01); restored.restore(bytes(legacy.bits), legacy.count, None, 0)
+    assert 'W1' in restored and restored.current.count == 1
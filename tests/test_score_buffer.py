@@ -0,0 +1,49 @@
+import asyncio
+
+from score_buffer import ScoreBuffer
+
+
+class SlowDB:
+    """run() czeka na release, żeby test mógł czytać bufor w trakcie zapisu."""
+
+    def __init__(self, fail=False): self.fail, self.calls, self.release = fail, 0, None
+
+    async def run(self, fn):
+        self.calls += 1; await self.release.wait()
+        if self.fail: raise RuntimeError("baza niedostępna")
+
+
+def test_batches_many_events_into_one_row():
+    async def run():
+        db = SlowDB(); db.release = asyncio.Event(); db.release.set(); scores = ScoreBuffer(db)
+        for _ in range(5): scores.add(1, 7, "ala", points=10, quiz_win=True)
+        return await scores.flush(), db.calls, scores.stats['events_absorbed']
+    assert asyncio.run(run()) == (1, 1, 5)
+
+
+def test_points_stay_visible_while_the_write_is_in_flight():
+    async def run():
+        db = SlowDB(); db.release = asyncio.Event(); scores = ScoreBuffer(db)
+        scores.add(1, 7, "ala", points=10); flush = asyncio.create_task(scores.flush()); await asyncio.sleep(0)
+        scores.add(1, 7, "ala", points=5)
+        during = scores.overlay(1, 7, {'score': 100}), scores.pending_points(1)
+        db.release.set(); await flush
+        return during, scores.overlay(1, 7, {'score': 110}), scores.inflight
+    (row, points), after, inflight = asyncio.run(run())
+    assert row['score'] == 115 and points == [(7, "ala", 15)]
+    assert after['score'] == 115 and inflight == {}
+
+
+def test_failed_write_returns_increments_to_the_buffer():
+    async def run():
+        db = SlowDB(fail=True); db.release = asyncio.Event(); db.release.set(); scores = ScoreBuffer(db)
+        scores.add(1, 7, "ala", points=10, wordle_win=True); written = await scores.flush()
+        return written, scores.pending, scores.inflight, scores.stats['failed_flushes']
+    assert asyncio.run(run()) == (0, {(1, 7): ["ala", 10, 0, 1, 0]}, {}, 1)
+
+
+def test_discard_drops_pending_points_of_one_guild():
+    async def run():
+        scores = ScoreBuffer(SlowDB()); scores.add(1, 7, "ala", points=10); scores.add(2, 7, "ala", points=3); scores.discard(1)
+        return scores.pending_points(1), scores.pending_points(2)
+    assert asyncio.run(run()) == ([], [(7, "ala", 3)])
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from verdict_cache import VerdictCache
+
+
+class FakeDB:
+    """association_verdicts w słowniku (last_word, new_word) -> werdykt."""
+
+    def __init__(self): self.rows, self.reads = {}, 0
+
+    async def execute(self, query, params=()): self.rows[params[:2]] = params[2]
+
+    async def fetchone(self, query, params=()):
+        self.reads += 1; verdict = self.rows.get(params[:2])
+        return None if verdict is None else {'verdict': verdict, 'created': time.time()}
+
+    async def fetchall(self, query, params=()): return [{'new_word': new} for (last, new), verdict in self.rows.items() if last == params[0] and verdict]
+
+
+def test_concurrent_identical_questions_share_one_model_call():
+    async def run():
+        cache, calls = VerdictCache(FakeDB()), []
+        async def compute(): calls.append(1); await asyncio.sleep(0.01); return True
+        verdicts = await asyncio.gather(*(cache.get_or_compute("kot", " Mysz", compute) for _ in range(5)))
+        return verdicts, len(calls), cache.stats['coalesced'], await cache.get_or_compute("KOT", "mysz", compute), cache.stats['l1_hits']
+    assert asyncio.run(run()) == ([True] * 5, 1, 4, True, 1)
+
+
+def test_verdicts_survive_a_restart_through_the_database():
+    async def run():
+        db = FakeDB(); await VerdictCache(db).record("morze", "plaża", False)
+        async def compute(): raise AssertionError("werdykt powinien przyjść z bazy")
+        cache = VerdictCache(db); return await cache.get_or_compute("MORZE", "PLAŻA", compute), cache.stats['l2_hits']
+    assert asyncio.run(run()) == (False, 1)
+
+
+def test_lru_evicts_oldest_and_its_suggestions():
+    async def run():
+        cache = VerdictCache(FakeDB(), max_entries=2)
+        for word in ("MYSZ", "MLEKO", "PIES"): await cache.record("KOT", word, True)
+        return set(cache.entries), cache.by_word["KOT"]
+    entries, suggestions = asyncio.run(run())
+    assert entries == {("KOT", "MLEKO"), ("KOT", "PIES")} and suggestions == {"MLEKO", "PIES"}
+
+
+def test_suggest_skips_excluded_words_and_falls_back_to_the_database():
+    async def run():
+        db = FakeDB(); db.rows[("LAS", "DRZEWO")] = True; cache = VerdictCache(db); await cache.record("LAS", "GRZYB", True)
+        return await cache.suggest("las", exclude=["grzyb"]), await cache.suggest("las", exclude=["grzyb", "drzewo"])
+    assert asyncio.run(run()) == ("DRZEWO", None)
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+
+
+def normalize_word(word): return ' '.join(str(word).upper().split())
+
+
+class VerdictCache:
+    """Dwupoziomowy cache werdyktów skojarzeń: LRU w pamięci + tabela association_verdicts w PostgreSQL."""
+
+    def __init__(self, db, max_entries=10000, ttl=30 * 86400, max_rows=500000, prune_every=1000):
+        self.db, self.max_entries, self.ttl, self.max_rows, self.prune_every = db, max_entries, ttl, max_rows, prune_every
+        self.entries = OrderedDict()  # (last_word, new_word) -> (verdict, expires_at)
+        self.by_word = {}  # last_word -> set(new_word) z pozytywnym werdyktem (tylko to, co jest w LRU)
+        self.inflight = {}
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'coalesced': 0, 'suggestions': 0}
+        self._stores = 0
+
+    def hit_rate(self):
+        hits = self.stats['l1_hits'] + self.stats['l2_hits'] + self.stats['coalesced']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def _remember(self, key, verdict, expires_at):
+        self.entries[key] = (verdict, expires_at); self.entries.move_to_end(key)
+        if verdict: self.by_word.setdefault(key[0], set()).add(key[1])
+        while len(self.entries) > self.max_entries:
+            (last, new), (old_verdict, _) = self.entries.popitem(last=False)
+            if old_verdict and last in self.by_word:
+                self.by_word[last].discard(new)
+                if not self.by_word[last]: del self.by_word[last]
+
+    def _lookup(self, key):
+        item = self.entries.get(key)
+        if item is None: return None
+        if item[1] < time.time(): del self.entries[key]; self.by_word.get(key[0], set()).discard(key[1]); return None
+        self.entries.move_to_end(key); return item[0]
+
+    async def record(self, last_word, new_word, verdict):
+        key = (normalize_word(last_word), normalize_word(new_word)); self._remember(key, verdict, time.time() + self.ttl)
+        try: await self.db.execute("INSERT INTO association_verdicts (last_word, new_word, verdict) VALUES (%s, %s, %s) ON CONFLICT (last_word, new_word) DO UPDATE SET verdict = EXCLUDED.verdict, created_at = now()", (*key, verdict))
+        except Exception as e: print(f"Błąd zapisu werdyktu skojarzenia: {e}"); return
+        self._stores += 1
+        if self._stores % self.prune_every == 0: await self.prune()
+
+    async def get_or_compute(self, last_word, new_word, compute):
+        """Zwraca werdykt (True/False) z cache albo z compute(); równoległe identyczne pytania współdzielą jedno wywołanie."""
+        key = (normalize_word(last_word), normalize_word(new_word))
+        if (verdict := self._lookup(key)) is not None: self.stats['l1_hits'] += 1; return verdict
+        if key in self.inflight: self.stats['coalesced'] += 1; return await asyncio.shield(self.inflight[key])
+        future = asyncio.get_running_loop().create_future(); self.inflight[key] = future
+        try:
+            try: row = await self.db.fetchone("SELECT verdict, EXTRACT(EPOCH FROM created_at) AS created FROM association_verdicts WHERE last_word = %s AND new_word = %s AND created_at > now() - make_interval(secs => %s)", (*key, self.ttl))
+            except Exception as e: row = None; print(f"Błąd odczytu werdyktu skojarzenia: {e}")
+            if row is not None:
+                self.stats['l2_hits'] += 1; verdict = row['verdict']; self._remember(key, verdict, float(row['created']) + self.ttl)
+            else:
+                self.stats['misses'] += 1; verdict = await compute()
+                if verdict is not None: await self.record(*key, verdict)
+            future.set_result(verdict); return verdict
+        except asyncio.CancelledError: future.cancel(); raise
+        except Exception as e:
+            future.set_exception(e); future.exception()  # oczekujący dostaną wyjątek; tu tylko oznaczamy jako odebrany
+            raise
+        finally: self.inflight.pop(key, None)
+
+    async def suggest(self, last_word, exclude=()):
+        """Znane dobre skojarzenie do last_word (z pamięci lub bazy) albo None."""
+        last_word, exclude = normalize_word(last_word), {normalize_word(w) for w in exclude}
+        candidates = [w for w in self.by_word.get(last_word, ()) if w not in exclude]
+        if not candidates:
+            rows = await self.db.fetchall("SELECT new_word FROM association_verdicts WHERE last_word = %s AND verdict AND created_at > now() - make_interval(secs => %s) LIMIT 50", (last_word, self.ttl))
+            candidates = [r['new_word'] for r in rows if r['new_word'] not in exclude]
+        if not candidates: return None
+        self.stats['suggestions'] += 1; return random.choice(candidates)
+
+    async def prune(self):
+        def op(cur):
+            cur.execute("DELETE FROM association_verdicts WHERE created_at < now() - make_interval(secs => %s)", (self.ttl,))
+            cur.execute("SELECT count(*) FROM association_verdicts"); excess = cur.fetchone()[0] - self.max_rows
+            if excess > 0: cur.execute("DELETE FROM association_verdicts WHERE ctid IN (SELECT ctid FROM association_verdicts ORDER BY created_at LIMIT %s)", (excess,))
+        await self.db.run(op)